@@ -0,0 +1,253 @@
+"""Wire formats for the scoring endpoints, chosen by Content-Type and Accept.
+
+- application/json (default)
+- application/msgpack: the same documents as JSON, for single and batch calls
+- application/vnd.apache.arrow.stream: Arrow IPC record batches with one
+  column per CreditScoreRequest field, for columnar bulk calls on the batch
+  endpoint. Columns are handed to the vectorized scorers as NumPy views of
+  the Arrow buffers, without building a request object per row.
+
+msgpack and pyarrow are optional and imported on first use. Asking for a
+format whose library is not installed gets 415 (request) or 406 (response).
+"""
+
+from typing import Any, Dict, Optional, Sequence, Tuple, Type
+import annotated_types
+import numpy as np
+from fastapi import HTTPException, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from app.api.responses import ModelJSONResponse
+from app.schemas.credit import CreditScoreRequest, RiskLevel, RecommendedAction
+from app.services import vectorized
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+ROW_FORMATS = (JSON, MSGPACK)
+_ALIASES = {"application/x-msgpack": MSGPACK}
+
+# Field constraint -> (bound attribute, check, message)
+_CONSTRAINTS = {
+    annotated_types.Ge: ("ge", np.greater_equal, "greater than or equal to {}"),
+    annotated_types.Gt: ("gt", np.greater, "greater than {}"),
+    annotated_types.Le: ("le", np.less_equal, "less than or equal to {}"),
+    annotated_types.Lt: ("lt", np.less, "less than {}"),
+}
+
+
+def media_type(header: Optional[str]) -> str:
+    """Bare media type of a Content-Type header; JSON when absent."""
+    if not header:
+        return JSON
+    kind = header.split(";", 1)[0].strip().lower()
+    return _ALIASES.get(kind, kind)
+
+
+def _quality(params: str) -> float:
+    for param in params.split(";"):
+        key, _, value = param.strip().partition("=")
+        if key == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 1.0
+    return 1.0
+
+
+def negotiate(accept: Optional[str], offered: Sequence[str]) -> str:
+    """First offered type allowed by Accept, in the order the client lists them.
+
+    q-values are not weighed; types with q=0 are skipped. Raises 406 when
+    nothing offered is acceptable.
+    """
+    if not accept:
+        return offered[0]
+    for part in accept.split(","):
+        kind, _, params = part.partition(";")
+        if _quality(params) == 0:
+            continue
+        kind = _ALIASES.get(kind.strip().lower(), kind.strip().lower())
+        if kind in ("*/*", "application/*"):
+            return offered[0]
+        if kind in offered:
+            return kind
+    raise HTTPException(
+        status_code=status.HTTP_406_NOT_ACCEPTABLE,
+        detail=f"Supported response types: {', '.join(offered)}",
+    )
+
+
+def _import_msgpack(status_code: int):
+    try:
+        import msgpack
+    except ImportError:
+        raise HTTPException(status_code=status_code, detail="MessagePack support requires msgpack: pip install msgpack")
+    return msgpack
+
+
+def _import_pyarrow(status_code: int):
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        raise HTTPException(status_code=status_code, detail="Arrow support requires pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def _body_error(error_type: str, msg: str, loc: tuple = ()) -> RequestValidationError:
+    return RequestValidationError([{"type": error_type, "loc": ("body", *loc), "msg": msg, "input": None}])
+
+
+def _body_errors(error: ValidationError) -> RequestValidationError:
+    return RequestValidationError([
+        {**err, "loc": ("body", *err["loc"])}
+        for err in error.errors(include_url=False)
+    ])
+
+
+async def decode_body(request: Request, model: Type[BaseModel]) -> BaseModel:
+    """Validate a JSON or MessagePack body into `model`."""
+    kind = media_type(request.headers.get("content-type"))
+    if kind not in ROW_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported Content-Type {kind}; use {' or '.join(ROW_FORMATS)}",
+        )
+
+    body = await request.body()
+    try:
+        if kind == JSON:
+            return model.model_validate_json(body)
+        msgpack = _import_msgpack(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        try:
+            data = msgpack.unpackb(body)
+        except ValueError as e:
+            raise _body_error("msgpack_invalid", f"Invalid MessagePack: {e}")
+        return model.model_validate(data)
+    except ValidationError as e:
+        raise _body_errors(e)
+
+
+class MsgpackResponse(Response):
+    """MessagePack response carrying the same document as the JSON response."""
+
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> bytes:
+        return _import_msgpack(status.HTTP_406_NOT_ACCEPTABLE).packb(content.model_dump(mode="json"))
+
+
+def encode(content: BaseModel, kind: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Response for a negotiated row format."""
+    if kind == MSGPACK:
+        return MsgpackResponse(content, headers=headers)
+    return ModelJSONResponse(content, headers=headers)
+
+
+def request_body(model: Type[BaseModel], columnar: bool = False) -> Dict[str, Any]:
+    """openapi_extra documenting the accepted request bodies."""
+    schema = model.model_json_schema()
+    content = {kind: {"schema": schema} for kind in ROW_FORMATS}
+    if columnar:
+        content[ARROW_STREAM] = {
+            "schema": {"type": "string", "format": "binary"},
+            "description": "Arrow IPC stream with one column per CreditScoreRequest field",
+        }
+    return {"requestBody": {"required": True, "content": content}}
+
+
+def _column(table, name: str, dtype: np.dtype) -> np.ndarray:
+    field = CreditScoreRequest.model_fields[name]
+    if name not in table.column_names:
+        if field.is_required():
+            raise _body_error("missing", "Field required", (name,))
+        return np.full(table.num_rows, field.default, dtype=dtype)
+
+    column = table.column(name)
+    if column.null_count:
+        raise _body_error("missing", "Field required", (name, column.to_pylist().index(None)))
+    if column.num_chunks == 1 and column.type.to_pandas_dtype() == dtype:
+        # A view onto the Arrow buffer
+        values = column.chunk(0).to_numpy(zero_copy_only=True)
+    else:
+        try:
+            values = column.to_numpy().astype(dtype, casting="same_kind" if dtype == np.float64 else "safe")
+        except TypeError:
+            raise _body_error(
+                "int_type" if dtype == np.int64 else "float_type",
+                f"Column must be {'an integer' if dtype == np.int64 else 'a numeric'} type, got {column.type}",
+                (name,),
+            )
+
+    for constraint in field.metadata:
+        check = _CONSTRAINTS.get(type(constraint))
+        if check is None:
+            continue
+        attribute, test, message = check
+        bound = getattr(constraint, attribute)
+        failed = np.flatnonzero(~test(values, bound))
+        if len(failed):
+            raise _body_error("value_error", f"Input should be {message.format(bound)}", (name, int(failed[0])))
+    return values
+
+
+def read_arrow_columns(body: bytes) -> Tuple[Any, vectorized.Columns]:
+    """Decode an Arrow IPC stream into (wallet_address array, request columns).
+
+    Numeric columns that are already int64/float64 in a single chunk come
+    back as zero-copy NumPy views; anything else is cast once. Missing
+    optional columns take the request schema defaults.
+    """
+    pa = _import_pyarrow(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowInvalid as e:
+        raise _body_error("arrow_invalid", f"Invalid Arrow IPC stream: {e}")
+    if table.num_rows == 0:
+        raise _body_error("too_short", "Batch should have at least 1 row")
+    if "wallet_address" not in table.column_names:
+        raise _body_error("missing", "Field required", ("wallet_address",))
+    wallet_address = table.column("wallet_address")
+    if not (pa.types.is_string(wallet_address.type) or pa.types.is_large_string(wallet_address.type)):
+        raise _body_error("string_type", f"Column must be a string type, got {wallet_address.type}", ("wallet_address",))
+    if wallet_address.null_count:
+        raise _body_error("missing", "Field required", ("wallet_address", wallet_address.to_pylist().index(None)))
+
+    columns = {name: _column(table, name, np.dtype(np.int64)) for name in vectorized.INT_FIELDS}
+    for name in vectorized.FLOAT_FIELDS:
+        columns[name] = _column(table, name, np.dtype(np.float64))
+    return wallet_address, columns
+
+
+def write_arrow(wallet_address, scores: vectorized.Columns, metadata: Dict[str, str]) -> bytes:
+    """Encode scoring result columns as an Arrow IPC stream.
+
+    risk_level and recommended_action are dictionary-encoded from the policy
+    codes; run-level values (model_version, policy_version, is_fallback,
+    processing_time_ms) travel in the schema metadata.
+    """
+    pa = _import_pyarrow(status.HTTP_406_NOT_ACCEPTABLE)
+    table = pa.table(
+        {
+            "wallet_address": wallet_address,
+            "credit_score": scores["credit_score"],
+            "fraud_score": scores["fraud_score"],
+            "anomaly_score": scores["anomaly_score"],
+            "risk_level": pa.DictionaryArray.from_arrays(
+                scores["risk_level"].astype(np.int32), [level.value for level in RiskLevel]
+            ),
+            "default_probability": scores["default_probability"],
+            "recommended_action": pa.DictionaryArray.from_arrays(
+                scores["recommended_action"].astype(np.int32), [action.value for action in RecommendedAction]
+            ),
+            "interest_rate_suggestion": scores["interest_rate_suggestion"],
+            "max_loan_amount": scores["max_loan_amount"],
+        },
+        metadata=metadata,
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
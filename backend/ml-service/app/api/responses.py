@@ -0,0 +1,19 @@
+"""Response classes that serialize pydantic models directly to bytes."""
+
+from typing import Any
+from fastapi import Response
+
+
+class ModelJSONResponse(Response):
+    """JSON response rendered by the model's own pydantic-core serializer.
+
+    Endpoints return these instead of the model itself, which skips FastAPI's
+    response_model pass (dump, re-validate, dump again, json.dumps). The
+    model was already validated when the service built it. The route's
+    response_model still documents the schema in OpenAPI.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return content.__pydantic_serializer__.to_json(content)
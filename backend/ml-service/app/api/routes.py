@@ -1,56 +1,498 @@
-from fastapi import APIRouter, HTTPException, status
-from app.schemas.credit import CreditScoreRequest, CreditScoreResponse
-from app.services.inference import InferenceService
-from app.services.explainability import ExplainabilityService
-from app.services.fallback import FallbackService
+import asyncio
+import json
+import os
+from typing import Optional, AsyncIterator, List, Union
+from fastapi import APIRouter, HTTPException, Header, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from app.schemas.credit import (
+    CreditScoreRequest,
+    CreditScoreResponse,
+    BatchCreditScoreRequest,
+    BatchCreditScoreResponse,
+    ExplanationResponse,
+    ExplanationStatus,
+)
+from app.api import codecs
+from app.models.registry import model_registry
+from app.models.rules import rules_engine
+from app.services import pipeline
+from app.services.policy import decision_policy
+from app.services.batching import MicroBatcher
+from app.services.executor import InferenceExecutor
+from app.services.cache import PredictionCache, make_cache_key
+from app.services.explanations import DeferredExplainer, ExplanationStore
+from app.services.shadow import shadow_scorer
+from app.services.singleflight import SingleFlight
+from app.services.warmup import ModelWarmup
+from app.utils.metrics import metrics_registry
 from app.utils.timers import Timer
+from app.core.config import settings
 from app.core.logging import get_logger
 
 router = APIRouter()
 logger = get_logger(__name__)
 
-inference_service = InferenceService()
-explainability_service = ExplainabilityService()
-fallback_service = FallbackService()
+inference_executor = InferenceExecutor(
+    kind=settings.INFERENCE_EXECUTOR,
+    max_workers=settings.INFERENCE_WORKERS,
+)
+micro_batcher = MicroBatcher(
+    pipeline.inference_service,
+    max_batch_size=settings.MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=settings.MICRO_BATCH_MAX_WAIT_MS,
+    queue_depth=settings.MICRO_BATCH_QUEUE_DEPTH,
+    executor=inference_executor,
+)
 
+prediction_cache = PredictionCache(
+    max_size=settings.PREDICTION_CACHE_SIZE,
+    ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS,
+    loaded_versions=model_registry.versions,
+)
+scoring_flights = SingleFlight("scoring_singleflight")
+explanation_store = ExplanationStore(
+    max_size=settings.EXPLANATION_STORE_SIZE,
+    ttl_seconds=settings.EXPLANATION_TTL_SECONDS,
+)
+deferred_explainer = DeferredExplainer(
+    pipeline.explain_requests,
+    explanation_store,
+    queue_depth=settings.EXPLANATION_QUEUE_DEPTH,
+    max_batch_size=settings.EXPLANATION_MAX_BATCH_SIZE,
+    executor=inference_executor,
+)
+model_warmup = ModelWarmup(inference_executor, cold_start_mode=settings.COLD_START_MODE)
+cold_requests = metrics_registry.counter("cold_start_requests")
+
+COLD_RETRY_AFTER_SECONDS = "1"
+EXPLANATION_MODES = ("inline", "deferred")
+
+
+def _cache_directives(cache_control: Optional[str]) -> set:
+    if not cache_control:
+        return set()
+    return {d.strip().lower() for d in cache_control.split(",")}
+
+
+async def _model_ready() -> bool:
+    """True once the model is loaded and warm.
+
+    Before that, a request starts background loading if nothing has yet and
+    then, per COLD_START_MODE, waits for it, is rejected with 503, or gets
+    False and is scored with the fallback rules.
+    """
+    if model_warmup.is_ready:
+        return True
+    model_warmup.start()
+    if model_warmup.cold_start_mode == "wait":
+        await model_warmup.wait()
+        return True
+
+    cold_requests.inc()
+    if model_warmup.cold_start_mode == "reject":
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Model is loading",
+            headers={"Retry-After": COLD_RETRY_AFTER_SECONDS},
+        )
+    return False
+
+
+def _pinned_version(model_version: Optional[str]) -> Optional[str]:
+    """Check an X-Model-Version pin against the loaded versions (None: live model)."""
+    if model_version is not None and not model_registry.has_version(model_version):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model version {model_version} is not loaded; available: {', '.join(model_registry.versions())}",
+        )
+    return model_version
+
+
+def _explanations_deferred(explanation_mode: Optional[str]) -> bool:
+    """Whether to answer before explaining, per X-Explanation-Mode or EXPLANATION_MODE."""
+    mode = (explanation_mode or settings.EXPLANATION_MODE).strip().lower()
+    if mode not in EXPLANATION_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"X-Explanation-Mode must be one of: {', '.join(EXPLANATION_MODES)}",
+        )
+    # Nothing to defer when explanations are off
+    return mode == "deferred" and pipeline.explainability_service.is_enabled and deferred_explainer.is_running
+
+
+async def _score(
+    request: CreditScoreRequest,
+    pinned_version: Optional[str] = None,
+    deferred: bool = False,
+) -> CreditScoreResponse:
+    explain = not deferred
+    if pinned_version is not None:
+        # The micro-batcher scores every batch on the live model
+        prediction = await inference_executor.run(pipeline.score_request, request, pinned_version, explain)
+    else:
+        prediction = None
+        if micro_batcher.is_running:
+            try:
+                batched = await micro_batcher.submit(request)
+                prediction = await inference_executor.run(pipeline.complete_prediction, request, batched, None, explain)
+            except asyncio.QueueFull:
+                logger.warning("Micro-batch queue full, scoring request directly")
+        if prediction is None:
+            prediction = await inference_executor.run(pipeline.score_request, request, None, explain)
+    if deferred:
+        deferred_explainer.defer([request], [prediction])
+    return prediction
+
+
+@router.post(
+    "/ml/credit-score",
+    response_model=CreditScoreResponse,
+    openapi_extra=codecs.request_body(CreditScoreRequest),
+)
+async def get_credit_score(
+    http_request: Request,
+    cache_control: Optional[str] = Header(None, alias="Cache-Control"),
+    accept: Optional[str] = Header(None),
+    x_model_version: Optional[str] = Header(None, alias="X-Model-Version"),
+    x_explanation_mode: Optional[str] = Header(None, alias="X-Explanation-Mode"),
+):
+    """Main credit scoring endpoint with ML inference.
+
+    Accepts and returns JSON (default) or MessagePack, chosen by
+    `Content-Type` and `Accept`. Send `X-Model-Version` to score on a
+    specific loaded model version instead of the live one (404 if that
+    version is not loaded). `X-Explanation-Mode: deferred` returns the
+    score without waiting for its explanation: the response carries an
+    `explanation_id` for /api/ml/explanations/{id} instead of `top_factors`.
+
+    Repeat requests are served from the prediction cache. Send
+    `Cache-Control: no-cache` to force re-scoring (the fresh result is still
+    cached) or `no-store` to bypass the cache entirely. Identical requests
+    that arrive while one is being scored share its result.
+    """
+    response_type = codecs.negotiate(accept, codecs.ROW_FORMATS)
+    request = await codecs.decode_body(http_request, CreditScoreRequest)
 
-@router.post("/ml/credit-score", response_model=CreditScoreResponse)
-async def get_credit_score(request: CreditScoreRequest):
-    """Main credit scoring endpoint with ML inference."""
-    from app.models.loader import model_loader
-    
-    # Lazy load model if not preloaded
-    if not model_loader.is_loaded:
-        model_loader.load_models()
-    
     timer = Timer()
     timer.start()
-    
+
+    if not await _model_ready():
+        prediction = pipeline.fallback_score(request)
+        prediction.processing_time_ms = timer.elapsed_ms()
+        return codecs.encode(prediction, response_type)
+
+    pinned_version = _pinned_version(x_model_version)
+    deferred = _explanations_deferred(x_explanation_mode)
+    model_version = pinned_version or model_registry.model_version
+    request_key = make_cache_key(
+        request.wallet_address,
+        pipeline.inference_service._extract_features(request),
+        model_version,
+        deferred,
+        rules_version=rules_engine.current().fingerprint,
+        policy_version=decision_policy.version,
+    )
+
+    directives = _cache_directives(cache_control)
+    use_cache = settings.ENABLE_PREDICTION_CACHE and "no-store" not in directives
+    if use_cache and "no-cache" not in directives:
+        cached = prediction_cache.get(request_key, model_version)
+        if cached is not None:
+            cached.processing_time_ms = timer.elapsed_ms()
+            return codecs.encode(cached, response_type, headers={"X-Cache": "HIT"})
+
+    headers = {}
     try:
-        prediction = inference_service.predict(request)
-        
-        if prediction is None:
-            logger.warning("ML model prediction failed, using fallback")
-            prediction = fallback_service.calculate_score(request)
-            prediction.is_fallback = True
-        
-        if explainability_service.is_enabled and not prediction.is_fallback:
-            try:
-                explanation = explainability_service.explain(request)
-                prediction.top_factors = explanation.top_factors
-                prediction.confidence_score = explanation.confidence
-            except Exception as e:
-                logger.warning(f"SHAP explanation failed: {e}")
-        
+        if settings.ENABLE_SINGLE_FLIGHT:
+            prediction, shared = await scoring_flights.do(request_key, lambda: _score(request, pinned_version, deferred))
+            if shared:
+                # Each caller gets its own copy to stamp processing_time_ms on
+                prediction = prediction.model_copy(deep=True)
+        else:
+            prediction, shared = await _score(request, pinned_version, deferred), False
+
+        # Fallback results reflect a transient failure; don't pin them in the cache.
+        # A reload during scoring gives a prediction from the new model, keyed under the old version
+        if use_cache and not shared and not prediction.is_fallback and prediction.model_version == model_version:
+            prediction_cache.put(request_key, model_version, prediction)
+        if use_cache:
+            headers["X-Cache"] = "MISS"
+
         prediction.processing_time_ms = timer.elapsed_ms()
-        
-        return prediction
-        
+        shadow_scorer.submit(request, prediction)
+
+        return codecs.encode(prediction, response_type, headers=headers)
+
     except Exception as e:
         logger.error(f"Credit score prediction error: {e}")
-        
-        fallback_prediction = fallback_service.calculate_score(request)
-        fallback_prediction.is_fallback = True
+
+        fallback_prediction = pipeline.fallback_score(request)
         fallback_prediction.processing_time_ms = timer.elapsed_ms()
-        
-        return fallback_prediction
+
+        return codecs.encode(fallback_prediction, response_type)
+
+
+def _check_batch_size(size: int):
+    if size > settings.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch size {size} exceeds limit of {settings.MAX_BATCH_SIZE}",
+        )
+
+
+async def _score_arrow_batch(http_request: Request, accept: Optional[str], model_version: Optional[str]) -> Response:
+    """Columnar batch: Arrow IPC in, Arrow IPC out, no per-row objects."""
+    codecs.negotiate(accept, (codecs.ARROW_STREAM,))
+    wallet_address, columns = codecs.read_arrow_columns(await http_request.body())
+    _check_batch_size(len(wallet_address))
+
+    timer = Timer()
+    timer.start()
+
+    if await _model_ready():
+        scores, model_version, is_fallback = await inference_executor.run(
+            pipeline.score_columns, columns, _pinned_version(model_version)
+        )
+    else:
+        scores, model_version, is_fallback = pipeline.fallback_columns(columns)
+
+    metadata = {
+        "model_version": model_version,
+        "policy_version": decision_policy.version,
+        "is_fallback": "true" if is_fallback else "false",
+        "processing_time_ms": str(timer.elapsed_ms()),
+    }
+    return Response(
+        codecs.write_arrow(wallet_address, scores, metadata),
+        media_type=codecs.ARROW_STREAM,
+    )
+
+
+@router.post(
+    "/ml/credit-score/batch",
+    response_model=BatchCreditScoreResponse,
+    openapi_extra=codecs.request_body(BatchCreditScoreRequest, columnar=True),
+)
+async def get_credit_scores_batch(
+    http_request: Request,
+    accept: Optional[str] = Header(None),
+    x_model_version: Optional[str] = Header(None, alias="X-Model-Version"),
+    x_explanation_mode: Optional[str] = Header(None, alias="X-Explanation-Mode"),
+):
+    """Batch credit scoring endpoint with vectorized ML inference.
+
+    JSON (default) and MessagePack bodies return a BatchCreditScoreResponse
+    in the format named by `Accept`. An Arrow IPC stream body
+    (`application/vnd.apache.arrow.stream`, one column per request field)
+    is scored column-wise and answered with an Arrow IPC stream of result
+    columns, without explanations. `X-Model-Version` pins the whole batch
+    to one loaded model version. With `X-Explanation-Mode: deferred` each
+    result carries its own `explanation_id` instead of `top_factors`.
+    """
+    if codecs.media_type(http_request.headers.get("content-type")) == codecs.ARROW_STREAM:
+        return await _score_arrow_batch(http_request, accept, x_model_version)
+
+    response_type = codecs.negotiate(accept, codecs.ROW_FORMATS)
+    batch = await codecs.decode_body(http_request, BatchCreditScoreRequest)
+    _check_batch_size(len(batch.requests))
+
+    timer = Timer()
+    timer.start()
+
+    if await _model_ready():
+        deferred = _explanations_deferred(x_explanation_mode)
+        results = await inference_executor.run(
+            pipeline.score_batch, batch.requests, _pinned_version(x_model_version), not deferred
+        )
+        if deferred:
+            deferred_explainer.defer(batch.requests, results)
+        shadow_scorer.submit_many(batch.requests, results)
+    else:
+        results = pipeline.fallback_batch(batch.requests)
+
+    elapsed_ms = timer.elapsed_ms()
+    for prediction in results:
+        prediction.processing_time_ms = elapsed_ms
+
+    return codecs.encode(BatchCreditScoreResponse(results=results, processing_time_ms=elapsed_ms), response_type)
+
+
+@router.get("/ml/explanations/{explanation_id}", response_model=ExplanationResponse)
+async def get_explanation(explanation_id: str, response: Response):
+    """Fetch a deferred explanation by the `explanation_id` its score was returned with.
+
+    Answers 202 with status `pending` until it has been computed, then 200
+    with `ready`, `failed`, or `unavailable` when it was shed because the
+    queue was full. Explanations expire EXPLANATION_TTL_SECONDS
+    after the score was returned; unknown or expired ids get a 404. The
+    store is per process, so with several workers an id created by another
+    one gets a 421 rather than a 404.
+    """
+    stored = explanation_store.get(explanation_id)
+    if stored is None:
+        owner_pid = explanation_store.owner_pid(explanation_id)
+        if owner_pid is not None and owner_pid != os.getpid():
+            raise HTTPException(
+                status_code=status.HTTP_421_MISDIRECTED_REQUEST,
+                detail=f"Explanation {explanation_id} is held by worker process {owner_pid}, not this one; "
+                "deferred explanations are only available from the worker that scored the request",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Explanation {explanation_id} not found or expired",
+        )
+    if stored.status == ExplanationStatus.PENDING:
+        response.status_code = status.HTTP_202_ACCEPTED
+        response.headers["Retry-After"] = COLD_RETRY_AFTER_SECONDS
+    return ExplanationResponse(
+        explanation_id=explanation_id,
+        status=stored.status,
+        model_version=stored.model_version,
+        confidence_score=stored.confidence_score,
+        top_factors=stored.top_factors,
+        error=stored.error,
+    )
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'body'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+async def _iter_ndjson_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Union[bytes, ValueError]]:
+    """Split a byte stream into lines without buffering more than one line.
+
+    Over-long lines are skipped and reported as a ValueError in their place.
+    """
+    buffer = bytearray()
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            piece = chunk[start:] if newline == -1 else chunk[start:newline]
+            if not oversized:
+                buffer += piece
+                if len(buffer) > max_line_bytes:
+                    oversized = True
+                    buffer.clear()
+            if newline == -1:
+                break
+            yield ValueError(f"Line exceeds {max_line_bytes} bytes") if oversized else bytes(buffer)
+            buffer.clear()
+            oversized = False
+            start = newline + 1
+    if oversized:
+        yield ValueError(f"Line exceeds {max_line_bytes} bytes")
+    elif buffer:
+        yield bytes(buffer)
+
+
+async def _score_ndjson_chunk(
+    entries: List[tuple],
+    ready: bool = True,
+    model_version: Optional[str] = None,
+) -> bytes:
+    """Score the valid entries as one batch and render every entry in input order.
+
+    A stream that started before the model was ready is scored with the
+    fallback rules throughout.
+    """
+    timer = Timer()
+    timer.start()
+
+    requests = [entry for _, entry in entries if isinstance(entry, CreditScoreRequest)]
+    if not requests:
+        results = iter([])
+    elif ready:
+        results = iter(await inference_executor.run(pipeline.score_batch, requests, model_version))
+    else:
+        results = iter(pipeline.fallback_batch(requests))
+    elapsed_ms = timer.elapsed_ms()
+
+    lines = []
+    for line_no, entry in entries:
+        if isinstance(entry, CreditScoreRequest):
+            prediction = next(results)
+            prediction.processing_time_ms = elapsed_ms
+            lines.append(prediction.__pydantic_serializer__.to_json(prediction))
+        else:
+            lines.append(json.dumps({"line": line_no, "error": entry}).encode("utf-8"))
+    return b"\n".join(lines) + b"\n"
+
+
+async def _iter_ndjson_entries(body: AsyncIterator[bytes]) -> AsyncIterator[tuple]:
+    """Parse an NDJSON body into (line_no, CreditScoreRequest | error message) entries, as it arrives."""
+    line_no = 0
+    async for line in _iter_ndjson_lines(body, settings.STREAM_MAX_LINE_BYTES):
+        line_no += 1
+        if isinstance(line, ValueError):
+            yield line_no, str(line)
+        elif not line.strip():
+            continue
+        else:
+            try:
+                yield line_no, CreditScoreRequest.model_validate_json(line)
+            except ValidationError as e:
+                yield line_no, _format_validation_error(e)
+
+
+async def _stream_credit_scores(
+    body: AsyncIterator[bytes],
+    ready: bool,
+    model_version: Optional[str],
+) -> AsyncIterator[bytes]:
+    """Read, score and write STREAM_CHUNK_SIZE lines at a time.
+
+    No more of the body is read until the previous chunk has been written,
+    so a slow reader holds back a fast writer through TCP flow control.
+    """
+    chunk_size = settings.STREAM_CHUNK_SIZE
+    entries = []
+    async for entry in _iter_ndjson_entries(body):
+        entries.append(entry)
+        if len(entries) >= chunk_size:
+            yield await _score_ndjson_chunk(entries, ready, model_version)
+            entries = []
+    if entries:
+        yield await _score_ndjson_chunk(entries, ready, model_version)
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """A StreamingResponse whose body generator may still be reading the request.
+
+    StreamingResponse listens for a disconnect on `receive` while it sends
+    (on ASGI servers older than spec 2.4), which would consume request body
+    messages meant for the generator. Here the generator is the only reader;
+    it sees a disconnect as ClientDisconnect from Request.stream().
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+@router.post("/ml/credit-score/stream")
+async def stream_credit_scores(
+    http_request: Request,
+    x_model_version: Optional[str] = Header(None, alias="X-Model-Version"),
+):
+    """Streaming NDJSON scoring for large portfolios.
+
+    The body is newline-delimited CreditScoreRequest objects. Each input line
+    produces one output line, in order: a CreditScoreResponse, or
+    {"line": n, "error": "..."} when that line could not be parsed. The body
+    is read while the response is written: STREAM_CHUNK_SIZE lines at a time
+    are parsed, scored with vectorized inference and written before more is
+    read, so memory stays bounded by one chunk whatever the body size.
+    `X-Model-Version` pins the whole stream to one loaded model version.
+    """
+    ready = await _model_ready()
+    model_version = _pinned_version(x_model_version) if ready else None
+
+    return _DuplexStreamingResponse(
+        _stream_credit_scores(http_request.stream(), ready, model_version),
+        media_type="application/x-ndjson",
+    )
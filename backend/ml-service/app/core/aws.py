@@ -3,7 +3,9 @@
 import boto3
 from botocore.exceptions import ClientError
 import logging
+import os
 from functools import lru_cache
+from typing import Optional
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -66,6 +68,13 @@ class AWSConfig:
                 logger.error(f"Failed to initialize SSM client: {str(e)}")
                 raise
         return cls._ssm_client
+    
+    @classmethod
+    def reset_clients(cls):
+        """Drop cached clients; boto3 clients must not be shared across fork()."""
+        cls._s3_client = None
+        cls._cloudwatch_client = None
+        cls._ssm_client = None
 
 
 class S3ModelLoader:
@@ -105,6 +114,26 @@ class S3ModelLoader:
             self.logger.error(f"Unexpected error downloading model: {str(e)}")
             return False
     
+    def object_etag(self, bucket: str, key: str) -> Optional[str]:
+        """
+        Read an object's ETag without downloading it
+        
+        Args:
+            bucket: S3 bucket name
+            key: S3 object key/path
+            
+        Returns:
+            str: The ETag, or None if the object is missing or unreachable
+        """
+        try:
+            return self.s3_client.head_object(Bucket=bucket, Key=key)["ETag"]
+        except ClientError as e:
+            self.logger.warning(f"Could not read s3://{bucket}/{key}: {str(e)}")
+            return None
+        except Exception as e:
+            self.logger.warning(f"Unexpected error reading s3://{bucket}/{key}: {str(e)}")
+            return None
+    
     def upload_model(self, local_path: str, bucket: str, key: str) -> bool:
         """
         Upload model from local storage to S3
@@ -202,3 +231,15 @@ def get_s3_loader() -> S3ModelLoader:
 def get_cloudwatch_metrics() -> CloudWatchMetrics:
     """Get CloudWatch metrics singleton"""
     return CloudWatchMetrics()
+
+
+def _reset_after_fork():
+    """Give a forked worker its own AWS clients and connection pools."""
+    AWSConfig.reset_clients()
+    get_aws_config.cache_clear()
+    get_s3_loader.cache_clear()
+    get_cloudwatch_metrics.cache_clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -12,9 +12,28 @@ class Settings(BaseSettings):
     # Local model path
     LOCAL_MODEL_PATH: str = "./models/credit_model.pkl"
     
+    # ===== Model Reload =====
+    # Poll the model artifacts (file mtimes, or S3 ETags) this often and hot-swap
+    # a changed model in; 0 disables. POST /model/reload reloads on demand
+    MODEL_WATCH_INTERVAL_SECONDS: float = 0.0
+    
+    # ===== Model Registry =====
+    # Extra models loaded next to the live one, for requests that pin them with
+    # X-Model-Version: comma-separated local model paths, or S3 keys when
+    # MODEL_SOURCE=s3. Each is served under the version in its config
+    ADDITIONAL_MODELS: str = ""
+    # Earlier live models kept loaded (and pinnable) after a reload
+    RETAINED_MODEL_VERSIONS: int = 1
+    
     # ===== S3 Configuration =====
     S3_BUCKET: str = ""
     S3_KEY: str = ""
+    # Content-addressed cache for downloaded artifacts; empty uses models/cache.
+    # Point instances on one host (or a shared volume) at the same directory
+    ARTIFACT_CACHE_DIR: str = ""
+    # Objects larger than this are downloaded as parallel ranged parts
+    ARTIFACT_PART_SIZE_MB: int = 16
+    ARTIFACT_DOWNLOAD_WORKERS: int = 8
     
     # ===== AWS Configuration =====
     # AWS Region
@@ -25,17 +44,102 @@ class Settings(BaseSettings):
     AWS_ACCESS_KEY_ID: Optional[str] = None
     AWS_SECRET_ACCESS_KEY: Optional[str] = None
     
+    # Per-prediction inference metrics in CloudWatch; unset means on when
+    # MODEL_SOURCE=s3. While off, a local-model process never imports boto3
+    ENABLE_CLOUDWATCH_METRICS: Optional[bool] = None
+    
     # ===== API Security =====
     API_KEY: str = "dev-api-key"
     
     # ===== Feature Flags =====
     ENABLE_SHAP: bool = True
-    PRELOAD_MODEL: bool = False  # Load model on startup vs lazy loading
+    # XGBoost models are explained with the booster's own contributions:
+    # "exact" (TreeSHAP) or "approximate" (per-path, much cheaper on deep ensembles)
+    EXPLANATION_CONTRIBUTIONS: str = "exact"
+    # The model is always loaded and warmed in the background from startup;
+    # preload holds startup until that has finished
+    PRELOAD_MODEL: bool = False
+    # Scoring requests that arrive before the model is warm: "fallback" (score
+    # with the fallback rules), "reject" (503 + Retry-After) or "wait"
+    COLD_START_MODE: str = "fallback"
+    
+    # ===== Deferred Explanations =====
+    # "inline" explains before responding; "deferred" responds as soon as the
+    # request is scored, with an explanation_id to fetch top factors from
+    # /api/ml/explanations/{id}. X-Explanation-Mode overrides it per request
+    EXPLANATION_MODE: str = "inline"
+    EXPLANATION_STORE_SIZE: int = 10000  # Finished and pending explanations kept; oldest evicted first
+    EXPLANATION_TTL_SECONDS: float = 300.0
+    EXPLANATION_QUEUE_DEPTH: int = 1000  # Requests beyond this are marked unavailable
+    EXPLANATION_MAX_BATCH_SIZE: int = 64
+    
+    # ===== Batch Scoring =====
+    MAX_BATCH_SIZE: int = 1000  # Max requests accepted by /api/ml/credit-score/batch
+    STREAM_CHUNK_SIZE: int = 256  # Rows scored together by /api/ml/credit-score/stream
+    STREAM_MAX_LINE_BYTES: int = 65536
+    
+    # ===== Scoring Rules =====
+    # JSON spec for the heuristic fraud/anomaly/fallback scores (see app/models/rules.py).
+    # Empty: models/scoring_rules.json next to feature_config.json if present,
+    # otherwise the rules packaged with the app
+    RULES_PATH: str = ""
+    RULES_RELOAD_INTERVAL_SECONDS: float = 5.0  # How often to check the spec for changes; 0 disables
+    
+    # ===== Inference Engine =====
+    # "compiled" evaluates the XGBoost trees with NumPy (see app/models/tree_compiler.py),
+    # bypassing the sklearn wrapper's per-call overhead; "sklearn" uses predict_proba.
+    # Non-XGBoost models, or a compiled model that fails the load-time parity check,
+    # use predict_proba either way
+    INFERENCE_ENGINE: str = "compiled"
+    # Larger matrices go through the native model, which wins at high row counts
+    COMPILED_ENGINE_MAX_ROWS: int = 32
+    # Fold the StandardScaler into compiled thresholds so scaler.transform is skipped
+    FUSE_SCALER: bool = True
+    
+    # ===== Inference Executor =====
+    # Predict/SHAP/fallback run here instead of on the asyncio event loop
+    INFERENCE_EXECUTOR: str = "thread"  # "thread" or "process"
+    INFERENCE_WORKERS: int = 4
+    
+    # ===== Prediction Cache =====
+    # Keyed on wallet, feature vector and model version; see app/services/cache.py
+    ENABLE_PREDICTION_CACHE: bool = True
+    PREDICTION_CACHE_SIZE: int = 10000
+    PREDICTION_CACHE_TTL_SECONDS: float = 60.0
+    # Concurrent identical requests share one in-flight computation
+    ENABLE_SINGLE_FLIGHT: bool = True
+    
+    # ===== Micro-batching =====
+    # Coalesce concurrent single-wallet requests into one model call
+    ENABLE_MICRO_BATCHING: bool = False
+    MICRO_BATCH_MAX_SIZE: int = 64
+    MICRO_BATCH_MAX_WAIT_MS: float = 2.0
+    MICRO_BATCH_QUEUE_DEPTH: int = 1024
+    
+    # ===== Shadow Scoring =====
+    # A challenger model scores a sample of live requests in the background and
+    # logs how it compares with the primary; see app/services/shadow.py
+    ENABLE_SHADOW_MODEL: bool = False
+    SHADOW_LOCAL_MODEL_PATH: str = ""  # Challenger model file (scaler/config alongside, as for LOCAL_MODEL_PATH)
+    SHADOW_S3_KEY: str = ""  # Or a challenger key in S3_BUCKET; takes precedence over the local path
+    SHADOW_SAMPLE_RATE: float = 0.1
+    SHADOW_QUEUE_DEPTH: int = 1000  # Samples beyond this are dropped
+    SHADOW_MAX_BATCH_SIZE: int = 64
+    SHADOW_MAX_LAG_MS: float = 1000.0  # Samples queued longer than this are skipped
+    SHADOW_LOG_PATH: str = "./logs/shadow_comparisons.jsonl"
     
     # ===== Server Configuration =====
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = False
+    PREFORK_WORKERS: int = 2  # Worker processes forked by `python -m app.prefork`
+    # Also serve on this Unix domain socket for callers on the same host; see app/server.py
+    UDS_PATH: str = ""
+    UDS_PERMISSIONS: str = "660"  # Octal file mode of the socket
+    # Persistent connections: keep idle keep-alive connections open this long
+    KEEPALIVE_TIMEOUT_SECONDS: int = 75
+    LISTEN_BACKLOG: int = 2048
+    ACCESS_LOG: bool = True
     
     # ===== Logging =====
     LOG_LEVEL: str = "INFO"
@@ -49,6 +153,13 @@ class Settings(BaseSettings):
     def has_explicit_credentials(self) -> bool:
         """Check if explicit AWS credentials are configured"""
         return bool(self.AWS_ACCESS_KEY_ID and self.AWS_SECRET_ACCESS_KEY)
+    
+    @property
+    def cloudwatch_metrics_enabled(self) -> bool:
+        """Check if inference metrics should be sent to CloudWatch"""
+        if self.ENABLE_CLOUDWATCH_METRICS is None:
+            return self.MODEL_SOURCE == "s3"
+        return self.ENABLE_CLOUDWATCH_METRICS
 
 
 @lru_cache()
@@ -1,4 +1,5 @@
 import logging
+import os
 import sys
 import uuid
 from typing import Optional
@@ -46,3 +47,18 @@ def get_logger(name: str) -> logging.Logger:
     """Get a logger instance with request ID support."""
     logger = logging.getLogger(name)
     return logger
+
+
+
+def _flush_handlers():
+    """Flush buffered log output so forked children don't emit it twice."""
+    for handler in logging.getLogger().handlers:
+        try:
+            handler.flush()
+        except Exception:
+            pass
+
+
+# logging re-creates handler locks in the child itself; we only need to flush first
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_flush_handlers)
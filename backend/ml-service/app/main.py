@@ -1,33 +1,59 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 import uuid
 
-from app.api.routes import router as api_router
+from app.api.routes import router as api_router, micro_batcher, inference_executor, model_warmup, deferred_explainer
 from app.core.config import settings
 from app.core.security import verify_api_key
 from app.core.logging import setup_logging, request_id_var, get_logger
-from app.models.loader import ModelLoader
+from app.models.loader import ModelReloadError
+from app.models.registry import model_registry
+from app.models.watcher import model_watcher
+from app.models.rules import rules_engine
+from app.services.shadow import shadow_scorer, shadow_configured
+from app.utils.memory import process_memory
+from app.utils.metrics import metrics_registry
 
 
 setup_logging(settings.LOG_LEVEL)
 logger = get_logger(__name__)
 
-model_loader = ModelLoader()
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting LYNQ ML Service...")
     if settings.PRELOAD_MODEL:
         logger.info("Preloading model on startup...")
-        model_loader.load_models()
-        logger.info("Models loaded successfully")
+        await model_warmup.wait()
     else:
-        logger.info("Lazy loading enabled - model will load on first request")
+        # /ready flips once this finishes; scoring requests until then follow COLD_START_MODE
+        model_warmup.start()
+    if settings.ENABLE_MICRO_BATCHING:
+        await micro_batcher.start()
+    if settings.ENABLE_SHAP:
+        await deferred_explainer.start()
+    if settings.ENABLE_SHADOW_MODEL:
+        if shadow_configured():
+            shadow_scorer.start()
+        else:
+            logger.error("ENABLE_SHADOW_MODEL is set but neither SHADOW_LOCAL_MODEL_PATH nor SHADOW_S3_KEY is")
+    if settings.MODEL_WATCH_INTERVAL_SECONDS > 0:
+        if inference_executor.kind == "process":
+            logger.warning("Model watching is not supported with the process inference executor")
+        else:
+            model_watcher.start()
     yield
     logger.info("Shutting down LYNQ ML Service...")
+    await micro_batcher.stop()
+    await deferred_explainer.stop()
+    shadow_scorer.stop()
+    model_watcher.stop()
+    inference_executor.shutdown()
 
 
 app = FastAPI(
@@ -55,19 +81,38 @@ app.add_middleware(
     allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["GET", "POST"],  # Restrict methods
-    allow_headers=["X-API-KEY", "Content-Type", "Authorization"],
+    allow_headers=["X-API-KEY", "Content-Type", "Authorization", "Cache-Control", "X-Model-Version", "X-Explanation-Mode"],
 )
 
 
-@app.middleware("http")
-async def add_request_id(request: Request, call_next):
-    """Add request ID to each request for tracing."""
-    request_id = str(uuid.uuid4())
-    request_id_var.set(request_id)
+class RequestIDMiddleware:
+    """Add request ID to each request for tracing.
+    
+    Plain ASGI rather than @app.middleware("http"): that wraps the app in
+    BaseHTTPMiddleware, which cuts the request body off once the response
+    has started, so the NDJSON stream could not read its body while writing.
+    """
+    
+    def __init__(self, app):
+        self.app = app
     
-    response = await call_next(request)
-    response.headers["X-Request-ID"] = request_id
-    return response
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_id = str(uuid.uuid4())
+        request_id_var.set(request_id)
+        
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
+        
+        await self.app(scope, receive, send_with_request_id)
+
+
+app.add_middleware(RequestIDMiddleware)
 
 
 app.include_router(api_router, prefix="/api", dependencies=[Depends(verify_api_key)])
@@ -86,30 +131,99 @@ async def health_check():
     
     return {
         "status": "ok",
-        "model_loaded": model_loader.is_loaded,
-        "model_version": model_loader.model_version,
+        "model_loaded": model_registry.is_loaded,
+        "model_version": model_registry.model_version,
+        "model_versions": model_registry.versions(),
         "uptime_seconds": uptime_seconds,
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once the model is loaded and warmed, 503 until then.
+    
+    Unlike /health (liveness), route traffic to an instance only once this
+    succeeds, so no request lands on a cold model.
+    """
+    model_warmup.start()
+    if not model_warmup.is_ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "loading", "model_loaded": model_registry.is_loaded},
+        )
+    return {"status": "ready", "model_version": model_registry.model_version}
+
+
 @app.get("/model/info")
 async def model_info(api_key: str = Depends(verify_api_key)):
-    """Get model metadata and configuration."""
-    feature_config = model_loader.get_feature_config()
+    """Get model metadata and configuration.
     
-    return {
-        "model_version": model_loader.model_version,
-        "trained_on": "kaggle" if "kaggle" in model_loader.model_version.lower() else "synthetic",
-        "features": len(model_loader.get_feature_names()),
-        "feature_names": model_loader.get_feature_names(),
+    `process` is the memory of the worker answering; with the process
+    inference executor, `inference_worker` is that of one pool worker,
+    which holds its own model copy.
+    """
+    bundle = model_registry.current()
+    feature_config = bundle.feature_config
+    
+    info = {
+        "model_version": bundle.version,
+        "trained_on": "kaggle" if "kaggle" in bundle.version.lower() else "synthetic",
+        "features": len(bundle.feature_names),
+        "feature_names": bundle.feature_names,
         "model_source": settings.MODEL_SOURCE,
         "shap_enabled": settings.ENABLE_SHAP,
+        "rules_version": rules_engine.current().version,
         "auc_roc": feature_config.get("auc_roc", None) if feature_config else None,
-        "frameworks": ["scikit-learn", "xgboost", "lightgbm"] if model_loader.get_model() else [],
+        "frameworks": ["scikit-learn", "xgboost", "lightgbm"] if bundle.model else [],
         "last_updated": feature_config.get("last_updated", None) if feature_config else None,
+        "artifact_format": bundle.artifact_format,
+        "load_seconds": round(bundle.load_seconds, 3),
+        "memory_bytes": bundle.memory_bytes,
+        "process": process_memory(),
     }
+    if inference_executor.kind == "process":
+        info["inference_worker"] = await inference_executor.run(process_memory)
+    return info
+
+
+@app.get("/model/versions")
+async def model_versions(api_key: str = Depends(verify_api_key)):
+    """Every loaded model version with its load time and approximate memory footprint.
+    
+    Any of these can be pinned per request with the X-Model-Version header.
+    """
+    return {"live_version": model_registry.model_version, "versions": model_registry.describe()}
+
+
+@app.post("/model/reload")
+async def reload_model(api_key: str = Depends(verify_api_key)):
+    """Load the current model artifacts and swap them in without downtime.
+    
+    The new model is loaded, validated and warmed on a background thread
+    while requests keep being served by the old one; requests in flight at
+    the swap finish on the model they started with. On failure the old
+    model stays live.
+    """
+    if inference_executor.kind == "process":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Models are loaded in the inference worker processes; restart the service to reload",
+        )
+    try:
+        previous_version, model_version = await asyncio.to_thread(model_registry.reload)
+    except ModelReloadError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    
+    return {"status": "reloaded", "previous_version": previous_version, "model_version": model_version}
+
+
+@app.get("/metrics")
+async def service_metrics(api_key: str = Depends(verify_api_key)):
+    """In-process counters and histograms (micro-batching, caching, etc.)."""
+    return metrics_registry.snapshot()
 
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host=settings.HOST, port=settings.PORT)
+    from app.server import serve
+    serve(app)
@@ -0,0 +1,246 @@
+"""Local, content-addressed cache for model artifacts fetched from S3.
+
+    <root>/objects/<sha256>      artifact contents, named by their SHA-256
+    <root>/refs/<sha1 of key>    {"bucket", "key", "etag", "sha256", "size"} of the cached copy
+
+A fetch revalidates a cached object with a conditional HEAD (If-None-Match
+on the cached ETag): an unchanged object costs one 304 and no transfer, so
+restarts load from local disk and instances sharing the cache directory
+download each object once. A new or changed object is downloaded into a
+temp file, as parallel ranged GETs when it is larger than the part size
+(every part pinned to the same ETag with If-Match), checked against the
+expected size and the ETag's MD5, and only then renamed into place. A crash
+mid-download leaves a temp file that is never read, not a torn artifact.
+
+A multipart upload's ETag is the MD5 of its parts' MD5s plus "-<parts>".
+Its upload part size is read with a HEAD for part 1, and the same composite
+is rebuilt from the downloaded bytes. A store that cannot report part sizes
+leaves such an object checked by length only, which is logged and counted
+in artifact_unverified_downloads.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from botocore.exceptions import ClientError
+from app.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+NOT_MODIFIED_CODES = ("304", "NotModified")
+NOT_FOUND_CODES = ("404", "NoSuchKey", "NotFound")
+# Single-part uploads have the content MD5 as their ETag; multipart ETags end in "-<parts>"
+MD5_ETAG = re.compile(r'^"?([0-9a-f]{32})"?$')
+MULTIPART_ETAG = re.compile(r'^"?([0-9a-f]{32})-(\d+)"?$')
+# Orphaned objects and abandoned downloads younger than this may still be in use
+PRUNE_AGE_SECONDS = 3600
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+class ArtifactDownloadError(Exception):
+    """An object could not be downloaded intact."""
+
+
+class ArtifactCache:
+    def __init__(self, root: str, s3_client, part_size: int = 16 * 1024 * 1024, max_workers: int = 8):
+        self.root = root
+        self._s3 = s3_client
+        self.part_size = part_size
+        self.max_workers = max_workers
+        self._objects_dir = os.path.join(root, "objects")
+        self._refs_dir = os.path.join(root, "refs")
+        self._hits = metrics_registry.counter("artifact_cache_hits")
+        self._misses = metrics_registry.counter("artifact_cache_misses")
+        self._downloaded_bytes = metrics_registry.counter("artifact_download_bytes")
+        self._unverified = metrics_registry.counter("artifact_unverified_downloads")
+
+    def fetch(self, bucket: str, key: str) -> Optional[str]:
+        """Local path of the current contents of s3://bucket/key, or None if it doesn't exist."""
+        os.makedirs(self._objects_dir, exist_ok=True)
+        os.makedirs(self._refs_dir, exist_ok=True)
+
+        ref = self._read_ref(bucket, key)
+        if ref is not None and not os.path.exists(self._object_path(ref["sha256"])):
+            ref = None
+        try:
+            if ref is not None:
+                head = self._s3.head_object(Bucket=bucket, Key=key, IfNoneMatch=ref["etag"])
+            else:
+                head = self._s3.head_object(Bucket=bucket, Key=key)
+        except ClientError as e:
+            code = str(e.response.get("Error", {}).get("Code"))
+            if code in NOT_MODIFIED_CODES and ref is not None:
+                self._hits.inc()
+                return self._object_path(ref["sha256"])
+            if code in NOT_FOUND_CODES:
+                return None
+            raise
+
+        etag, size = head["ETag"], int(head["ContentLength"])
+        if ref is not None and ref["etag"] == etag:
+            # Some S3-compatible stores ignore If-None-Match on HEAD
+            self._hits.inc()
+            return self._object_path(ref["sha256"])
+
+        self._misses.inc()
+        start = time.perf_counter()
+        sha256 = self._download(bucket, key, etag, size)
+        self._write_ref(bucket, key, {"bucket": bucket, "key": key, "etag": etag, "sha256": sha256, "size": size})
+        logger.info(f"Downloaded s3://{bucket}/{key} ({size} bytes) in {time.perf_counter() - start:.2f}s")
+        return self._object_path(sha256)
+
+    def fetch_many(self, bucket: str, keys: List[str]) -> Dict[str, Optional[str]]:
+        """fetch() for several keys concurrently."""
+        if not keys:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(len(keys), self.max_workers)) as pool:
+            paths = list(pool.map(lambda key: self.fetch(bucket, key), keys))
+        return dict(zip(keys, paths))
+
+    def publish(self, path: str, destination: str):
+        """Atomically place a copy of a cached object at `destination`."""
+        directory = os.path.dirname(os.path.abspath(destination))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".publish-")
+        os.close(fd)
+        try:
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, destination)
+        except BaseException:
+            _remove(tmp)
+            raise
+
+    def prune(self, max_age_seconds: float = PRUNE_AGE_SECONDS):
+        """Delete objects no ref points to, and abandoned downloads, older than max_age_seconds."""
+        if not os.path.isdir(self._objects_dir):
+            return
+        referenced = set()
+        for name in os.listdir(self._refs_dir):
+            try:
+                with open(os.path.join(self._refs_dir, name)) as f:
+                    referenced.add(json.load(f)["sha256"])
+            except (OSError, ValueError, KeyError):
+                continue
+        cutoff = time.time() - max_age_seconds
+        for name in os.listdir(self._objects_dir):
+            path = os.path.join(self._objects_dir, name)
+            try:
+                if name not in referenced and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    logger.info(f"Pruned cached artifact {name}")
+            except OSError:
+                continue
+
+    def _download(self, bucket: str, key: str, etag: str, size: int) -> str:
+        """Download into a temp file, verify it and rename it into place; returns its SHA-256."""
+        multipart = MULTIPART_ETAG.match(etag)
+        upload_part_size = self._upload_part_size(bucket, key, etag) if multipart else None
+        fd, tmp = tempfile.mkstemp(dir=self._objects_dir, prefix=".download-")
+        try:
+            with os.fdopen(fd, "r+b") as f:
+                if size > self.part_size:
+                    f.truncate(size)
+                    ranges = [(offset, min(offset + self.part_size, size) - 1) for offset in range(0, size, self.part_size)]
+                    with ThreadPoolExecutor(max_workers=min(len(ranges), self.max_workers)) as pool:
+                        list(pool.map(lambda r: self._download_range(bucket, key, etag, f.fileno(), *r), ranges))
+                else:
+                    body = self._s3.get_object(Bucket=bucket, Key=key, IfMatch=etag)["Body"]
+                    shutil.copyfileobj(body, f, READ_CHUNK_BYTES)
+
+            sha256, md5, length = _digest(tmp, upload_part_size)
+            if length != size:
+                raise ArtifactDownloadError(f"s3://{bucket}/{key}: got {length} bytes, expected {size}")
+            if multipart and upload_part_size is None:
+                self._unverified.inc()
+                logger.warning(f"s3://{bucket}/{key}: part size of multipart ETag {etag} unknown, checked by length only")
+            elif (multipart or MD5_ETAG.match(etag)) and etag.strip('"') != md5:
+                raise ArtifactDownloadError(f"s3://{bucket}/{key}: MD5 {md5} does not match ETag {etag}")
+
+            os.replace(tmp, self._object_path(sha256))
+            self._downloaded_bytes.inc(size)
+            return sha256
+        except BaseException:
+            _remove(tmp)
+            raise
+
+    def _upload_part_size(self, bucket: str, key: str, etag: str) -> Optional[int]:
+        """Size of part 1 of a multipart upload (all parts but the last share it), or None if unavailable."""
+        try:
+            head = self._s3.head_object(Bucket=bucket, Key=key, PartNumber=1, IfMatch=etag)
+            part_size = int(head["ContentLength"])
+        except (ClientError, KeyError, TypeError, ValueError) as e:
+            logger.debug(f"s3://{bucket}/{key}: no part size for {etag}: {e}")
+            return None
+        return part_size if part_size > 0 else None
+
+    def _download_range(self, bucket: str, key: str, etag: str, fd: int, start: int, end: int):
+        body = self._s3.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}", IfMatch=etag)["Body"]
+        data = body.read()
+        if len(data) != end - start + 1:
+            raise ArtifactDownloadError(f"s3://{bucket}/{key}: short read for bytes {start}-{end}")
+        os.pwrite(fd, data, start)
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self._objects_dir, sha256)
+
+    def _ref_path(self, bucket: str, key: str) -> str:
+        return os.path.join(self._refs_dir, hashlib.sha1(f"{bucket}/{key}".encode()).hexdigest())
+
+    def _read_ref(self, bucket: str, key: str) -> Optional[dict]:
+        try:
+            with open(self._ref_path(bucket, key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_ref(self, bucket: str, key: str, ref: dict):
+        fd, tmp = tempfile.mkstemp(dir=self._refs_dir, prefix=".ref-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(ref, f)
+            os.replace(tmp, self._ref_path(bucket, key))
+        except BaseException:
+            _remove(tmp)
+            raise
+
+
+def _digest(path: str, part_size: Optional[int] = None):
+    """(sha256 hex, md5 hex, length) of a file, in one pass.
+
+    With part_size the MD5 is the multipart ETag form instead: the MD5 of
+    each part_size part's MD5, followed by "-<parts>".
+    """
+    sha256, md5, length = hashlib.sha256(), hashlib.md5(usedforsecurity=False), 0
+    part_digests = []
+    with open(path, "rb") as f:
+        while True:
+            want = READ_CHUNK_BYTES if part_size is None else min(READ_CHUNK_BYTES, part_size - length % part_size)
+            chunk = f.read(want)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            md5.update(chunk)
+            length += len(chunk)
+            if part_size is not None and length % part_size == 0:
+                part_digests.append(md5.digest())
+                md5 = hashlib.md5(usedforsecurity=False)
+    if part_size is None:
+        return sha256.hexdigest(), md5.hexdigest(), length
+    if length % part_size:
+        part_digests.append(md5.digest())
+    composite = hashlib.md5(b"".join(part_digests), usedforsecurity=False).hexdigest()
+    return sha256.hexdigest(), f"{composite}-{len(part_digests)}", length
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
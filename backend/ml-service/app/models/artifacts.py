@@ -0,0 +1,152 @@
+"""Native model artifacts: fast to load, library-version independent, memory-mappable.
+
+A native artifact is a directory next to the pickled model
+(credit_model.pkl -> credit_model.native/):
+
+    booster.ubj                  XGBoost model in UBJSON
+    scaler_mean.npy              StandardScaler mean_ and scale_, when there is one
+    scaler_scale.npy
+    compiled/<field>.npy         compiled tree arrays (see tree_compiler)
+    compiled/threshold_fused.npy thresholds with the scaler folded in
+    manifest.json                format version, file list and compiled metadata
+
+manifest.json is written last, so a directory without one is incomplete
+and ignored. The compiled arrays are opened memory-mapped read-only: every
+process serving the model shares one copy in the page cache instead of
+holding a private one, and loading skips tree compilation and threshold
+fusion entirely. Models other than XGBoost, or scalers other than
+StandardScaler, have no native form and stay pickled.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
+
+NATIVE_FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+COMPILED_ARRAYS = ("feature", "threshold", "left", "right", "default_left", "value", "roots")
+
+
+@dataclass(frozen=True)
+class NativeArtifact:
+    model: Any
+    scaler: Any
+    compiled: Any  # CompiledTreeEnsemble in scaled feature space
+    fused_threshold: Optional[np.ndarray]
+
+
+def native_dir(model_path: str) -> str:
+    """Where the native artifact for a pickled model lives."""
+    return os.path.splitext(model_path)[0] + ".native"
+
+
+def has_native(directory: str) -> bool:
+    return os.path.exists(os.path.join(directory, MANIFEST))
+
+
+def can_write_native(model, scaler) -> bool:
+    from sklearn.preprocessing import StandardScaler
+
+    return hasattr(model, "get_booster") and (scaler is None or type(scaler) is StandardScaler)
+
+
+def write_native(model, scaler, directory: str) -> List[str]:
+    """Write the native artifact for a fitted XGBClassifier and optional StandardScaler.
+
+    Returns the written file names, relative to `directory`.
+    """
+    from app.models.tree_compiler import compile_xgboost, fuse_scaler
+
+    if not can_write_native(model, scaler):
+        raise ValueError(f"No native format for {type(model).__name__} with {type(scaler).__name__}")
+
+    os.makedirs(os.path.join(directory, "compiled"), exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)  # incomplete until rewritten
+
+    files = ["booster.ubj"]
+    model.save_model(os.path.join(directory, "booster.ubj"))
+
+    if scaler is not None:
+        np.save(os.path.join(directory, "scaler_mean.npy"), np.asarray(scaler.mean_, dtype=np.float64))
+        np.save(os.path.join(directory, "scaler_scale.npy"), np.asarray(scaler.scale_, dtype=np.float64))
+        files += ["scaler_mean.npy", "scaler_scale.npy"]
+
+    compiled = compile_xgboost(model)
+    for name in COMPILED_ARRAYS:
+        np.save(os.path.join(directory, "compiled", f"{name}.npy"), getattr(compiled, name))
+        files.append(f"compiled/{name}.npy")
+    if scaler is not None:
+        np.save(os.path.join(directory, "compiled", "threshold_fused.npy"), fuse_scaler(compiled, scaler).threshold)
+        files.append("compiled/threshold_fused.npy")
+
+    manifest = {
+        "format_version": NATIVE_FORMAT_VERSION,
+        "files": files,
+        "compiled": {
+            "base_margin": compiled.base_margin,
+            "max_depth": compiled.max_depth,
+            "n_features": compiled.n_features,
+        },
+    }
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return files + [MANIFEST]
+
+
+def read_manifest(path: str) -> dict:
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != NATIVE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported native artifact format: {manifest.get('format_version')}")
+    return manifest
+
+
+def read_native(source: Union[str, Dict[str, str]]) -> NativeArtifact:
+    """Load a native artifact; compiled arrays are memory-mapped read-only.
+
+    `source` is the artifact directory, or a mapping from each file name in
+    the manifest (and the manifest's own) to where that file is stored.
+    """
+    from xgboost import XGBClassifier
+    from app.models.tree_compiler import CompiledTreeEnsemble
+
+    def path(name: str) -> str:
+        return source[name] if isinstance(source, dict) else os.path.join(source, name)
+
+    manifest = read_manifest(path(MANIFEST))
+    files = set(manifest["files"])
+
+    model = XGBClassifier()
+    # As a buffer: cached copies have no .ubj extension to infer the format from
+    with open(path("booster.ubj"), "rb") as f:
+        model.load_model(bytearray(f.read()))
+
+    scaler = None
+    if "scaler_mean.npy" in files:
+        scaler = _standard_scaler(np.load(path("scaler_mean.npy")), np.load(path("scaler_scale.npy")))
+
+    arrays = {name: np.load(path(f"compiled/{name}.npy"), mmap_mode="r") for name in COMPILED_ARRAYS}
+    compiled = CompiledTreeEnsemble(**arrays, **manifest["compiled"])
+    fused_threshold = None
+    if "compiled/threshold_fused.npy" in files:
+        fused_threshold = np.load(path("compiled/threshold_fused.npy"), mmap_mode="r")
+
+    return NativeArtifact(model=model, scaler=scaler, compiled=compiled, fused_threshold=fused_threshold)
+
+
+def _standard_scaler(mean: np.ndarray, scale: np.ndarray):
+    """A fitted StandardScaler rebuilt from its parameters."""
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    scaler.mean_ = mean
+    scaler.scale_ = scale
+    scaler.var_ = scale ** 2
+    scaler.n_features_in_ = len(mean)
+    scaler.n_samples_seen_ = 0
+    return scaler
@@ -1,100 +1,358 @@
 import os
 import json
 import logging
-from typing import Optional, List
-import joblib
+import pickle
+import threading
+import time
+from dataclasses import dataclass, field, is_dataclass, replace
+from typing import TYPE_CHECKING, Any, Dict, Optional, List, Tuple
+import numpy as np
 from app.core.config import settings
-from app.core.aws import get_s3_loader, get_cloudwatch_metrics
+from app.models.artifacts import MANIFEST, NativeArtifact, has_native, native_dir, read_manifest, read_native
+from app.utils.metrics import metrics_registry
+
+# boto3 (app.core.aws, artifact_cache) and joblib are imported where they are
+# used, so a local-model process never loads the AWS SDK
+if TYPE_CHECKING:
+    from app.models.artifact_cache import ArtifactCache
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "models")
+
+DEFAULT_FEATURES = [
+    "wallet_age_days",
+    "total_transactions",
+    "total_volume_usd",
+    "defi_interactions",
+    "loan_amount",
+    "collateral_value_usd",
+    "term_months",
+    "previous_loans",
+    "successful_repayments",
+    "defaults",
+    "reputation_score",
+    "collateral_ratio"
+]
+
+
+class ModelReloadError(Exception):
+    """A new model could not be loaded, validated or warmed; the old one stays live."""
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """Everything one prediction reads from the model, loaded and swapped as a unit.
+    
+    Scoring code takes the current bundle once and uses only it, so a request
+    that started before a reload finishes on the model, scaler and explainer
+    it started with.
+    """
+    model: Any = None
+    scaler: Any = None
+    compiled_model: Any = None
+    explainer: Any = None
+    feature_config: Dict[str, Any] = field(default_factory=lambda: {"features": list(DEFAULT_FEATURES), "version": "rule-based"})
+    version: str = "rule-based"
+    load_seconds: float = 0.0  # load, compile, validate and warm
+    memory_bytes: int = 0      # approximate, see _footprint_bytes
+    artifact_format: str = "none"  # "native" or "pickle" once a model is loaded
+    
+    @property
+    def feature_names(self) -> List[str]:
+        return self.feature_config.get("features", [])
+
+
+RULE_BASED_BUNDLE = ModelBundle()
+
+
+@dataclass(frozen=True)
+class _LoadedArtifacts:
+    model: Any
+    scaler: Any
+    feature_config: Dict[str, Any]
+    native: Optional[NativeArtifact] = None
+
+
+def _footprint_bytes(*artifacts) -> int:
+    """Approximate in-memory size of model artifacts.
+    
+    Array bytes for compiled ensembles (memory-mapped ones included, though
+    their pages are shared between processes), the raw booster for XGBoost
+    models and the pickled size for anything else.
+    """
+    total = 0
+    for artifact in artifacts:
+        if artifact is None:
+            continue
+        try:
+            if is_dataclass(artifact):
+                total += sum(v.nbytes for v in vars(artifact).values() if isinstance(v, np.ndarray))
+            elif hasattr(artifact, "get_booster"):
+                total += len(artifact.get_booster().save_raw())
+            else:
+                total += len(pickle.dumps(artifact, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            logger.debug(f"Could not size {type(artifact).__name__}: {e}")
+    return total
+
+
+def _probe_features() -> np.ndarray:
+    """Feature rows for validating and warming a model: the schema example, repeated."""
+    from app.schemas.credit import CreditScoreRequest
+    from app.services import vectorized
+    
+    example = CreditScoreRequest(**CreditScoreRequest.model_config["json_schema_extra"]["example"])
+    features = vectorized.feature_matrix(vectorized.request_columns([example]))
+    # Enough rows to exercise both the compiled and the native engine
+    return np.repeat(features, settings.COMPILED_ENGINE_MAX_ROWS + 1, axis=0)
+
 
 class ModelLoader:
-    def __init__(self):
-        self._model = None
-        self._scaler = None
-        self._feature_config = None
-        self._model_version = "rule-based"
+    """Loads one model (plus scaler and feature config) from disk or S3.
+    
+    Source, local path and S3 key default to the MODEL_SOURCE,
+    LOCAL_MODEL_PATH and S3_KEY settings; other loaders (pinned models in
+    the registry, the shadow challenger) pass their own, and a model_dir so
+    their S3 scoring rules don't overwrite the primary's. S3 artifacts are
+    read from the shared ArtifactCache. Serving code reads models through
+    the ModelRegistry, never a loader directly.
+    
+    The loaded artifacts live in one immutable ModelBundle. `reload()` builds,
+    validates and warms a new bundle off to the side and then replaces the
+    reference in a single assignment, so no reader ever sees a new model
+    paired with an old scaler.
+    """
+    
+    def __init__(
+        self,
+        source: Optional[str] = None,
+        local_path: Optional[str] = None,
+        s3_key: Optional[str] = None,
+        model_dir: Optional[str] = None,
+    ):
+        self._source = source
+        self._local_path = local_path
+        self._s3_key = s3_key
+        self._model_dir = model_dir or DEFAULT_MODEL_DIR
+        self._bundle = RULE_BASED_BUNDLE
         self._is_loaded = False
-        
+        self._load_lock = threading.Lock()
+        self._reloads = metrics_registry.counter("model_reloads")
+        self._reload_failures = metrics_registry.counter("model_reload_failures")
+    
     @property
     def is_loaded(self) -> bool:
         return self._is_loaded
     
     @property
     def model_version(self) -> str:
-        return self._model_version
+        return self._bundle.version
+    
+    @property
+    def source(self) -> str:
+        return self._source or settings.MODEL_SOURCE
+    
+    def current(self) -> ModelBundle:
+        """The live bundle; read it once per request."""
+        return self._bundle
     
     def load_models(self):
         try:
-            if settings.MODEL_SOURCE == "s3":
-                self._load_from_s3()
-            else:
-                self._load_from_local()
-            
-            self._is_loaded = True
-            logger.info(f"Models loaded successfully: {self._model_version}")
-            
+            bundle = self._build_bundle()
         except Exception as e:
             logger.error(f"Failed to load ML models: {e}")
             logger.warning("ML model not available - will use rule-based prediction fallback")
-            self._use_mock_model()
-            self._is_loaded = True
+            bundle = RULE_BASED_BUNDLE
+        
+        self._bundle = bundle
+        self._is_loaded = True
+        logger.info(f"Models loaded successfully: {bundle.version}")
     
-    def _load_from_s3(self):
-        """Load model from S3 using AWS SDK"""
-        try:
-            logger.info(f"Loading model from S3: {settings.S3_BUCKET}/{settings.S3_KEY}")
+    def ensure_loaded(self):
+        """Load models once, even when called concurrently from several threads."""
+        if self._is_loaded:
+            return
+        with self._load_lock:
+            if not self._is_loaded:
+                self.load_models()
+    
+    def reload(self) -> Tuple[str, str]:
+        """Load, validate and warm the current artifacts, then swap them in.
+        
+        Requests keep using the old bundle until the swap. Returns
+        (old_version, new_version); raises ModelReloadError, leaving the old
+        bundle live, if the new artifacts cannot be used.
+        """
+        with self._load_lock:
+            old = self._bundle
+            start = time.perf_counter()
+            try:
+                bundle = self._build_bundle()
+            except Exception as e:
+                self._reload_failures.inc()
+                raise ModelReloadError(f"Failed to load new model, keeping {old.version}: {e}") from e
+            if bundle.model is None and old.model is not None:
+                self._reload_failures.inc()
+                raise ModelReloadError(f"No model artifacts found, keeping {old.version}")
             
+            self._bundle = bundle
+            self._is_loaded = True
+            self._reloads.inc()
+            logger.info(f"Model reloaded: {old.version} -> {bundle.version} in {time.perf_counter() - start:.2f}s")
+            return old.version, bundle.version
+    
+    def mark_loaded_elsewhere(self, model_version: str):
+        """Record models loaded by another process (the process inference pool).
+        
+        The serving process then stops asking the workers to load, and cache
+        keys and /model/info see the version the workers actually serve.
+        """
+        self._bundle = replace(self._bundle, version=model_version)
+        self._is_loaded = True
+    
+    def artifact_fingerprint(self) -> Optional[Tuple]:
+        """Cheap identity of the artifacts a load would read (mtimes, or S3 ETags).
+        
+        Changes when a new model is published; None when it can't be read.
+        """
+        if self.source == "s3":
+            from app.core.aws import get_s3_loader
             s3_loader = get_s3_loader()
+            s3_key = self._s3_key or settings.S3_KEY
+            keys = [
+                s3_key,
+                s3_key.replace(".pkl", "_scaler.pkl"),
+                s3_key.replace(".pkl", "_config.json"),
+                s3_key.replace(".pkl", f".native/{MANIFEST}"),
+            ]
+            etags = tuple(s3_loader.object_etag(settings.S3_BUCKET, key) for key in keys)
+            return etags if etags[0] is not None or etags[3] is not None else None
+        
+        paths = self._local_paths()
+        paths += (os.path.join(native_dir(paths[0]), MANIFEST),)
+        try:
+            return tuple(
+                (os.stat(path).st_mtime_ns, os.stat(path).st_size) if os.path.exists(path) else None
+                for path in paths
+            )
+        except OSError:
+            return None
+    
+    def _build_bundle(self) -> ModelBundle:
+        """Load artifacts into a new bundle, compiled, validated and warmed; raises on failure."""
+        start = time.perf_counter()
+        if self.source == "s3":
+            loaded = self._load_from_s3()
+        else:
+            loaded = self._load_from_local()
+        if loaded is None:
+            return RULE_BASED_BUNDLE
+        
+        model, scaler, feature_config = loaded.model, loaded.scaler, loaded.feature_config
+        compiled = None
+        if settings.INFERENCE_ENGINE == "compiled":
+            compiled = self._compile_model(model, scaler, loaded.native)
+        
+        probe = _probe_features()
+        self._validate(model, scaler, compiled, probe)
+        explainer = self._build_explainer(model, scaler, probe)
+        return ModelBundle(
+            model=model,
+            scaler=scaler,
+            compiled_model=compiled,
+            explainer=explainer,
+            feature_config=feature_config,
+            version=feature_config.get("version", "v1.0.0"),
+            load_seconds=time.perf_counter() - start,
+            memory_bytes=_footprint_bytes(model, scaler, compiled),
+            artifact_format="native" if loaded.native is not None else "pickle",
+        )
+    
+    def _validate(self, model, scaler, compiled, probe: np.ndarray):
+        """Score the probe rows through every engine the bundle will use.
+        
+        Rejects models whose output is not a probability, and pays one-time
+        costs (lazy allocations, first-call dispatch) before the bundle goes live.
+        """
+        native = np.asarray(model.predict_proba(scaler.transform(probe) if scaler else probe))
+        outputs = [native]
+        if compiled is not None:
+            single = probe[:1]
+            if scaler and not compiled.fused_scaler:
+                single = scaler.transform(single)
+            outputs.append(compiled.predict_proba(single))
+        for output in outputs:
+            if output.ndim != 2 or len(output) == 0 or not np.all(np.isfinite(output)):
+                raise ValueError(f"Model produced invalid probabilities (shape {output.shape})")
+            if np.any(output < 0) or np.any(output > 1):
+                raise ValueError("Model produced probabilities outside [0, 1]")
+    
+    def _build_explainer(self, model, scaler, probe: np.ndarray):
+        from app.services.explainability import build_explainer
+        
+        background = scaler.transform(probe[:1]) if scaler else probe[:1]
+        try:
+            explainer = build_explainer(model, background)
+            if explainer is not None:
+                explainer.contributions(background)
+            return explainer
+        except Exception as e:
+            logger.warning(f"Explainer unavailable for this model, using rule-based explanations: {e}")
+            return None
+    
+    def _load_from_s3(self) -> Optional[_LoadedArtifacts]:
+        """Load model from S3 through the local artifact cache (see artifact_cache)"""
+        from app.core.aws import get_cloudwatch_metrics
+        s3_key = self._s3_key or settings.S3_KEY
+        try:
+            logger.info(f"Loading model from S3: {settings.S3_BUCKET}/{s3_key}")
             
-            # Create models directory
-            model_dir = os.path.join(os.path.dirname(__file__), "..", "..", "models")
-            os.makedirs(model_dir, exist_ok=True)
-            
-            model_path = os.path.join(model_dir, "credit_model.pkl")
-            scaler_path = os.path.join(model_dir, "scaler.pkl")
-            config_path = os.path.join(model_dir, "feature_config.json")
+            cache = self._artifact_cache()
+            bucket = settings.S3_BUCKET
+            native_prefix = s3_key.replace(".pkl", ".native/")
+            keys = {
+                "model": s3_key,
+                "scaler": s3_key.replace(".pkl", "_scaler.pkl"),
+                "config": s3_key.replace(".pkl", "_config.json"),
+                "rules": s3_key.replace(".pkl", "_rules.json"),
+                "manifest": native_prefix + MANIFEST,
+            }
+            fetched = cache.fetch_many(bucket, list(keys.values()))
+            paths = {name: fetched[key] for name, key in keys.items()}
             
-            # Download model file
-            if not s3_loader.download_model(settings.S3_BUCKET, settings.S3_KEY, model_path):
+            # Prefer the native artifact; fall back to the pickled model
+            native_files = None
+            if paths["manifest"] is not None:
+                names = read_manifest(paths["manifest"])["files"]
+                files = cache.fetch_many(bucket, [native_prefix + name for name in names])
+                missing = [name for name in names if files[native_prefix + name] is None]
+                if not missing:
+                    native_files = {name: files[native_prefix + name] for name in names}
+                    native_files[MANIFEST] = paths["manifest"]
+                elif paths["model"] is None:
+                    raise RuntimeError(f"Native model artifact is missing {', '.join(missing)}")
+                else:
+                    logger.warning(f"Native model artifact is missing {', '.join(missing)}, loading the pickled model")
+            if native_files is None and paths["model"] is None:
                 logger.error("Failed to download model from S3 - model file not found")
-                self._use_mock_model()
-                return
+                return None
             
-            # Try to download scaler and config (optional)
-            scaler_key = settings.S3_KEY.replace(".pkl", "_scaler.pkl")
-            config_key = settings.S3_KEY.replace(".pkl", "_config.json")
+            # The rules engine reads scoring rules from the model directory
+            if paths["rules"] is not None:
+                cache.publish(paths["rules"], os.path.join(self._model_dir, "scoring_rules.json"))
+            cache.prune()
             
-            s3_loader.download_model(settings.S3_BUCKET, scaler_key, scaler_path)
-            s3_loader.download_model(settings.S3_BUCKET, config_key, config_path)
-            
-            # Load model
-            self._model = joblib.load(model_path)
+            loaded = self._load_files(paths["model"], paths["scaler"], paths["config"], native_files)
             logger.info("Model loaded from S3 successfully")
             
-            # Load scaler if available
-            if os.path.exists(scaler_path):
-                self._scaler = joblib.load(scaler_path)
-                logger.info("Scaler loaded from S3 successfully")
-            
-            # Load config if available
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    self._feature_config = json.load(f)
-                self._model_version = self._feature_config.get("version", "v1.0.0")
-                logger.info("Feature config loaded from S3 successfully")
-            else:
-                self._feature_config = {"features": self._get_default_features(), "version": "v1.0.0"}
-                self._model_version = "v1.0.0"
-            
             # Log to CloudWatch
             metrics = get_cloudwatch_metrics()
             metrics.put_metric("S3ModelLoad", 1, "Count", {"Status": "Success"})
-            
+            return loaded
+        
         except Exception as e:
             logger.error(f"Failed to load model from S3: {e}")
-            logger.warning("Falling back to rule-based prediction")
             
             # Log failure to CloudWatch
             try:
@@ -103,94 +361,136 @@ class ModelLoader:
             except Exception as metric_error:
                 logger.error(f"Failed to log metric: {metric_error}")
             
-            self._use_mock_model()
+            raise
+    
+    def _artifact_cache(self) -> "ArtifactCache":
+        from app.core.aws import get_s3_loader
+        from app.models.artifact_cache import ArtifactCache
+        # Shared by every loader: entries are keyed by S3 key and content
+        return ArtifactCache(
+            settings.ARTIFACT_CACHE_DIR or os.path.join(DEFAULT_MODEL_DIR, "cache"),
+            get_s3_loader().s3_client,
+            part_size=settings.ARTIFACT_PART_SIZE_MB * 1024 * 1024,
+            max_workers=settings.ARTIFACT_DOWNLOAD_WORKERS,
+        )
     
-    def _load_from_local(self):
+    def _local_paths(self) -> Tuple[str, str, str]:
+        """(model, scaler, config) paths for a local load."""
         # Use LOCAL_MODEL_PATH if specified, otherwise default location
-        if settings.LOCAL_MODEL_PATH and os.path.exists(settings.LOCAL_MODEL_PATH):
-            model_path = settings.LOCAL_MODEL_PATH
+        local_path = self._local_path or settings.LOCAL_MODEL_PATH
+        if local_path and (os.path.exists(local_path) or has_native(native_dir(local_path))):
             # Infer scaler and config paths from model path
-            base_path = os.path.splitext(model_path)[0]
-            scaler_path = f"{base_path}_scaler.pkl"
-            config_path = f"{base_path}_config.json"
-        else:
-            # Default location
-            model_dir = os.path.join(os.path.dirname(__file__), "..", "..", "models")
-            model_path = os.path.join(model_dir, "credit_model.pkl")
-            scaler_path = os.path.join(model_dir, "scaler.pkl")
-            config_path = os.path.join(model_dir, "feature_config.json")
+            base_path = os.path.splitext(local_path)[0]
+            return local_path, f"{base_path}_scaler.pkl", f"{base_path}_config.json"
+        
+        # Default location
+        model_dir = self._model_dir
+        return (
+            os.path.join(model_dir, "credit_model.pkl"),
+            os.path.join(model_dir, "scaler.pkl"),
+            os.path.join(model_dir, "feature_config.json"),
+        )
+    
+    def _load_from_local(self) -> Optional[_LoadedArtifacts]:
+        model_path, scaler_path, config_path = self._local_paths()
         
-        if not os.path.exists(model_path):
+        if not os.path.exists(model_path) and not has_native(native_dir(model_path)):
             logger.warning("No local model file found - will use rule-based prediction fallback")
-            self._use_mock_model()
-            return
+            return None
         
-        try:
-            # Load model
-            self._model = joblib.load(model_path)
-            logger.info("Model loaded from local file successfully")
+        loaded = self._load_files(model_path, scaler_path, config_path)
+        logger.info("Model loaded from local file successfully")
+        return loaded
+    
+    def _load_files(
+        self,
+        model_path: Optional[str],
+        scaler_path: Optional[str],
+        config_path: Optional[str],
+        native_files: Optional[Dict[str, str]] = None,
+    ) -> _LoadedArtifacts:
+        """Load from the native artifact when there is one, else from the pickles.
+        
+        The native artifact is read from `native_files` (file name -> path)
+        if given, else from the directory next to `model_path`.
+        """
+        native = None
+        source = native_files
+        if source is None and model_path and has_native(native_dir(model_path)):
+            source = native_dir(model_path)
+        if source is not None:
+            try:
+                native = read_native(source)
+                logger.info("Native model artifact loaded")
+            except Exception as e:
+                if not (model_path and os.path.exists(model_path)):
+                    raise
+                logger.warning(f"Native model artifact unusable, loading the pickled model: {e}")
+        
+        if native is not None:
+            model, scaler = native.model, native.scaler
+        else:
+            import joblib
+            model = joblib.load(model_path)
             
             # Load scaler if available
-            if os.path.exists(scaler_path):
-                self._scaler = joblib.load(scaler_path)
-                logger.info("Scaler loaded from local file successfully")
-            
-            # Load config
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    self._feature_config = json.load(f)
-                self._model_version = self._feature_config.get("version", "v1.0.0")
-                logger.info("Feature config loaded from local file")
-            else:
-                self._feature_config = {"features": self._get_default_features(), "version": "v1.0.0"}
-                self._model_version = "v1.0.0"
-                logger.warning("Feature config not found, using defaults")
-                
+            scaler = None
+            if scaler_path and os.path.exists(scaler_path):
+                scaler = joblib.load(scaler_path)
+                logger.info("Scaler loaded successfully")
+        
+        # Load config
+        if config_path and os.path.exists(config_path):
+            with open(config_path, 'r') as f:
+                feature_config = json.load(f)
+            feature_config.setdefault("version", "v1.0.0")
+            logger.info("Feature config loaded")
+        else:
+            feature_config = {"features": list(DEFAULT_FEATURES), "version": "v1.0.0"}
+            logger.warning("Feature config not found, using defaults")
+        
+        return _LoadedArtifacts(model, scaler, feature_config, native)
+    
+    def _compile_model(self, model, scaler, native: Optional[NativeArtifact] = None):
+        """Compile the tree ensemble and verify it against predict_proba before use.
+        
+        A native artifact already holds the compiled (and fused) arrays, so
+        only the parity check runs.
+        """
+        from app.models.tree_compiler import compile_xgboost, fuse_scaler, check_parity
+        
+        if not hasattr(model, "get_booster"):
+            logger.info(f"{type(model).__name__} is not an XGBoost model, using native predict_proba")
+            return None
+        
+        try:
+            compiled = native.compiled if native is not None else compile_xgboost(model)
+            if settings.FUSE_SCALER and scaler is not None:
+                if native is not None and native.fused_threshold is not None:
+                    compiled = replace(compiled, threshold=native.fused_threshold, fused_scaler=True)
+                else:
+                    compiled = fuse_scaler(compiled, scaler)
+            max_diff = check_parity(model, compiled, scaler=scaler)
+            logger.info(
+                f"Compiled model: {compiled.n_trees} trees, depth {compiled.max_depth}, "
+                f"scaler fused: {compiled.fused_scaler}, parity max diff {max_diff:.2e}"
+            )
+            return compiled
         except Exception as e:
-            logger.error(f"Failed to load model from local file: {e}")
-            logger.warning("Falling back to rule-based prediction")
-            self._use_mock_model()
-    
-    def _use_mock_model(self):
-        """Fallback when model cannot be loaded - use rule-based prediction instead"""
-        self._model = None
-        self._scaler = None
-        self._feature_config = {
-            "features": self._get_default_features(),
-            "version": "rule-based"
-        }
-        self._model_version = "rule-based"
-        logger.warning("ML model not available - using rule-based prediction fallback")
-    
-    def _get_default_features(self) -> List[str]:
-        return [
-            "wallet_age_days",
-            "total_transactions",
-            "total_volume_usd",
-            "defi_interactions",
-            "loan_amount",
-            "collateral_value_usd",
-            "term_months",
-            "previous_loans",
-            "successful_repayments",
-            "defaults",
-            "reputation_score",
-            "collateral_ratio"
-        ]
+            logger.error(f"Model compilation failed, using native predict_proba: {e}")
+            return None
     
     def get_model(self):
-        return self._model
+        return self._bundle.model
+    
+    def get_compiled_model(self):
+        return self._bundle.compiled_model
     
     def get_scaler(self):
-        return self._scaler
+        return self._bundle.scaler
     
     def get_feature_config(self):
-        return self._feature_config
+        return self._bundle.feature_config
     
     def get_feature_names(self) -> List[str]:
-        if self._feature_config:
-            return self._feature_config.get("features", [])
-        return []
-
-
-model_loader = ModelLoader()
+        return self._bundle.feature_names
@@ -0,0 +1,186 @@
+"""Every model bundle this process serves, by version.
+
+The registry owns the live model and any others kept loaded next to it:
+the ADDITIONAL_MODELS loaded at startup, and up to RETAINED_MODEL_VERSIONS
+earlier live models kept after a reload so clients can stay on the old
+version while they move over. A request pins one of these with the
+X-Model-Version header; without it, it gets the live model.
+
+Routes, services, health and reloads all go through `model_registry`, so
+startup preloading warms the same models that serve traffic.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.models.loader import DEFAULT_MODEL_DIR, ModelBundle, ModelLoader
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownModelVersion(LookupError):
+    """The requested model version is not loaded in this process."""
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        loader: ModelLoader,
+        pinned_loaders: Sequence[ModelLoader] = (),
+        retain_previous: int = 0,
+    ):
+        self._loader = loader
+        self._pinned_loaders = list(pinned_loaders)
+        self._retain_previous = retain_previous
+        # Both maps are replaced whole, never mutated, so readers need no lock
+        self._pinned: Dict[str, ModelBundle] = {}
+        self._previous: Dict[str, ModelBundle] = {}  # oldest first
+        self._pinned_loaded = False
+        # Versions served by the process inference pool, live first
+        self._remote_versions: Tuple[str, ...] = ()
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loader.is_loaded
+
+    @property
+    def model_version(self) -> str:
+        return self._loader.model_version
+
+    def current(self) -> ModelBundle:
+        """The live bundle; read it once per request."""
+        return self._loader.current()
+
+    def get(self, version: Optional[str] = None) -> ModelBundle:
+        """The bundle serving `version`, or the live one when None.
+
+        Raises UnknownModelVersion if that version is not loaded.
+        """
+        live = self._loader.current()
+        if version is None or version == live.version:
+            return live
+        bundle = self._pinned.get(version) or self._previous.get(version)
+        if bundle is None:
+            raise UnknownModelVersion(version)
+        return bundle
+
+    def versions(self) -> List[str]:
+        """Loaded versions, live first."""
+        if self._remote_versions:
+            return list(self._remote_versions)
+        live = self.model_version
+        others = [v for v in dict.fromkeys((*self._pinned, *reversed(self._previous))) if v != live]
+        return [live, *others]
+
+    def has_version(self, version: str) -> bool:
+        return version in self.versions()
+
+    def ensure_loaded(self):
+        """Load the live model and the additional models once."""
+        self._loader.ensure_loaded()
+        if self._pinned_loaded:
+            return
+        with self._lock:
+            if not self._pinned_loaded:
+                self._load_pinned()
+                self._pinned_loaded = True
+
+    def _load_pinned(self):
+        pinned = {}
+        live = self.model_version
+        for loader in self._pinned_loaders:
+            loader.ensure_loaded()
+            bundle = loader.current()
+            if bundle.model is None:
+                logger.error(f"Additional model from {loader.source} could not be loaded, not serving it")
+            elif bundle.version == live or bundle.version in pinned:
+                logger.warning(f"Additional model version {bundle.version} is already loaded, skipping")
+            else:
+                pinned[bundle.version] = bundle
+                logger.info(f"Additional model loaded: {bundle.version}")
+        self._pinned = pinned
+
+    def reload(self) -> Tuple[str, str]:
+        """Reload the live model (see ModelLoader.reload), keeping the old one pinnable.
+
+        Raises ModelReloadError, leaving everything as it was, on failure.
+        """
+        with self._lock:
+            old = self._loader.current()
+            old_version, new_version = self._loader.reload()
+            previous = {v: b for v, b in self._previous.items() if v not in (old_version, new_version)}
+            retain = old.model is not None and old_version != new_version and old_version not in self._pinned
+            if self._retain_previous > 0 and retain:
+                previous[old_version] = old
+            while len(previous) > self._retain_previous:
+                evicted = next(iter(previous))
+                del previous[evicted]
+                logger.info(f"Model version {evicted} unloaded")
+            self._previous = previous
+            return old_version, new_version
+
+    def artifact_fingerprint(self) -> Optional[Tuple]:
+        """Fingerprint of the live model's artifacts, for the reload watcher."""
+        return self._loader.artifact_fingerprint()
+
+    def mark_loaded_elsewhere(self, versions: Sequence[str]):
+        """Record the versions loaded by the process inference pool, live first."""
+        self._loader.mark_loaded_elsewhere(versions[0])
+        self._remote_versions = tuple(versions)
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Per-version role, load time and approximate memory footprint.
+
+        Versions loaded in worker processes report no load time or size.
+        """
+        if self._remote_versions:
+            return [
+                {
+                    "version": v,
+                    "role": "live" if i == 0 else "pinned",
+                    "load_seconds": None,
+                    "memory_bytes": None,
+                    "artifact_format": None,
+                }
+                for i, v in enumerate(self._remote_versions)
+            ]
+        live = self.current()
+        entries = [("live", live)]
+        entries += [("pinned", b) for b in self._pinned.values() if b.version != live.version]
+        entries += [
+            ("previous", b) for b in reversed(self._previous.values())
+            if b.version != live.version and b.version not in self._pinned
+        ]
+        return [
+            {
+                "version": bundle.version,
+                "role": role,
+                "load_seconds": round(bundle.load_seconds, 3),
+                "memory_bytes": bundle.memory_bytes,
+                "artifact_format": bundle.artifact_format,
+            }
+            for role, bundle in entries
+        ]
+
+
+def _pinned_loaders() -> List[ModelLoader]:
+    """One loader per ADDITIONAL_MODELS entry, each downloading into its own directory."""
+    locations = [location.strip() for location in settings.ADDITIONAL_MODELS.split(",") if location.strip()]
+    loaders = []
+    for i, location in enumerate(locations):
+        model_dir = os.path.join(DEFAULT_MODEL_DIR, "pinned", str(i))
+        if settings.MODEL_SOURCE == "s3":
+            loaders.append(ModelLoader(source="s3", s3_key=location, model_dir=model_dir))
+        else:
+            loaders.append(ModelLoader(source="local", local_path=location, model_dir=model_dir))
+    return loaders
+
+
+model_registry = ModelRegistry(
+    ModelLoader(),
+    _pinned_loaders(),
+    retain_previous=settings.RETAINED_MODEL_VERSIONS,
+)
@@ -0,0 +1,393 @@
+"""Declarative heuristic scoring rules.
+
+The fraud, anomaly and fallback/rule-based credit scores are described in a
+versioned JSON spec (app/models/scoring_rules.json by default) instead of
+Python branches. A spec is compiled once into:
+
+- a vectorized evaluator over request columns (see app/services/vectorized.py)
+- generated straight-line Python for the single-request path
+
+Each score is `base` plus its terms, applied in order, then optionally
+truncated (`"round": "trunc"`) and clipped (`"clip": [lo, hi]`, either end may
+be null). Term types:
+
+- step:   values[i] for the i-th interval of `bins` (left-closed), i.e.
+          values[0] below bins[0], values[-1] at or above bins[-1]
+- linear: ((x - offset) / divisor) * multiplier, then capped by min/max
+- flag:   a constant `value`
+
+Any term may carry `when`, a list of conditions that must all hold for the
+term to apply: {"input", "op", "value"} or {"input", "op", "ref", "scale"}
+to compare against another (optionally scaled) feature. Inputs are request
+fields or `derived` features; `{"ratio": [num, den]}` is num / den, or 0
+when den <= 0.
+
+RulesEngine holds the compiled rules for the service and swaps in a new
+version when the spec file changes, without a restart.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import numpy as np
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "scoring_rules.json")
+# Where ModelLoader keeps feature_config.json (and downloads S3 artifacts)
+MODEL_DIR_RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "models", "scoring_rules.json")
+
+REQUEST_FIELDS = (
+    "wallet_age_days",
+    "total_transactions",
+    "total_volume_usd",
+    "defi_interactions",
+    "loan_amount",
+    "collateral_value_usd",
+    "term_months",
+    "previous_loans",
+    "successful_repayments",
+    "defaults",
+    "reputation_score",
+)
+# Scores the services look up by name; a spec must define all of them
+REQUIRED_SCORES = (
+    "rule_based_credit_score",
+    "fraud_score",
+    "anomaly_score",
+    "fallback_credit_score",
+    "fallback_fraud_score",
+)
+
+_OPS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+
+class RuleSet:
+    """A compiled rule spec; immutable once built."""
+
+    def __init__(self, spec: Dict[str, Any]):
+        _validate(spec)
+        self.version: str = spec["version"]
+        self.spec = spec
+        # Changes with any edit to the spec, even one that keeps its version
+        digest = hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+        self.fingerprint: str = f"{self.version}:{digest[:16]}"
+        self._derived = spec.get("derived", {})
+        self._scores = spec["scores"]
+        self._row_fns: Dict[str, Callable] = {
+            name: _compile_row_fn(name, score, self._derived) for name, score in self._scores.items()
+        }
+
+    def score(self, name: str, request) -> Any:
+        """Evaluate one score for a single request (generated Python)."""
+        return self._row_fns[name](request)
+
+    def evaluate(self, name: str, cols: Dict[str, np.ndarray]) -> np.ndarray:
+        """Evaluate one score over request columns."""
+        score = self._scores[name]
+        features = _ColumnView(cols, self._derived)
+
+        total = score["base"]
+        for term in score["terms"]:
+            value = _term_array(term, features)
+            if "when" in term:
+                value = np.where(_conditions_array(term["when"], features), value, 0)
+            total = total + value
+
+        if score.get("round") == "trunc":
+            total = np.trunc(total).astype(np.int64)
+        lo, hi = score.get("clip", (None, None))
+        if hi is not None:
+            total = np.minimum(total, hi)
+        if lo is not None:
+            total = np.maximum(total, lo)
+        if np.ndim(total) == 0:
+            total = np.full(len(next(iter(cols.values()))), total)
+        return total
+
+
+class _ColumnView:
+    """Request columns plus lazily computed derived features."""
+
+    def __init__(self, cols: Dict[str, np.ndarray], derived: Dict[str, Any]):
+        self._cols = dict(cols)
+        self._derived = derived
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._cols:
+            num, den = (self[part] for part in self._derived[name]["ratio"])
+            self._cols[name] = np.divide(num, den, out=np.zeros(len(den)), where=den > 0)
+        return self._cols[name]
+
+
+def _term_array(term: Dict[str, Any], features: _ColumnView) -> np.ndarray:
+    kind = term["type"]
+    if kind == "flag":
+        return term["value"]
+    x = features[term["input"]]
+    if kind == "step":
+        return np.asarray(term["values"])[np.searchsorted(term["bins"], x, side="right")]
+    # linear
+    value = x
+    if "offset" in term:
+        value = value - term["offset"]
+    if "divisor" in term:
+        value = value / term["divisor"]
+    if "multiplier" in term:
+        value = value * term["multiplier"]
+    if "max" in term:
+        value = np.minimum(value, term["max"])
+    if "min" in term:
+        value = np.maximum(value, term["min"])
+    return value
+
+
+def _conditions_array(conditions, features: _ColumnView) -> np.ndarray:
+    mask = None
+    for cond in conditions:
+        if "ref" in cond:
+            other = features[cond["ref"]]
+            if "scale" in cond:
+                other = other * cond["scale"]
+        else:
+            other = cond["value"]
+        result = _OPS[cond["op"]](features[cond["input"]], other)
+        mask = result if mask is None else mask & result
+    return mask
+
+
+def _compile_row_fn(name: str, score: Dict[str, Any], derived: Dict[str, Any]) -> Callable:
+    """Generate straight-line Python for one score over a request object."""
+    lines = [f"def {name}(r):"]
+    emitted = set()
+
+    def feature(field: str) -> str:
+        if field in REQUEST_FIELDS:
+            return f"r.{field}"
+        if field not in emitted:
+            num, den = (feature(part) for part in derived[field]["ratio"])
+            lines.append(f"    {field} = {num} / {den} if {den} > 0 else 0")
+            emitted.add(field)
+        return field
+
+    def condition(cond) -> str:
+        if "ref" in cond:
+            other = feature(cond["ref"])
+            if "scale" in cond:
+                other = f"{other} * {cond['scale']!r}"
+        else:
+            other = repr(cond["value"])
+        return f"{feature(cond['input'])} {cond['op']} {other}"
+
+    body = [f"    s = {score['base']!r}"]
+    for term in score["terms"]:
+        indent = "    "
+        if "when" in term:
+            conditions = [condition(c) for c in term["when"]]
+            body.append(f"    if {' and '.join(conditions)}:")
+            indent = "        "
+
+        kind = term["type"]
+        if kind == "flag":
+            body.append(f"{indent}s += {term['value']!r}")
+        elif kind == "step":
+            x = feature(term["input"])
+            bins, values = term["bins"], term["values"]
+            for i, bound in enumerate(bins):
+                keyword = "if" if i == 0 else "elif"
+                body.append(f"{indent}{keyword} {x} < {bound!r}:")
+                body.append(f"{indent}    s += {values[i]!r}")
+            body.append(f"{indent}else:")
+            body.append(f"{indent}    s += {values[-1]!r}")
+        else:
+            expr = feature(term["input"])
+            if "offset" in term:
+                expr = f"({expr} - {term['offset']!r})"
+            if "divisor" in term:
+                expr = f"{expr} / {term['divisor']!r}"
+            if "multiplier" in term:
+                expr = f"{expr} * {term['multiplier']!r}"
+            if "max" in term:
+                expr = f"min({expr}, {term['max']!r})"
+            if "min" in term:
+                expr = f"max({expr}, {term['min']!r})"
+            body.append(f"{indent}s += {expr}")
+
+    if score.get("round") == "trunc":
+        body.append("    s = int(s)")
+    lo, hi = score.get("clip", (None, None))
+    if hi is not None:
+        body.append(f"    s = min({hi!r}, s)")
+    if lo is not None:
+        body.append(f"    s = max({lo!r}, s)")
+    body.append("    return s")
+
+    source = "\n".join(lines + body) + "\n"
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, f"<rules:{name}>", "exec"), namespace)
+    fn = namespace[name]
+    fn.__source__ = source
+    return fn
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# Term fields written into the generated code as literals
+LINEAR_FIELDS = ("offset", "divisor", "multiplier", "max", "min")
+
+
+def _validate(spec: Dict[str, Any]):
+    """Reject anything the compilers would mis-evaluate or emit as non-numeric code."""
+    if not isinstance(spec.get("version"), str):
+        raise ValueError("Rule spec needs a string 'version'")
+    derived = spec.get("derived", {})
+    known = set(REQUEST_FIELDS)
+    for name, definition in derived.items():
+        parts = definition.get("ratio")
+        if not (isinstance(parts, list) and len(parts) == 2 and set(parts) <= known | set(derived)):
+            raise ValueError(f"Derived feature {name} must be a ratio of two known features")
+    known |= set(derived)
+
+    scores = spec.get("scores", {})
+    missing = [name for name in REQUIRED_SCORES if name not in scores]
+    if missing:
+        raise ValueError(f"Rule spec is missing scores: {', '.join(missing)}")
+
+    for name, score in scores.items():
+        if not name.isidentifier():
+            raise ValueError(f"Score name {name!r} is not an identifier")
+        if not _is_number(score.get("base")):
+            raise ValueError(f"Score {name} needs a numeric 'base'")
+        for term in score.get("terms", []):
+            kind = term.get("type")
+            if kind not in ("step", "linear", "flag"):
+                raise ValueError(f"Score {name}: unknown term type {kind!r}")
+            if kind != "flag" and term.get("input") not in known:
+                raise ValueError(f"Score {name}: unknown input {term.get('input')!r}")
+            if kind == "flag" and not _is_number(term.get("value")):
+                raise ValueError(f"Score {name}: flag terms need a numeric 'value'")
+            if kind == "step":
+                bins, values = term.get("bins", []), term.get("values", [])
+                if not (isinstance(bins, list) and isinstance(values, list)):
+                    raise ValueError(f"Score {name}: step 'bins' and 'values' must be lists")
+                if not all(_is_number(v) for v in bins + values):
+                    raise ValueError(f"Score {name}: step bins and values must be numeric")
+                if not bins or len(values) != len(bins) + 1 or list(bins) != sorted(bins):
+                    raise ValueError(f"Score {name}: step needs ascending bins and len(bins) + 1 values")
+            if kind == "linear":
+                for field in LINEAR_FIELDS:
+                    if field in term and not _is_number(term[field]):
+                        raise ValueError(f"Score {name}: linear {field!r} must be numeric")
+                if term.get("divisor") == 0:
+                    raise ValueError(f"Score {name}: linear divisor must not be zero")
+            for cond in term.get("when", []):
+                if cond.get("op") not in _OPS:
+                    raise ValueError(f"Score {name}: unknown operator {cond.get('op')!r}")
+                refs = [cond.get("input")] + ([cond["ref"]] if "ref" in cond else [])
+                if any(ref not in known for ref in refs):
+                    raise ValueError(f"Score {name}: unknown condition input in {cond}")
+                if "ref" not in cond and not _is_number(cond.get("value")):
+                    raise ValueError(f"Score {name}: condition needs a numeric 'value' or a 'ref'")
+                if "scale" in cond and not _is_number(cond["scale"]):
+                    raise ValueError(f"Score {name}: condition 'scale' must be numeric")
+        if score.get("round") not in (None, "trunc"):
+            raise ValueError(f"Score {name}: unknown rounding {score.get('round')!r}")
+        clip = score.get("clip", [None, None])
+        if not (isinstance(clip, list) and len(clip) == 2 and all(b is None or _is_number(b) for b in clip)):
+            raise ValueError(f"Score {name}: clip must be [lo, hi] with numbers or nulls")
+
+
+def load_rules(path: str) -> RuleSet:
+    with open(path, "r") as f:
+        return RuleSet(json.load(f))
+
+
+class RulesEngine:
+    """Serves the current RuleSet and hot-swaps it when the spec file changes.
+
+    The spec is read from RULES_PATH, else from scoring_rules.json in the
+    model directory next to feature_config.json, else from the rules packaged
+    with the app. The
+    file's mtime is checked at most every RULES_RELOAD_INTERVAL_SECONDS; an
+    invalid new spec is logged and the running rules are kept.
+    """
+
+    def __init__(self, path: Optional[str] = None, reload_interval: Optional[float] = None):
+        self._path = path
+        self._reload_interval = reload_interval
+        self._rules: Optional[RuleSet] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        if self._path is not None:
+            return self._path
+        if settings.RULES_PATH:
+            return settings.RULES_PATH
+        if os.path.exists(MODEL_DIR_RULES_PATH):
+            return MODEL_DIR_RULES_PATH
+        return DEFAULT_RULES_PATH
+
+    @property
+    def reload_interval(self) -> float:
+        if self._reload_interval is not None:
+            return self._reload_interval
+        return settings.RULES_RELOAD_INTERVAL_SECONDS
+
+    def current(self) -> RuleSet:
+        rules = self._rules
+        if rules is not None and (
+            self.reload_interval <= 0 or time.monotonic() - self._checked_at < self.reload_interval
+        ):
+            return rules
+        with self._lock:
+            self._maybe_reload()
+            return self._rules
+
+    def _maybe_reload(self):
+        self._checked_at = time.monotonic()
+        path = self.path
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError as e:
+            if self._rules is None:
+                raise
+            logger.error(f"Scoring rules file unavailable, keeping {self._rules.version}: {e}")
+            return
+        if self._rules is not None and mtime == self._mtime:
+            return
+
+        try:
+            rules = load_rules(path)
+        except Exception as e:
+            if self._rules is None:
+                raise
+            logger.error(f"Invalid scoring rules in {path}, keeping {self._rules.version}: {e}")
+            self._mtime = mtime
+            return
+
+        if self._rules is not None:
+            logger.info(f"Scoring rules reloaded: {self._rules.version} -> {rules.version}")
+        else:
+            logger.info(f"Scoring rules loaded: {rules.version} from {path}")
+        self._rules = rules
+        self._mtime = mtime
+
+
+rules_engine = RulesEngine()
@@ -0,0 +1,238 @@
+"""Compile an XGBoost binary classifier into flat NumPy arrays.
+
+All trees are stored back to back in flat node arrays; child indices are
+global, and leaves point at themselves so every row can be stepped through
+every tree in lock-step for max_depth levels. This avoids the sklearn
+wrapper's per-call DMatrix setup, which dominates single-row latency.
+"""
+
+import json
+import logging
+import math
+from dataclasses import dataclass, replace
+from typing import Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CompiledTreeEnsemble:
+    feature: np.ndarray        # int32, split feature per node (0 for leaves)
+    threshold: np.ndarray      # go left when x < threshold; float32, or float64 once fused
+    left: np.ndarray           # int32, global index of left child (self for leaves)
+    right: np.ndarray          # int32, global index of right child (self for leaves)
+    default_left: np.ndarray   # bool, direction for missing values
+    value: np.ndarray          # float32, leaf value (0 for internal nodes)
+    roots: np.ndarray          # int32, global index of each tree's root
+    base_margin: float
+    max_depth: int
+    n_features: int
+    fused_scaler: bool = False  # thresholds are in raw (unscaled) feature space
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def predict_margin(self, X) -> np.ndarray:
+        # XGBoost compares in float32; do the same so split decisions match.
+        # Fused thresholds are float64 so raw-space cut points keep their precision.
+        X = np.asarray(X, dtype=self.threshold.dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[:, None]
+
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            go_left = x < self.threshold[node]
+            missing = np.isnan(x)
+            if missing.any():
+                go_left = np.where(missing, self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        return self.value[node].sum(axis=1, dtype=np.float64) + self.base_margin
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Same shape and meaning as XGBClassifier.predict_proba for binary models."""
+        p = 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X) -> np.ndarray:
+        return (self.predict_margin(X) > 0).astype(np.int64)
+
+
+def _parse_base_score(raw) -> float:
+    # "5E-1" in XGBoost 1.x/2.x, "[5E-1]" in 3.x
+    return float(str(raw).strip("[]"))
+
+
+def compile_xgboost(model) -> CompiledTreeEnsemble:
+    """Compile a fitted binary:logistic XGBClassifier (or Booster)."""
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    raw = json.loads(booster.save_raw(raw_format="json"))
+    learner = raw["learner"]
+
+    objective = learner["objective"]["name"]
+    if objective != "binary:logistic":
+        raise ValueError(f"Unsupported objective for compilation: {objective}")
+
+    trees = learner["gradient_booster"]["model"]["trees"]
+    best_iteration = booster.attr("best_iteration")
+    if best_iteration is not None:
+        # predict_proba stops at the best iteration when early stopping was used
+        trees = trees[: int(best_iteration) + 1]
+
+    base_score = _parse_base_score(learner["learner_model_param"]["base_score"])
+    base_margin = math.log(base_score / (1.0 - base_score))
+
+    features, thresholds, lefts, rights, default_lefts, values, roots = [], [], [], [], [], [], []
+    max_depth = 0
+    offset = 0
+    for tree in trees:
+        left = np.asarray(tree["left_children"], dtype=np.int32)
+        right = np.asarray(tree["right_children"], dtype=np.int32)
+        split = np.asarray(tree["split_conditions"], dtype=np.float32)
+        is_leaf = left == -1
+        local = np.arange(len(left), dtype=np.int32)
+
+        features.append(np.where(is_leaf, 0, np.asarray(tree["split_indices"], dtype=np.int32)))
+        thresholds.append(np.where(is_leaf, np.float32(0), split))
+        lefts.append(np.where(is_leaf, local, left) + offset)
+        rights.append(np.where(is_leaf, local, right) + offset)
+        default_lefts.append(np.asarray(tree["default_left"], dtype=bool))
+        # Leaf values live in split_conditions for leaf nodes
+        values.append(np.where(is_leaf, split, np.float32(0)))
+        roots.append(offset)
+
+        max_depth = max(max_depth, _tree_depth(left, right))
+        offset += len(left)
+
+    return CompiledTreeEnsemble(
+        feature=np.concatenate(features).astype(np.int32),
+        threshold=np.concatenate(thresholds).astype(np.float32),
+        left=np.concatenate(lefts).astype(np.int32),
+        right=np.concatenate(rights).astype(np.int32),
+        default_left=np.concatenate(default_lefts),
+        value=np.concatenate(values).astype(np.float32),
+        roots=np.asarray(roots, dtype=np.int32),
+        base_margin=base_margin,
+        max_depth=max_depth,
+        n_features=int(booster.num_features()),
+    )
+
+
+def fuse_scaler(compiled: CompiledTreeEnsemble, scaler) -> CompiledTreeEnsemble:
+    """Fold a fitted StandardScaler into the split thresholds.
+
+    x_scaled < t  <=>  x_raw < t * scale + mean  (scale > 0), so the fused
+    ensemble takes raw features and the serving path can skip
+    scaler.transform. Per-feature attributions are unaffected by a
+    per-feature affine map, so explanations can still be reported against
+    the raw feature values.
+    """
+    if compiled.fused_scaler:
+        return compiled
+
+    mean = getattr(scaler, "mean_", None)
+    scale = getattr(scaler, "scale_", None)
+    mean = np.zeros(compiled.n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+    scale = np.ones(compiled.n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+    if mean.shape != (compiled.n_features,) or scale.shape != (compiled.n_features,):
+        raise ValueError("Scaler does not match the model's feature count")
+    if np.any(scale <= 0):
+        raise ValueError("Scaler has non-positive scale; cannot fuse")
+
+    is_split = compiled.left != np.arange(len(compiled.left))
+    threshold = compiled.threshold.astype(np.float64)
+    f = compiled.feature[is_split]
+    threshold[is_split] = _raw_thresholds(compiled.threshold[is_split], mean[f], scale[f])
+
+    return replace(compiled, threshold=threshold, fused_scaler=True)
+
+
+def _raw_thresholds(t: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """Exact raw-space cut points for float32 thresholds on scaled features.
+
+    The native path tests float32((x - mean) / scale) < t. That mapping is
+    monotone in x, so there is a smallest float64 x_raw where the test flips;
+    t * scale + mean only approximates it, which misroutes values sitting on
+    the cut (common, since histogram cut points are training values). Find it
+    by bisection, vectorized over all split nodes.
+    """
+    def scaled(x):
+        return ((x - mean) / scale).astype(np.float32)
+
+    approx = t.astype(np.float64) * scale + mean
+    width = np.maximum(np.abs(approx), scale) * 1e-6
+    lo, hi = approx - width, approx + width
+    for _ in range(64):
+        bad_lo = scaled(lo) >= t
+        bad_hi = scaled(hi) < t
+        if not (bad_lo.any() or bad_hi.any()):
+            break
+        width *= 2
+        lo = np.where(bad_lo, approx - width, lo)
+        hi = np.where(bad_hi, approx + width, hi)
+
+    # Invariant: scaled(lo) < t <= scaled(hi); shrink until lo and hi are adjacent doubles
+    for _ in range(200):
+        mid = lo + (hi - lo) / 2
+        open_ = (mid > lo) & (mid < hi)
+        if not open_.any():
+            break
+        flips = scaled(mid) >= t
+        hi = np.where(open_ & flips, mid, hi)
+        lo = np.where(open_ & ~flips, mid, lo)
+    return hi
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    depth = 0
+    frontier = [0]
+    while True:
+        children = [c for n in frontier for c in (left[n], right[n]) if c != -1]
+        if not children:
+            return depth
+        depth += 1
+        frontier = children
+
+
+def parity_sample(compiled: CompiledTreeEnsemble, n_rows: int = 256, seed: int = 0) -> np.ndarray:
+    """Rows whose values straddle the ensemble's own split thresholds, so both
+    branches of many splits are exercised regardless of feature scaling."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, compiled.n_features))
+    is_split = compiled.left != np.arange(len(compiled.left))
+    for f in range(compiled.n_features):
+        cuts = compiled.threshold[is_split & (compiled.feature == f)].astype(np.float64)
+        if len(cuts) == 0:
+            continue
+        picked = rng.choice(cuts, size=n_rows)
+        nudge = rng.choice([-1.0, 1.0], size=n_rows) * 1e-3 * np.maximum(1.0, np.abs(picked))
+        X[:, f] = picked + nudge
+    return X
+
+
+def check_parity(
+    model,
+    compiled: CompiledTreeEnsemble,
+    X: Optional[np.ndarray] = None,
+    atol: float = 1e-5,
+    scaler=None,
+) -> float:
+    """Compare compiled and native predict_proba; raise if they diverge.
+
+    For a fused ensemble X is in raw feature space and `scaler` is applied
+    before calling the native model. Returns the max absolute difference in
+    default probability.
+    """
+    if X is None:
+        X = parity_sample(compiled)
+    native_X = scaler.transform(X) if compiled.fused_scaler and scaler is not None else X
+    expected = np.asarray(model.predict_proba(native_X))[:, 1]
+    actual = compiled.predict_proba(X)[:, 1]
+    max_diff = float(np.max(np.abs(expected - actual)))
+    if max_diff > atol:
+        raise ValueError(f"Compiled model diverges from predict_proba (max diff {max_diff:.2e} > {atol:.0e})")
+    return max_diff
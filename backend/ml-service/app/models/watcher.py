@@ -0,0 +1,79 @@
+"""Background hot reload: poll the model artifacts and swap in a changed model.
+
+Each poll reads only file mtimes/sizes (local) or object ETags (S3). A
+change is acted on once it has been seen unchanged for a second poll, so a
+model still being copied into place is not loaded half-written. The reload
+itself goes through ModelRegistry.reload, which validates and warms the new
+bundle before swapping it in; a model that fails is logged and not retried
+until its artifacts change again.
+"""
+
+import logging
+import threading
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.models.loader import ModelReloadError
+from app.models.registry import ModelRegistry, model_registry
+
+logger = logging.getLogger(__name__)
+
+
+class ModelWatcher:
+    def __init__(self, registry: ModelRegistry, interval_seconds: float):
+        self._registry = registry
+        self.interval_seconds = interval_seconds
+        self._seen: Optional[Tuple] = None
+        self._pending: Optional[Tuple] = None
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running:
+            return
+        self._seen = self._registry.artifact_fingerprint()
+        self._pending = None
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Watching model artifacts every {self.interval_seconds}s")
+
+    def stop(self, timeout: float = 5.0):
+        if not self.is_running:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stopping.wait(self.interval_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Model watcher check failed: {e}")
+
+    def check(self) -> bool:
+        """Poll once; returns True if a reload was attempted."""
+        fingerprint = self._registry.artifact_fingerprint()
+        if fingerprint is None or fingerprint == self._seen:
+            self._pending = None
+            return False
+        if fingerprint != self._pending:
+            # Wait one more interval for the artifacts to settle
+            self._pending = fingerprint
+            return False
+
+        self._seen = fingerprint
+        self._pending = None
+        logger.info("Model artifacts changed, reloading")
+        try:
+            self._registry.reload()
+        except ModelReloadError as e:
+            logger.error(str(e))
+        return True
+
+
+model_watcher = ModelWatcher(model_registry, settings.MODEL_WATCH_INTERVAL_SECONDS)
@@ -0,0 +1,142 @@
+"""Pre-fork server launcher.
+
+The master process loads and warms the model once, freezes the heap and then
+forks PREFORK_WORKERS uvicorn workers that share the listening sockets and the
+model's memory pages copy-on-write. Dead workers are re-forked from the warm
+master, so respawn takes milliseconds instead of a full model load.
+
+Usage:
+    python -m app.prefork
+"""
+
+import gc
+import os
+import signal
+import sys
+import time
+
+from app.core.config import settings
+from app.core.logging import setup_logging, get_logger
+from app.server import bind_sockets, remove_uds, server_config
+
+setup_logging(settings.LOG_LEVEL)
+logger = get_logger(__name__)
+
+# A worker that dies faster than this is respawned with a short backoff
+MIN_WORKER_LIFETIME_SECONDS = 1.0
+
+
+class PreforkMaster:
+    def __init__(self, num_workers: int):
+        self.num_workers = num_workers
+        self._workers = {}  # pid -> (slot, started_at)
+        self._sockets = []
+        self._shutting_down = False
+
+    def prepare(self):
+        from app.models.registry import model_registry
+        from app.services import pipeline
+
+        logger.info("Loading model in pre-fork master...")
+        model_registry.ensure_loaded()
+        pipeline.warm_up()
+
+        # Workers use the master's already-loaded registry, not their own
+        settings.PRELOAD_MODEL = False
+        if settings.INFERENCE_EXECUTOR == "process":
+            logger.warning("Process inference executor would reload the model per worker; using threads")
+            settings.INFERENCE_EXECUTOR = "thread"
+
+        if self.num_workers > 1 and settings.EXPLANATION_MODE.strip().lower() == "deferred":
+            logger.warning(
+                "EXPLANATION_MODE=deferred with several workers: each worker keeps its own explanation store, "
+                "so explanations can only be fetched from the worker that scored the request (others answer 421)"
+            )
+
+        # Import the app (and server) before forking so workers inherit them
+        import uvicorn  # noqa: F401
+        import app.main  # noqa: F401
+        from app.api.routes import model_warmup
+
+        # Workers start ready instead of loading and warming again in their lifespan
+        model_warmup.mark_ready()
+
+        # Move everything allocated so far out of the GC's reach; otherwise the
+        # first collection in each worker touches (and copies) every page
+        gc.collect()
+        gc.freeze()
+
+        self._sockets = bind_sockets()
+        logger.info(f"Pre-fork master ready (model {model_registry.model_version})")
+
+    def spawn(self, slot: int):
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(slot)
+        self._workers[pid] = (slot, time.monotonic())
+        logger.info(f"Started worker {slot} (pid {pid})")
+
+    def _run_worker(self, slot: int):
+        """Never returns: the child must not fall back into the master's loop."""
+        exit_code = 0
+        try:
+            import uvicorn
+            from app.main import app
+
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            uvicorn.Server(server_config(app)).run(sockets=self._sockets)
+        except BaseException as e:
+            logger.error(f"Worker {slot} crashed: {e}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _handle_shutdown(self, signum, frame):
+        self._shutting_down = True
+        for pid in list(self._workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_shutdown)
+        signal.signal(signal.SIGINT, self._handle_shutdown)
+
+        for slot in range(self.num_workers):
+            self.spawn(slot)
+
+        while self._workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+
+            slot, started_at = self._workers.pop(pid, (None, None))
+            if slot is None or self._shutting_down:
+                continue
+
+            logger.warning(f"Worker {slot} (pid {pid}) exited with status {status}, respawning")
+            if time.monotonic() - started_at < MIN_WORKER_LIFETIME_SECONDS:
+                time.sleep(MIN_WORKER_LIFETIME_SECONDS)
+            self.spawn(slot)
+
+        remove_uds()
+        logger.info("Pre-fork master exiting")
+
+
+def main():
+    if not hasattr(os, "fork"):
+        logger.error("Pre-fork mode requires os.fork(); use `uvicorn app.main:app` instead")
+        sys.exit(1)
+
+    master = PreforkMaster(settings.PREFORK_WORKERS)
+    master.prepare()
+    master.run()
+
+
+if __name__ == "__main__":
+    main()
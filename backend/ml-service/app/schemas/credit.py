@@ -73,7 +73,9 @@ class CreditScoreResponse(BaseModel):
     
     confidence_score: Optional[float] = Field(None, ge=0, le=1, description="Model confidence")
     top_factors: Optional[List[FactorExplanation]] = Field(None, description="Top factors influencing decision")
+    explanation_id: Optional[str] = Field(None, description="Deferred explanations: fetch top factors from /api/ml/explanations/{id}")
     model_version: Optional[str] = Field(None, description="ML model version used")
+    policy_version: Optional[str] = Field(None, description="Decision policy version used")
     processing_time_ms: Optional[int] = Field(None, description="Processing time in milliseconds")
     is_fallback: bool = Field(default=False, description="Whether fallback rules were used")
     
@@ -95,7 +97,35 @@ class CreditScoreResponse(BaseModel):
                     {"feature": "successful_repayments", "impact": "positive", "value": 2, "contribution": 0.15}
                 ],
                 "model_version": "v1.0.0",
+                "policy_version": "policy-v1",
                 "processing_time_ms": 45,
                 "is_fallback": False
             }
         }
+
+
+
+class BatchCreditScoreRequest(BaseModel):
+    requests: List[CreditScoreRequest] = Field(..., min_length=1, description="Credit score requests to score together")
+
+
+class BatchCreditScoreResponse(BaseModel):
+    results: List[CreditScoreResponse] = Field(..., description="Credit score responses, in request order")
+    processing_time_ms: Optional[int] = Field(None, description="Processing time for the whole batch in milliseconds")
+
+
+class ExplanationStatus(str, Enum):
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+    # Not computed: the queue was full when the request was scored
+    UNAVAILABLE = "unavailable"
+
+
+class ExplanationResponse(BaseModel):
+    explanation_id: str
+    status: ExplanationStatus
+    model_version: Optional[str] = Field(None, description="ML model version the explanation is for")
+    confidence_score: Optional[float] = Field(None, ge=0, le=1, description="Model confidence")
+    top_factors: Optional[List[FactorExplanation]] = Field(None, description="Top factors influencing decision")
+    error: Optional[str] = Field(None, description="Why the explanation failed")
@@ -0,0 +1,99 @@
+"""Listening sockets and uvicorn settings shared by every way of serving the app.
+
+The app is always served over TCP on HOST:PORT. When UDS_PATH is set it is
+also served on that Unix domain socket, so callers on the same host (the
+NestJS backend) skip the TCP/IP stack. Both listeners run in the same
+server, so a pre-fork master hands both to every worker.
+
+Connections are kept alive for KEEPALIVE_TIMEOUT_SECONDS, so callers that
+pool connections send many small requests without reconnecting.
+
+Usage:
+    python -m app.server
+"""
+
+import os
+import signal
+import socket
+import stat
+import sys
+from typing import List
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def _bind_tcp() -> socket.socket:
+    # asyncio only sets TCP_NODELAY on accepted sockets whose proto is
+    # IPPROTO_TCP; with the default proto 0, responses written in two parts
+    # (headers, body) stall ~40ms on Nagle + delayed ACK
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((settings.HOST, settings.PORT))
+    logger.info(f"Listening on {settings.HOST}:{settings.PORT}")
+    return sock
+
+
+def _bind_uds(path: str) -> socket.socket:
+    # A socket file left behind by a previous run would make bind() fail
+    if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, int(settings.UDS_PERMISSIONS, 8))
+    logger.info(f"Listening on unix:{path}")
+    return sock
+
+
+def bind_sockets() -> List[socket.socket]:
+    """Bind and listen on TCP, plus the Unix socket when UDS_PATH is set."""
+    sockets = [_bind_tcp()]
+    if settings.UDS_PATH:
+        sockets.append(_bind_uds(settings.UDS_PATH))
+    for sock in sockets:
+        sock.listen(settings.LISTEN_BACKLOG)
+        sock.set_inheritable(True)
+    return sockets
+
+
+def remove_uds():
+    if settings.UDS_PATH and os.path.exists(settings.UDS_PATH):
+        os.unlink(settings.UDS_PATH)
+
+
+def server_config(app):
+    import uvicorn
+
+    return uvicorn.Config(
+        app,
+        log_level=settings.LOG_LEVEL.lower(),
+        timeout_keep_alive=settings.KEEPALIVE_TIMEOUT_SECONDS,
+        backlog=settings.LISTEN_BACKLOG,
+        access_log=settings.ACCESS_LOG,
+    )
+
+
+def _exit_after_shutdown(signum, frame):
+    sys.exit(0)
+
+
+def serve(app):
+    """Serve the app on every configured listener until interrupted."""
+    import uvicorn
+
+    # uvicorn re-raises SIGTERM once it has drained; exit normally instead so
+    # the socket file is removed
+    signal.signal(signal.SIGTERM, _exit_after_shutdown)
+    sockets = bind_sockets()
+    try:
+        uvicorn.Server(server_config(app)).run(sockets=sockets)
+    finally:
+        remove_uds()
+
+
+if __name__ == "__main__":
+    from app.main import app
+
+    serve(app)
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from typing import Optional, List, Tuple
+from app.schemas.credit import CreditScoreRequest, CreditScoreResponse
+from app.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+WAIT_TIME_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100)
+
+
+class MicroBatcher:
+    """Collects concurrent single-request calls and scores them as one batch.
+
+    A batch is flushed when it reaches max_batch_size or when the oldest
+    queued request has waited max_wait_ms, whichever comes first. Each
+    caller's future resolves to its own prediction, or None when the batch
+    could not be scored so the caller can fall back.
+    """
+
+    def __init__(
+        self,
+        inference_service,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        queue_depth: int = 1024,
+        executor=None,
+    ):
+        self._inference_service = inference_service
+        self._executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.queue_depth = queue_depth
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # The batch being collected or scored, which stop() must also release
+        self._batch: List[Tuple[CreditScoreRequest, asyncio.Future, float]] = []
+        self._batch_size_hist = metrics_registry.histogram("micro_batch_size", BATCH_SIZE_BUCKETS)
+        self._wait_time_hist = metrics_registry.histogram("micro_batch_wait_ms", WAIT_TIME_BUCKETS_MS)
+        self._rejected = metrics_registry.counter("micro_batch_queue_full")
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_depth)
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Micro-batching enabled (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait_ms}, queue_depth={self.queue_depth})"
+        )
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Release anyone still waiting, in the interrupted batch or the queue, so they can fall back
+        pending = self._batch
+        self._batch = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future, _ in pending:
+            if not future.done():
+                future.set_result(None)
+
+    async def submit(self, request: CreditScoreRequest) -> Optional[CreditScoreResponse]:
+        """Queue a request for the next batch. Raises asyncio.QueueFull when saturated."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((request, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self._rejected.inc()
+            raise
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = self._batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._score(batch)
+            self._batch = []
+
+    async def _score(self, batch: List[Tuple[CreditScoreRequest, asyncio.Future, float]]):
+        now = time.perf_counter()
+        self._batch_size_hist.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            self._wait_time_hist.observe((now - enqueued_at) * 1000)
+
+        requests = [request for request, _, _ in batch]
+        try:
+            if self._executor is not None:
+                predictions = await self._executor.run(self._inference_service.predict_batch, requests)
+            else:
+                predictions = self._inference_service.predict_batch(requests)
+        except Exception as e:
+            logger.error(f"Micro-batch prediction failed: {e}")
+            predictions = [None] * len(batch)
+
+        for (_, future, _), prediction in zip(batch, predictions):
+            # The caller may have gone away (client disconnect cancels the future)
+            if not future.done():
+                future.set_result(prediction)
@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Callable, Iterable, Sequence, Set
+from app.schemas.credit import CreditScoreResponse
+from app.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    wallet_address: str,
+    features: Sequence[float],
+    model_version: str,
+    deferred: bool = False,
+    rules_version: str = "",
+    policy_version: str = "",
+) -> str:
+    """Stable key over everything that determines a response.
+
+    The fraud and anomaly scores come from the scoring rules and the action
+    from the decision policy, so their versions are part of the key: a
+    reloaded rules file or a new policy misses instead of serving stale
+    decisions. Responses with deferred explanations carry an explanation_id
+    instead of top factors, so they are cached apart from inline ones.
+    """
+    parts = [wallet_address, model_version, rules_version, policy_version, *(repr(float(f)) for f in features)]
+    if deferred:
+        parts.append("deferred")
+    payload = "|".join(parts)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """Bounded LRU cache of scored responses with TTL expiry.
+
+    Entries are tied to the model version they were computed with (it is
+    part of the key), so pinned and live versions share the cache. When a
+    version the cache has not seen before shows up (a reload, typically),
+    entries for versions no longer in `loaded_versions()` are dropped.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        loaded_versions: Optional[Callable[[], Iterable[str]]] = None,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._loaded_versions = loaded_versions
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._versions: Set[str] = set()
+        self._lock = threading.Lock()
+        self._hits = metrics_registry.counter("prediction_cache_hits")
+        self._misses = metrics_registry.counter("prediction_cache_misses")
+        self._evictions = metrics_registry.counter("prediction_cache_evictions")
+        self._expirations = metrics_registry.counter("prediction_cache_expirations")
+        self._invalidations = metrics_registry.counter("prediction_cache_invalidations")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, model_version: str):
+        if model_version in self._versions:
+            return
+        self._versions.add(model_version)
+        if self._loaded_versions is None:
+            return
+        loaded = set(self._loaded_versions()) | {model_version}
+        unloaded = self._versions - loaded
+        if not unloaded:
+            return
+        stale = [key for key, (_, _, version) in self._entries.items() if version in unloaded]
+        for key in stale:
+            del self._entries[key]
+        self._versions &= loaded
+        self._invalidations.inc(len(unloaded))
+        logger.info(f"Model versions {', '.join(sorted(unloaded))} unloaded, dropped {len(stale)} cached predictions")
+
+    def get(self, key: str, model_version: str) -> Optional[CreditScoreResponse]:
+        with self._lock:
+            self._check_version(model_version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses.inc()
+                return None
+
+            response, expires_at, _ = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self._expirations.inc()
+                self._misses.inc()
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits.inc()
+
+        # Callers set processing_time_ms etc., so never hand out the stored object
+        return response.model_copy(deep=True)
+
+    def put(self, key: str, model_version: str, response: CreditScoreResponse):
+        if self.max_size <= 0:
+            return
+        stored = response.model_copy(deep=True)
+        with self._lock:
+            self._check_version(model_version)
+            self._entries[key] = (stored, self._clock() + self.ttl_seconds, model_version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions.inc()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
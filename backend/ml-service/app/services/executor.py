@@ -0,0 +1,65 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Optional, Callable, Any
+
+logger = logging.getLogger(__name__)
+
+
+def _init_process_worker():
+    """Load models once in each worker process."""
+    from app.models.registry import model_registry
+    model_registry.ensure_loaded()
+
+
+class InferenceExecutor:
+    """Runs CPU-bound scoring work (predict, SHAP, fallback) off the event loop.
+
+    "thread" mode shares the already-loaded model with the serving process.
+    "process" mode sidesteps the GIL for pure-Python work, at the cost of one
+    model copy per worker process; callables and arguments must be picklable.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown inference executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self._pool: Optional[Executor] = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_process_worker,
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="inference",
+                )
+            logger.info(f"Inference executor started ({self.kind}, {self.max_workers} workers)")
+        return self._pool
+
+    def submit(self, fn: Callable[..., Any], *args) -> Future:
+        """Start work without awaiting it; the future can be waited on from any thread or loop."""
+        return self._get_pool().submit(fn, *args)
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        if self.kind == "thread":
+            # Carry the request ID (and other context vars) into the worker thread
+            ctx = contextvars.copy_context()
+            return await loop.run_in_executor(pool, functools.partial(ctx.run, fn, *args))
+        return await loop.run_in_executor(pool, functools.partial(fn, *args))
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
@@ -1,20 +1,144 @@
 import logging
-from typing import Optional, List
+from typing import Callable, Optional, List, Tuple
 from dataclasses import dataclass
 import numpy as np
 from app.schemas.credit import CreditScoreRequest, FactorExplanation
 from app.core.config import settings
-from app.models.loader import model_loader
+from app.models.loader import ModelBundle
+from app.models.registry import model_registry
+from app.services import vectorized
 
 logger = logging.getLogger(__name__)
 
 
-try:
-    import shap
-    SHAP_AVAILABLE = True
-except ImportError:
-    SHAP_AVAILABLE = False
-    logger.warning("SHAP not available, using rule-based explanations")
+_shap = None
+_shap_checked = False
+
+
+def shap_module():
+    """The shap module, imported on first use; None when SHAP is off or not installed.
+    
+    shap pulls in numba, scipy and friends, so a process with ENABLE_SHAP=false
+    never imports it.
+    """
+    global _shap, _shap_checked
+    if not settings.ENABLE_SHAP:
+        return None
+    if not _shap_checked:
+        try:
+            import shap
+            _shap = shap
+        except ImportError:
+            logger.warning("SHAP not available, models without native contributions get rule-based explanations")
+        _shap_checked = True
+    return _shap
+
+
+TOP_FACTORS = 3
+
+# (feature, impact, value, contribution)
+Factor = Tuple[str, str, float, float]
+
+
+def top_factors(factors: List[Factor], k: int = TOP_FACTORS) -> List[FactorExplanation]:
+    """Pick the k largest contributions first, then build models for those only."""
+    ranked = sorted(factors, key=lambda f: abs(f[3]), reverse=True)
+    return [
+        FactorExplanation(feature=feature, impact=impact, value=value, contribution=contribution)
+        for feature, impact, value, contribution in ranked[:k]
+    ]
+
+
+def top_k_columns(values: np.ndarray, k: int = TOP_FACTORS) -> np.ndarray:
+    """(n, k) column indices of each row's k largest |values|, largest first.
+    
+    argpartition selects the k in linear time; only those k are sorted.
+    """
+    magnitude = np.abs(values)
+    k = min(k, magnitude.shape[1])
+    if k < magnitude.shape[1]:
+        candidates = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(k), magnitude.shape)
+    order = np.argsort(-np.take_along_axis(magnitude, candidates, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+class ContributionExplainer:
+    """Exact SHAP values from the booster's own TreeSHAP implementation.
+    
+    XGBoost (`pred_contribs`) and LightGBM (`pred_contrib`) compute them in
+    native code, one call per batch, without importing shap. Values are
+    log-odds contributions to the positive class, as from shap.TreeExplainer.
+    """
+    
+    def __init__(self, predict_contribs: Callable[[np.ndarray], np.ndarray]):
+        self._predict_contribs = predict_contribs
+    
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        """(n, n_features) contributions for scaled feature rows."""
+        values = np.asarray(self._predict_contribs(X))
+        if values.ndim == 3:
+            # Multi-class boosters return (n, classes, features + 1)
+            values = values[:, -1]
+        # The last column is the bias (expected value)
+        return values[:, :-1]
+
+
+class ShapExplainer:
+    """A shap explainer, for models without native contributions."""
+    
+    def __init__(self, explainer):
+        self._explainer = explainer
+    
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        """(n, n_features) contributions for scaled feature rows."""
+        values = self._explainer.shap_values(X)
+        if isinstance(values, list):
+            values = values[1]
+        values = np.asarray(values)
+        if values.ndim == 3:
+            values = values[..., 1]
+        return values
+
+
+def _native_contributions(model) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+    """The booster's contribution function for XGBoost and LightGBM models, else None."""
+    library = type(model).__module__.split(".")[0]
+    if library == "xgboost":
+        from xgboost import DMatrix
+        booster = model.get_booster()
+        feature_names = booster.feature_names
+        approximate = settings.EXPLANATION_CONTRIBUTIONS == "approximate"
+        return lambda X: booster.predict(
+            DMatrix(X, feature_names=feature_names), pred_contribs=True, approx_contribs=approximate
+        )
+    if library == "lightgbm":
+        booster = model.booster_
+        return lambda X: booster.predict(X, pred_contrib=True)
+    return None
+
+
+def build_explainer(model, background: np.ndarray):
+    """Explainer for a newly loaded model, or None when explanations are off.
+    
+    Built by the loader as part of the model bundle, so every loaded model
+    version has its own and it is replaced together with the model on
+    reload. XGBoost and LightGBM models are explained with their native
+    contributions; other models use shap, if installed. `background` is
+    scaled feature rows for the model-agnostic KernelExplainer.
+    """
+    if not settings.ENABLE_SHAP:
+        return None
+    native = _native_contributions(model)
+    if native is not None:
+        return ContributionExplainer(native)
+    shap = shap_module()
+    if shap is None:
+        return None
+    if hasattr(model, 'tree_') or hasattr(model, 'estimators_'):
+        return ShapExplainer(shap.TreeExplainer(model))
+    return ShapExplainer(shap.KernelExplainer(model.predict_proba, background))
 
 
 @dataclass
@@ -24,172 +148,111 @@ class ExplanationResult:
 
 
 class ExplainabilityService:
-    def __init__(self):
-        self._shap_explainer = None
-        self._model = None
-        
     @property
     def is_enabled(self) -> bool:
         return settings.ENABLE_SHAP
     
-    def explain(self, request: CreditScoreRequest) -> ExplanationResult:
-        """Generate explanations using SHAP if available, otherwise use rule-based."""
-        if settings.ENABLE_SHAP and SHAP_AVAILABLE:
+    def explain(self, request: CreditScoreRequest, bundle: Optional[ModelBundle] = None) -> ExplanationResult:
+        """Explain one prediction; see explain_batch."""
+        return self.explain_batch([request], bundle)[0]
+    
+    def explain_batch(
+        self,
+        requests: List[CreditScoreRequest],
+        bundle: Optional[ModelBundle] = None,
+    ) -> List[ExplanationResult]:
+        """Explain predictions with the model's explainer if it has one, otherwise rule-based.
+        
+        `bundle` should be the one the predictions were scored with; it
+        defaults to the live one.
+        """
+        bundle = bundle or model_registry.current()
+        if settings.ENABLE_SHAP and bundle.explainer is not None:
             try:
-                return self._explain_with_shap(request)
+                return self._explain_with_model(requests, bundle)
             except Exception as e:
                 logger.warning(f"SHAP explanation failed: {e}, falling back to rule-based")
         
         # Fallback to rule-based explanations
-        factors = self._calculate_feature_importance(request)
-        confidence = self._calculate_confidence(request)
-        
-        return ExplanationResult(
-            top_factors=factors[:3],
-            confidence=confidence,
-        )
+        return [
+            ExplanationResult(
+                top_factors=top_factors(self._calculate_feature_importance(request)),
+                confidence=self._calculate_confidence(request),
+            )
+            for request in requests
+        ]
     
-    def _explain_with_shap(self, request: CreditScoreRequest) -> ExplanationResult:
-        """Generate SHAP-based explanations."""
-        model = model_loader.get_model()
-        scaler = model_loader.get_scaler()
-        
-        if model is None:
-            raise ValueError("Model not loaded, cannot use SHAP")
+    def _explain_with_model(self, requests: List[CreditScoreRequest], bundle: ModelBundle) -> List[ExplanationResult]:
+        """Explain a batch with one call to the bundle's explainer."""
+        features = vectorized.feature_matrix(vectorized.request_columns(requests))
+        scaled = bundle.scaler.transform(features) if bundle.scaler else features
+        contributions = bundle.explainer.contributions(scaled)
+        magnitude = np.abs(contributions)
         
-
-        collateral_ratio = request.collateral_value_usd / request.loan_amount if request.loan_amount > 0 else 0
-        features = np.array([[
-            request.wallet_age_days,
-            request.total_transactions,
-            request.total_volume_usd,
-            request.defi_interactions,
-            request.loan_amount,
-            request.collateral_value_usd,
-            request.term_months,
-            request.previous_loans,
-            request.successful_repayments,
-            request.defaults,
-            request.reputation_score,
-            collateral_ratio,
-        ]])
-        
-
-        if scaler:
-            features = scaler.transform(features)
-        
-
-        if self._shap_explainer is None:
-
-            if hasattr(model, 'tree_') or hasattr(model, 'estimators_'):
-                self._shap_explainer = shap.TreeExplainer(model)
-            else:
-
-                self._shap_explainer = shap.KernelExplainer(
-                    model.predict_proba,
-                    features[:1]
-                )
-        
-
-        shap_values = self._shap_explainer.shap_values(features)
-        
-
-        if isinstance(shap_values, list):
-            shap_values = shap_values[1]
-        
-
-        feature_names = model_loader.get_feature_names()
+        confidence = 1.0 - np.minimum(contributions.std(axis=1) / (magnitude.mean(axis=1) + 1e-6), 1.0)
+        confidence = np.clip(confidence, 0.5, 0.99)
         
-
-        factors = []
-        feature_values = {
-            'wallet_age_days': request.wallet_age_days,
-            'total_transactions': request.total_transactions,
-            'total_volume_usd': request.total_volume_usd,
-            'defi_interactions': request.defi_interactions,
-            'loan_amount': request.loan_amount,
-            'collateral_value_usd': request.collateral_value_usd,
-            'term_months': request.term_months,
-            'previous_loans': request.previous_loans,
-            'successful_repayments': request.successful_repayments,
-            'defaults': request.defaults,
-            'reputation_score': request.reputation_score,
-            'collateral_ratio': request.collateral_value_usd / request.loan_amount if request.loan_amount > 0 else 0,
-        }
-        
-        for i, (name, shap_value) in enumerate(zip(feature_names, shap_values[0])):
-            feature_value = feature_values.get(name, 0.0)
-            factors.append(FactorExplanation(
-                feature=name,
-                impact="positive" if shap_value > 0 else "negative",
-                value=float(feature_value),
-                contribution=float(abs(shap_value))
-            ))
-        
-
-        factors.sort(key=lambda x: x.contribution, reverse=True)
-        top_factors = factors[:3]
-        
-
-        confidence = 1.0 - min(np.std(shap_values[0]) / (np.abs(shap_values[0]).mean() + 1e-6), 1.0)
-        confidence = max(0.5, min(0.99, confidence))
-        
-        return ExplanationResult(
-            top_factors=top_factors,
-            confidence=confidence,
-        )
+        feature_names = bundle.feature_names
+        return [
+            ExplanationResult(
+                top_factors=[
+                    FactorExplanation(
+                        feature=feature_names[j],
+                        impact="positive" if contributions[i, j] > 0 else "negative",
+                        value=float(features[i, j]),
+                        contribution=float(magnitude[i, j]),
+                    )
+                    for j in columns
+                ],
+                confidence=float(confidence[i]),
+            )
+            for i, columns in enumerate(top_k_columns(contributions))
+        ]
     
-    def _calculate_feature_importance(self, request: CreditScoreRequest) -> List[FactorExplanation]:
-        factors = []
-        
-        factors.append(FactorExplanation(
-            feature="reputation_score",
-            impact="positive" if request.reputation_score >= 50 else "negative",
-            value=request.reputation_score,
-            contribution=abs(request.reputation_score - 50) / 100 * 0.3
-        ))
-        
-        wallet_age_impact = "positive" if request.wallet_age_days >= 90 else "negative"
-        factors.append(FactorExplanation(
-            feature="wallet_age_days",
-            impact=wallet_age_impact,
-            value=request.wallet_age_days,
-            contribution=min(request.wallet_age_days / 365 * 0.25, 0.25)
-        ))
+    def _calculate_feature_importance(self, request: CreditScoreRequest) -> List[Factor]:
+        """Rule-based (feature, impact, value, contribution) rows, unsorted."""
+        factors = [
+            ("reputation_score",
+             "positive" if request.reputation_score >= 50 else "negative",
+             request.reputation_score,
+             abs(request.reputation_score - 50) / 100 * 0.3),
+            ("wallet_age_days",
+             "positive" if request.wallet_age_days >= 90 else "negative",
+             request.wallet_age_days,
+             min(request.wallet_age_days / 365 * 0.25, 0.25)),
+        ]
         
         collateral_ratio = request.collateral_value_usd / request.loan_amount if request.loan_amount > 0 else 0
-        factors.append(FactorExplanation(
-            feature="collateral_ratio",
-            impact="positive" if collateral_ratio >= 1.0 else "negative",
-            value=collateral_ratio,
-            contribution=min(collateral_ratio * 0.2, 0.3)
+        factors.append((
+            "collateral_ratio",
+            "positive" if collateral_ratio >= 1.0 else "negative",
+            collateral_ratio,
+            min(collateral_ratio * 0.2, 0.3),
         ))
         
         if request.successful_repayments > 0:
-            factors.append(FactorExplanation(
-                feature="successful_repayments",
-                impact="positive",
-                value=request.successful_repayments,
-                contribution=min(request.successful_repayments * 0.1, 0.2)
+            factors.append((
+                "successful_repayments",
+                "positive",
+                request.successful_repayments,
+                min(request.successful_repayments * 0.1, 0.2),
             ))
         
         if request.defaults > 0:
-            factors.append(FactorExplanation(
-                feature="defaults",
-                impact="negative",
-                value=request.defaults,
-                contribution=min(request.defaults * 0.3, 0.5)
+            factors.append((
+                "defaults",
+                "negative",
+                request.defaults,
+                min(request.defaults * 0.3, 0.5),
             ))
         
-        factors.append(FactorExplanation(
-            feature="defi_interactions",
-            impact="positive" if request.defi_interactions >= 10 else "neutral",
-            value=request.defi_interactions,
-            contribution=min(request.defi_interactions / 50 * 0.15, 0.15)
+        factors.append((
+            "defi_interactions",
+            "positive" if request.defi_interactions >= 10 else "neutral",
+            request.defi_interactions,
+            min(request.defi_interactions / 50 * 0.15, 0.15),
         ))
         
-        factors.sort(key=lambda x: abs(x.contribution), reverse=True)
-        
         return factors
     
     def _calculate_confidence(self, request: CreditScoreRequest) -> float:
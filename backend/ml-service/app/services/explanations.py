@@ -0,0 +1,239 @@
+"""Deferred explanations: respond with the score now, compute top factors later.
+
+A prediction scored with deferred explanations is returned with an
+`explanation_id` in place of `top_factors` and `confidence_score`. Its
+request goes onto a bounded queue; a background task drains the queue in
+batches, explains each model version's share with one call on the
+inference executor (off the event loop, as for scoring) and puts the
+results in an ExplanationStore, where GET /api/ml/explanations/{id} reads
+them until they expire. Explanations are only ever queued, never computed,
+on the scoring path: when the queue is full the id is stored as
+`unavailable` instead, so overload sheds explanations, not decisions.
+
+The store lives in the process that scored the request. Ids start with
+that process's pid, so a worker asked for another worker's id (under
+`python -m app.prefork` or `uvicorn --workers`) can tell it apart from an
+unknown one and say so, instead of answering a misleading 404.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from app.schemas.credit import CreditScoreRequest, CreditScoreResponse, ExplanationStatus, FactorExplanation
+from app.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+LAG_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+# (explanation_id, request, model_version, enqueued_at)
+Job = Tuple[str, CreditScoreRequest, str, float]
+
+
+@dataclass
+class StoredExplanation:
+    status: ExplanationStatus
+    model_version: str
+    expires_at: float
+    confidence_score: Optional[float] = None
+    top_factors: Optional[List[FactorExplanation]] = None
+    error: Optional[str] = None
+
+
+class ExplanationStore:
+    """Bounded store of deferred explanations with TTL expiry.
+
+    An entry is created (pending) when its request is queued and expires
+    ttl_seconds later whether or not it was ever read; past max_size the
+    oldest entries are evicted first.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, StoredExplanation]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._evictions = metrics_registry.counter("explanation_store_evictions")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def create(
+        self,
+        model_version: str,
+        status: ExplanationStatus = ExplanationStatus.PENDING,
+        error: Optional[str] = None,
+    ) -> str:
+        """Add an entry (pending unless told otherwise); returns its id."""
+        explanation_id = f"{os.getpid():x}-{uuid.uuid4().hex}"
+        with self._lock:
+            self._entries[explanation_id] = StoredExplanation(
+                status=status,
+                model_version=model_version,
+                expires_at=self._clock() + self.ttl_seconds,
+                error=error,
+            )
+            while len(self._entries) > max(self.max_size, 1):
+                self._entries.popitem(last=False)
+                self._evictions.inc()
+        return explanation_id
+
+    def complete(self, explanation_id: str, confidence_score: float, top_factors: List[FactorExplanation]):
+        self._update(explanation_id, status=ExplanationStatus.READY, confidence_score=confidence_score, top_factors=top_factors)
+
+    def fail(self, explanation_id: str, error: str):
+        self._update(explanation_id, status=ExplanationStatus.FAILED, error=error)
+
+    def owner_pid(self, explanation_id: str) -> Optional[int]:
+        """The pid of the process that created `explanation_id`, or None if it is malformed."""
+        prefix, _, _ = explanation_id.partition("-")
+        try:
+            return int(prefix, 16)
+        except ValueError:
+            return None
+
+    def get(self, explanation_id: str) -> Optional[StoredExplanation]:
+        """The entry for `explanation_id`, or None if unknown, evicted or expired."""
+        with self._lock:
+            entry = self._entries.get(explanation_id)
+            if entry is None:
+                return None
+            if self._clock() >= entry.expires_at:
+                del self._entries[explanation_id]
+                return None
+            return replace(entry)
+
+    def _update(self, explanation_id: str, **changes):
+        with self._lock:
+            entry = self._entries.get(explanation_id)
+            # Evicted while it was being computed
+            if entry is not None:
+                self._entries[explanation_id] = replace(entry, **changes)
+
+
+class DeferredExplainer:
+    """Explains queued predictions in the background, in batches per model version.
+
+    `explain` is called as explain(requests, model_version) and returns one
+    result with `top_factors` and `confidence` per request (see
+    pipeline.explain_requests); it runs on `executor` when one is given.
+    """
+
+    def __init__(
+        self,
+        explain: Callable[[List[CreditScoreRequest], str], list],
+        store: ExplanationStore,
+        queue_depth: int = 1000,
+        max_batch_size: int = 64,
+        executor=None,
+    ):
+        self._explain_fn = explain
+        self._store = store
+        self._executor = executor
+        self.queue_depth = queue_depth
+        self.max_batch_size = max_batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._deferred = metrics_registry.counter("explanations_deferred")
+        self._failed = metrics_registry.counter("explanations_failed")
+        self._queue_full = metrics_registry.counter("explanations_queue_full")
+        self._batch_size_hist = metrics_registry.histogram("explanation_batch_size", BATCH_SIZE_BUCKETS)
+        self._lag_hist = metrics_registry.histogram("explanation_lag_ms", LAG_BUCKETS_MS)
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_depth)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Deferred explanations enabled (queue_depth={self.queue_depth}, max_batch_size={self.max_batch_size})")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        while not self._queue.empty():
+            explanation_id, _, _, _ = self._queue.get_nowait()
+            self._store.fail(explanation_id, "Service shut down before the explanation was computed")
+
+    def defer(self, requests: List[CreditScoreRequest], predictions: List[CreditScoreResponse]):
+        """Queue the model-scored predictions and set their explanation_id.
+
+        Fallback predictions already carry their explanation. When the queue
+        is full the id is stored as unavailable rather than explained here.
+        """
+        for request, prediction in zip(requests, predictions):
+            if prediction.is_fallback:
+                continue
+            if not self.is_running or self._queue.full():
+                self._queue_full.inc()
+                prediction.explanation_id = self._store.create(
+                    prediction.model_version,
+                    status=ExplanationStatus.UNAVAILABLE,
+                    error="Explanation queue full; not computed",
+                )
+                continue
+            prediction.explanation_id = self._store.create(prediction.model_version)
+            self._queue.put_nowait((prediction.explanation_id, request, prediction.model_version, time.perf_counter()))
+            self._deferred.inc()
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._process(batch)
+
+    async def _process(self, batch: List[Job]):
+        self._batch_size_hist.observe(len(batch))
+        results = await self._explain([(request, model_version) for _, request, model_version, _ in batch])
+        now = time.perf_counter()
+        for (explanation_id, _, _, enqueued_at), result in zip(batch, results):
+            if isinstance(result, Exception):
+                self._failed.inc()
+                self._store.fail(explanation_id, str(result))
+            else:
+                self._store.complete(explanation_id, result.confidence, result.top_factors)
+            self._lag_hist.observe((now - enqueued_at) * 1000)
+
+    async def _explain(self, items: List[Tuple[CreditScoreRequest, str]]) -> List[Union[object, Exception]]:
+        """Explain (request, model_version) items with one call per model version, in input order.
+
+        A failed call yields its exception in place of each of its results.
+        """
+        by_version: Dict[str, List[int]] = {}
+        for i, (_, model_version) in enumerate(items):
+            by_version.setdefault(model_version, []).append(i)
+
+        results: List[Union[object, Exception]] = [None] * len(items)
+        for model_version, indices in by_version.items():
+            requests = [items[i][0] for i in indices]
+            try:
+                if self._executor is not None:
+                    explained = await self._executor.run(self._explain_fn, requests, model_version)
+                else:
+                    explained = self._explain_fn(requests, model_version)
+            except Exception as e:
+                logger.warning(f"Explaining {len(requests)} requests for model {model_version} failed: {e}")
+                explained = [e] * len(requests)
+            for i, result in zip(indices, explained):
+                results[i] = result
+        return results
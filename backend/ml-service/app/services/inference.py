@@ -1,45 +1,46 @@
 import logging
 import math
 import time
-from typing import Optional
-from app.schemas.credit import (
-    CreditScoreRequest,
-    CreditScoreResponse,
-    RiskLevel,
-    RecommendedAction,
-)
-from app.models.loader import model_loader
-from app.core.aws import get_cloudwatch_metrics
+from typing import Optional, List
+import numpy as np
+from app.schemas.credit import CreditScoreRequest, CreditScoreResponse
+from app.models.loader import ModelBundle
+from app.models.registry import model_registry
+from app.models.rules import rules_engine
+from app.services import vectorized
+from app.services.policy import decision_policy
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 
 class InferenceService:
-    def __init__(self):
-        self.model = None
-        self.scaler = None
-        
-    def predict(self, request: CreditScoreRequest) -> Optional[CreditScoreResponse]:
-        self.model = model_loader.get_model()
-        self.scaler = model_loader.get_scaler()
+    """Stateless scoring service; safe to share across executor threads.
+    
+    Each call takes the loader's current ModelBundle once (or the one it is
+    given) and reads model, scaler and version only from it, so concurrent
+    calls never see each other's state and a model reload mid-call never
+    mixes artifacts.
+    """
+    
+    def predict(self, request: CreditScoreRequest, bundle: Optional[ModelBundle] = None) -> Optional[CreditScoreResponse]:
+        bundle = bundle or model_registry.current()
+        model, scaler, compiled = bundle.model, bundle.scaler, bundle.compiled_model
         
         start_time = time.time()
         
-        if self.model is None:
-            result = self._rule_based_prediction(request)
+        if model is None:
+            result = self._rule_based_prediction(request, bundle.version)
             self._log_inference_metrics("rule_based", start_time, result is not None)
             return result
         
         try:
             features = self._extract_features(request)
             
-            if self.scaler:
-                features = self.scaler.transform([features])[0]
+            probability = self._predict_proba(model, scaler, compiled, [features])[0]
+            prediction = int(np.argmax(probability))
             
-            prediction = self.model.predict([features])[0]
-            probability = self.model.predict_proba([features])[0]
-            
-            result = self._format_prediction(prediction, probability, request)
+            result = self._format_prediction(prediction, probability, request, bundle.version)
             self._log_inference_metrics("ml_model", start_time, result is not None)
             return result
             
@@ -48,132 +49,148 @@ class InferenceService:
             self._log_inference_metrics("ml_model", start_time, False)
             return None
     
-    def _log_inference_metrics(self, model_type: str, start_time: float, success: bool):
-        """Log inference metrics to CloudWatch"""
-        try:
-            latency_ms = (time.time() - start_time) * 1000
-            metrics = get_cloudwatch_metrics()
-            metrics.log_inference_metric(model_type, latency_ms, success)
-        except Exception as e:
-            logger.warning(f"Failed to log inference metrics: {e}")
-    
-    def _rule_based_prediction(self, request: CreditScoreRequest) -> CreditScoreResponse:
-        collateral_ratio = request.collateral_value_usd / request.loan_amount if request.loan_amount > 0 else 0
-        
-        base_score = 500
-        
-        age_score = min(request.wallet_age_days / 365 * 100, 100)
-        base_score += age_score
-        
-        tx_score = min(request.total_transactions / 100 * 50, 50)
-        base_score += tx_score
+    def predict_batch(self, requests: List[CreditScoreRequest], bundle: Optional[ModelBundle] = None) -> List[Optional[CreditScoreResponse]]:
+        """Score many requests with one scaler.transform and one predict_proba call.
         
-        defi_score = min(request.defi_interactions / 20 * 50, 50)
-        base_score += defi_score
+        Returns one entry per request, in order. An entry is None when that
+        request could not be scored, so callers can fall back per request.
+        """
+        bundle = bundle or model_registry.current()
+        model, scaler, compiled = bundle.model, bundle.scaler, bundle.compiled_model
         
-        reputation_bonus = (request.reputation_score - 50) * 2
-        base_score += reputation_bonus
+        start_time = time.time()
         
-        if request.previous_loans > 0:
-            success_rate = request.successful_repayments / request.previous_loans
-            base_score += success_rate * 100
+        if model is None:
+            results = self._rule_based_prediction_batch(requests, bundle.version)
+            self._log_inference_metrics("rule_based_batch", start_time, all(r is not None for r in results))
+            return results
         
-        base_score -= request.defaults * 100
+        try:
+            features = self._extract_feature_matrix(requests)
+            
+            probabilities = self._predict_proba(model, scaler, compiled, features)
+        except Exception as e:
+            logger.error(f"Batch ML prediction failed: {e}")
+            self._log_inference_metrics("ml_model_batch", start_time, False)
+            return [None] * len(requests)
         
-        if collateral_ratio >= 1.5:
-            base_score += 100
-        elif collateral_ratio >= 1.0:
-            base_score += 50
+        try:
+            results = self._format_prediction_batch(probabilities, requests, bundle.version)
+        except Exception as e:
+            logger.error(f"Vectorized formatting failed, formatting predictions one by one: {e}")
+            results = []
+            for request, probability in zip(requests, probabilities):
+                try:
+                    prediction = int(np.argmax(probability))
+                    results.append(self._format_prediction(prediction, probability, request, bundle.version))
+                except Exception as e:
+                    logger.error(f"Formatting prediction failed for {request.wallet_address}: {e}")
+                    results.append(None)
+        
+        self._log_inference_metrics("ml_model_batch", start_time, all(r is not None for r in results))
+        return results
+    
+    def predict_columns(self, cols: vectorized.Columns, bundle: Optional[ModelBundle] = None) -> Optional[vectorized.Columns]:
+        """Score request columns (see vectorized.request_columns) into result columns.
         
-        credit_score = max(100, min(1000, int(base_score)))
+        Used for columnar bulk input, which never builds request objects.
+        Returns None when the model fails, so the caller can fall back.
+        """
+        bundle = bundle or model_registry.current()
+        model, scaler, compiled = bundle.model, bundle.scaler, bundle.compiled_model
         
-        fraud_score = self._calculate_fraud_score(request)
-        anomaly_score = self._calculate_anomaly_score(request)
-        
-        if credit_score >= 800:
-            risk_level = RiskLevel.VERY_LOW
-            default_prob = 0.02
-        elif credit_score >= 700:
-            risk_level = RiskLevel.LOW
-            default_prob = 0.05
-        elif credit_score >= 600:
-            risk_level = RiskLevel.MEDIUM
-            default_prob = 0.10
-        elif credit_score >= 500:
-            risk_level = RiskLevel.HIGH
-            default_prob = 0.20
-        else:
-            risk_level = RiskLevel.VERY_HIGH
-            default_prob = 0.35
+        start_time = time.time()
         
-        if fraud_score > 0.7 or request.defaults > 0:
-            recommended_action = RecommendedAction.REJECT
-        elif fraud_score > 0.5 or anomaly_score > 0.5:
-            recommended_action = RecommendedAction.MANUAL_REVIEW
-        elif risk_level in [RiskLevel.HIGH, RiskLevel.VERY_HIGH]:
-            recommended_action = RecommendedAction.APPROVE_WITH_CONDITIONS
-        elif risk_level == RiskLevel.MEDIUM:
-            recommended_action = RecommendedAction.APPROVE_WITH_CONDITIONS
-        else:
-            recommended_action = RecommendedAction.APPROVE
+        if model is None:
+            scores = vectorized.rule_based_scores(cols)
+            self._log_inference_metrics("rule_based_columns", start_time, True)
+            return scores
         
-        base_rate = 5.0
-        risk_premium = {
-            RiskLevel.VERY_LOW: 0,
-            RiskLevel.LOW: 2,
-            RiskLevel.MEDIUM: 5,
-            RiskLevel.HIGH: 10,
-            RiskLevel.VERY_HIGH: 15,
-        }
-        interest_rate = base_rate + risk_premium[risk_level]
+        try:
+            probabilities = self._predict_proba(model, scaler, compiled, vectorized.feature_matrix(cols))
+            scores = vectorized.model_scores(self._default_probabilities(probabilities), cols)
+        except Exception as e:
+            logger.error(f"Columnar ML prediction failed: {e}")
+            self._log_inference_metrics("ml_model_columns", start_time, False)
+            return None
         
-        max_loan = request.collateral_value_usd * 0.8
-        if risk_level in [RiskLevel.HIGH, RiskLevel.VERY_HIGH]:
-            max_loan *= 0.5
-        elif risk_level == RiskLevel.MEDIUM:
-            max_loan *= 0.75
+        self._log_inference_metrics("ml_model_columns", start_time, True)
+        return scores
+    
+    def _predict_proba(self, model, scaler, compiled, features) -> np.ndarray:
+        """Use the compiled tree evaluator for small inputs, the native model otherwise.
+        
+        `features` are raw; the scaler is applied here unless the compiled
+        ensemble has it fused into its thresholds.
+        """
+        if compiled is not None and len(features) <= settings.COMPILED_ENGINE_MAX_ROWS:
+            if scaler and not compiled.fused_scaler:
+                features = scaler.transform(features)
+            return compiled.predict_proba(features)
+        
+        if scaler:
+            features = scaler.transform(features)
+        return np.asarray(model.predict_proba(features))
+    
+    def _log_inference_metrics(self, model_type: str, start_time: float, success: bool):
+        """Log inference metrics to CloudWatch"""
+        if not settings.cloudwatch_metrics_enabled:
+            return
+        try:
+            from app.core.aws import get_cloudwatch_metrics
+            latency_ms = (time.time() - start_time) * 1000
+            metrics = get_cloudwatch_metrics()
+            metrics.log_inference_metric(model_type, latency_ms, success)
+        except Exception as e:
+            logger.warning(f"Failed to log inference metrics: {e}")
+    
+    def _rule_based_prediction(self, request: CreditScoreRequest, model_version: Optional[str] = None) -> CreditScoreResponse:
+        rules = rules_engine.current()
+        credit_score = rules.score("rule_based_credit_score", request)
+        fraud_score = rules.score("fraud_score", request)
+        anomaly_score = rules.score("anomaly_score", request)
+        
+        decision = decision_policy.rule_based.decide(
+            credit_score, request.collateral_value_usd, fraud_score, anomaly_score, request.defaults,
+        )
         
         return CreditScoreResponse(
             credit_score=credit_score,
             fraud_score=fraud_score,
             anomaly_score=anomaly_score,
-            risk_level=risk_level,
-            default_probability=default_prob,
-            recommended_action=recommended_action,
-            interest_rate_suggestion=interest_rate,
-            max_loan_amount=max_loan,
-            model_version=model_loader.model_version,
+            risk_level=decision.risk_level,
+            default_probability=decision.default_probability,
+            recommended_action=decision.recommended_action,
+            interest_rate_suggestion=decision.interest_rate_suggestion,
+            max_loan_amount=decision.max_loan_amount,
+            model_version=model_version or model_registry.model_version,
+            policy_version=decision_policy.version,
             is_fallback=False,
         )
     
+    def _rule_based_prediction_batch(self, requests: List[CreditScoreRequest], model_version: Optional[str] = None) -> List[Optional[CreditScoreResponse]]:
+        """Array version of _rule_based_prediction (see app/services/vectorized.py)."""
+        model_version = model_version or model_registry.model_version
+        try:
+            scores = vectorized.rule_based_scores(vectorized.request_columns(requests))
+            return vectorized.to_responses(scores, model_version, is_fallback=False)
+        except Exception as e:
+            logger.error(f"Vectorized rule-based prediction failed, scoring requests one by one: {e}")
+        
+        results = []
+        for request in requests:
+            try:
+                results.append(self._rule_based_prediction(request, model_version))
+            except Exception as e:
+                logger.error(f"Rule-based prediction failed for {request.wallet_address}: {e}")
+                results.append(None)
+        return results
+    
     def _calculate_fraud_score(self, request: CreditScoreRequest) -> float:
-        score = 0.0
-        
-        if request.wallet_age_days < 7:
-            score += 0.4
-        elif request.wallet_age_days < 30:
-            score += 0.2
-        
-        if request.total_transactions < 5:
-            score += 0.3
-        
-        if request.defaults > 0:
-            score += min(request.defaults * 0.2, 0.4)
-        
-        return min(score, 1.0)
+        return rules_engine.current().score("fraud_score", request)
     
     def _calculate_anomaly_score(self, request: CreditScoreRequest) -> float:
-        score = 0.0
-        
-        if request.total_transactions > 0:
-            avg_tx_value = request.total_volume_usd / request.total_transactions
-            if request.loan_amount > avg_tx_value * 10:
-                score += 0.3
-        
-        if request.collateral_value_usd < request.loan_amount:
-            score += 0.4
-        
-        return min(score, 1.0)
+        return rules_engine.current().score("anomaly_score", request)
     
     def _extract_features(self, request: CreditScoreRequest) -> list:
         collateral_ratio = request.collateral_value_usd / request.loan_amount if request.loan_amount > 0 else 0
@@ -193,7 +210,21 @@ class InferenceService:
             collateral_ratio,
         ]
     
-    def _format_prediction(self, prediction, probability, request: CreditScoreRequest) -> CreditScoreResponse:
+    def _extract_feature_matrix(self, requests: List[CreditScoreRequest]) -> np.ndarray:
+        """Build an (n_requests, n_features) matrix in _extract_features order."""
+        return np.array([self._extract_features(request) for request in requests], dtype=np.float64)
+    
+    def _default_probabilities(self, probabilities: np.ndarray) -> np.ndarray:
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        return probabilities[:, 1] if probabilities.shape[1] > 1 else probabilities[:, 0]
+    
+    def _format_prediction_batch(self, probabilities: np.ndarray, requests: List[CreditScoreRequest], model_version: Optional[str] = None) -> List[CreditScoreResponse]:
+        """Array version of _format_prediction (see app/services/vectorized.py)."""
+        default_probability = self._default_probabilities(probabilities)
+        scores = vectorized.model_scores(default_probability, vectorized.request_columns(requests))
+        return vectorized.to_responses(scores, model_version or model_registry.model_version, is_fallback=False)
+    
+    def _format_prediction(self, prediction, probability, request: CreditScoreRequest, model_version: Optional[str] = None) -> CreditScoreResponse:
         """Format ML model prediction into CreditScoreResponse."""
 
         default_probability = float(probability[1]) if len(probability) > 1 else float(probability[0])
@@ -201,59 +232,24 @@ class InferenceService:
 
         credit_score = int((1 - default_probability) * 900 + 100)
         
-
-        if default_probability < 0.10:
-            risk_level = RiskLevel.VERY_LOW
-        elif default_probability < 0.25:
-            risk_level = RiskLevel.LOW
-        elif default_probability < 0.50:
-            risk_level = RiskLevel.MEDIUM
-        elif default_probability < 0.75:
-            risk_level = RiskLevel.HIGH
-        else:
-            risk_level = RiskLevel.VERY_HIGH
-        
-
         fraud_score = self._calculate_fraud_score(request)
         anomaly_score = self._calculate_anomaly_score(request)
         
-
-        if fraud_score > 0.7 or default_probability > 0.75:
-            recommended_action = RecommendedAction.REJECT
-        elif fraud_score > 0.5 or anomaly_score > 0.5 or risk_level in [RiskLevel.HIGH, RiskLevel.VERY_HIGH]:
-            recommended_action = RecommendedAction.MANUAL_REVIEW
-        elif risk_level == RiskLevel.MEDIUM:
-            recommended_action = RecommendedAction.APPROVE_WITH_CONDITIONS
-        else:
-            recommended_action = RecommendedAction.APPROVE
-        
-
-        base_rate = 5.0
-        risk_premium = {
-            RiskLevel.VERY_LOW: 0,
-            RiskLevel.LOW: 2,
-            RiskLevel.MEDIUM: 5,
-            RiskLevel.HIGH: 10,
-            RiskLevel.VERY_HIGH: 15,
-        }
-        interest_rate = base_rate + risk_premium[risk_level]
-        
-
-        max_loan = request.collateral_value_usd * 0.8
-        if risk_level in [RiskLevel.HIGH, RiskLevel.VERY_HIGH]:
-            max_loan *= 0.5
-        elif risk_level == RiskLevel.MEDIUM:
-            max_loan *= 0.75
+        decision = decision_policy.model.decide(
+            default_probability, request.collateral_value_usd, fraud_score, anomaly_score, request.defaults,
+            default_probability=default_probability,
+        )
         
         return CreditScoreResponse(
             credit_score=credit_score,
             fraud_score=fraud_score,
             anomaly_score=anomaly_score,
-            risk_level=risk_level,
-            default_probability=default_probability,
-            recommended_action=recommended_action,
-            interest_rate_suggestion=interest_rate,
-            max_loan_amount=max_loan,
-            model_version=model_loader.model_version,
+            risk_level=decision.risk_level,
+            default_probability=decision.default_probability,
+            recommended_action=decision.recommended_action,
+            interest_rate_suggestion=decision.interest_rate_suggestion,
+            max_loan_amount=decision.max_loan_amount,
+            model_version=model_version or model_registry.model_version,
+            policy_version=decision_policy.version,
             is_fallback=False,
         )
@@ -0,0 +1,175 @@
+"""Synchronous scoring pipeline (predict -> fallback -> explain).
+
+These are plain module-level functions so they can be handed to the
+inference executor, including a process pool.
+"""
+
+import logging
+from typing import Optional, List, Tuple
+from app.schemas.credit import CreditScoreRequest, CreditScoreResponse
+from app.services.inference import InferenceService
+from app.services.explainability import ExplainabilityService, ExplanationResult
+from app.services.fallback import FallbackService, FALLBACK_MODEL_VERSION
+from app.services import vectorized
+from app.models.loader import ModelBundle
+from app.models.registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+inference_service = InferenceService()
+explainability_service = ExplainabilityService()
+fallback_service = FallbackService()
+
+
+def ensure_models_loaded() -> List[str]:
+    """Load every registered model; returns the loaded versions, live first."""
+    model_registry.ensure_loaded()
+    return model_registry.versions()
+
+
+def load_and_warm() -> List[str]:
+    """Load the models and run warm-up predictions; returns the loaded versions.
+
+    A failed warm-up is logged, not raised: the model is still usable.
+    """
+    versions = ensure_models_loaded()
+    try:
+        warm_up()
+    except Exception as e:
+        logger.error(f"Warm-up predictions failed: {e}")
+    return versions
+
+
+def fallback_score(request: CreditScoreRequest) -> CreditScoreResponse:
+    prediction = fallback_service.calculate_score(request)
+    prediction.is_fallback = True
+    return prediction
+
+
+def fallback_batch(requests: List[CreditScoreRequest]) -> List[CreditScoreResponse]:
+    return fallback_service.calculate_scores(requests)
+
+
+def fallback_columns(cols: vectorized.Columns) -> Tuple[vectorized.Columns, str, bool]:
+    """Same shape as score_columns, from the fallback rules."""
+    return vectorized.fallback_scores(cols), FALLBACK_MODEL_VERSION, True
+
+
+def complete_prediction(
+    request: CreditScoreRequest,
+    prediction: Optional[CreditScoreResponse],
+    bundle: Optional[ModelBundle] = None,
+    explain: bool = True,
+) -> CreditScoreResponse:
+    """Apply fallback when the model produced nothing, then attach explanations.
+
+    `bundle` is the model bundle the prediction came from, so the explanation
+    matches it even if a reload happened in between. With `explain` False
+    the caller explains it later (see app/services/explanations.py).
+    """
+    if prediction is None:
+        logger.warning("ML model prediction failed, using fallback")
+        prediction = fallback_score(request)
+
+    if explain:
+        attach_explanations([request], [prediction], bundle)
+    return prediction
+
+
+def attach_explanations(
+    requests: List[CreditScoreRequest],
+    predictions: List[CreditScoreResponse],
+    bundle: Optional[ModelBundle] = None,
+):
+    """Explain the model-scored predictions in one batch and set their factors and confidence."""
+    if not explainability_service.is_enabled:
+        return
+    explained = [i for i, prediction in enumerate(predictions) if not prediction.is_fallback]
+    if not explained:
+        return
+    try:
+        explanations = explainability_service.explain_batch([requests[i] for i in explained], bundle)
+    except Exception as e:
+        logger.warning(f"SHAP explanation failed: {e}")
+        return
+    for i, explanation in zip(explained, explanations):
+        predictions[i].top_factors = explanation.top_factors
+        predictions[i].confidence_score = explanation.confidence
+
+
+def explain_requests(requests: List[CreditScoreRequest], model_version: str) -> List[ExplanationResult]:
+    """Explanations for requests scored by `model_version`.
+
+    Raises UnknownModelVersion once that version is no longer loaded.
+    """
+    return explainability_service.explain_batch(requests, model_registry.get(model_version))
+
+
+def score_request(
+    request: CreditScoreRequest,
+    model_version: Optional[str] = None,
+    explain: bool = True,
+) -> CreditScoreResponse:
+    """Score one request on the live model, or on `model_version` when pinned."""
+    bundle = model_registry.get(model_version)
+    return complete_prediction(request, inference_service.predict(request, bundle), bundle, explain)
+
+
+def predict_batch(requests: List[CreditScoreRequest]) -> List[Optional[CreditScoreResponse]]:
+    return inference_service.predict_batch(requests)
+
+
+def score_batch(
+    requests: List[CreditScoreRequest],
+    model_version: Optional[str] = None,
+    explain: bool = True,
+) -> List[CreditScoreResponse]:
+    """Vectorized scoring with per-request fallback and explanations.
+
+    Results carry the same fields /ml/credit-score returns for each request;
+    with `explain` False, no model explanations.
+    """
+    bundle = model_registry.get(model_version)
+    try:
+        predictions = inference_service.predict_batch(requests, bundle)
+    except Exception as e:
+        logger.error(f"Batch credit score prediction error: {e}")
+        predictions = [None] * len(requests)
+
+    failed = [i for i, prediction in enumerate(predictions) if prediction is None]
+    if failed:
+        logger.warning(f"ML model prediction failed for {len(failed)} of {len(requests)} requests, using fallback")
+        for i, prediction in zip(failed, fallback_service.calculate_scores([requests[i] for i in failed])):
+            predictions[i] = prediction
+
+    if explain:
+        attach_explanations(requests, predictions, bundle)
+    return predictions
+
+
+def score_columns(
+    cols: vectorized.Columns,
+    model_version: Optional[str] = None,
+) -> Tuple[vectorized.Columns, str, bool]:
+    """Columnar scoring for bulk callers: (result columns, model_version, is_fallback).
+
+    The whole batch falls back together when the model fails. Results carry
+    no explanations.
+    """
+    bundle = model_registry.get(model_version)
+    scores = inference_service.predict_columns(cols, bundle)
+    if scores is not None:
+        return scores, bundle.version, False
+
+    logger.warning(f"ML model prediction failed for {len(cols['loan_amount'])} columnar requests, using fallback")
+    return fallback_columns(cols)
+
+
+def warm_up():
+    """Run the example request through every path so first-request costs
+    (lazy imports, allocator growth, first-call dispatch) are paid up front."""
+    example = CreditScoreRequest(**CreditScoreRequest.model_config["json_schema_extra"]["example"])
+    score_request(example)
+    score_batch([example, example])
+    score_columns(vectorized.request_columns([example, example]))
+    fallback_score(example)
@@ -0,0 +1,238 @@
+"""Decision policy: risk band, recommended action, interest rate and max loan.
+
+Model predictions, rule-based predictions and the fallback service each map
+a score to a decision with their own thresholds. All three live in
+POLICY_SPEC and are compiled once into sorted boundary arrays and per-band
+lookup tables:
+
+- batches use np.searchsorted over the boundaries and table indexing
+- single requests use bisect and per-band tuples built at import
+
+The arithmetic matches the original per-request branches exactly (max loan
+is collateral * base factor, then * band factor). POLICY_SPEC["version"] is
+reported on every response as `policy_version`; bump it with any change.
+"""
+
+import bisect
+import operator
+from typing import Any, Dict, List, NamedTuple, Optional
+import numpy as np
+from app.schemas.credit import RiskLevel, RecommendedAction
+
+POLICY_SPEC: Dict[str, Any] = {
+    "version": "policy-v1",
+    "policies": {
+        # InferenceService._format_prediction: bands on the model's default probability
+        "model": {
+            "band_input": "default_probability",
+            "bins": [0.10, 0.25, 0.50, 0.75],
+            "bands": ["VERY_LOW", "LOW", "MEDIUM", "HIGH", "VERY_HIGH"],
+            "interest_rate": {"VERY_LOW": 5.0, "LOW": 7.0, "MEDIUM": 10.0, "HIGH": 15.0, "VERY_HIGH": 20.0},
+            "max_loan_collateral_factor": 0.8,
+            "max_loan_band_factor": {"VERY_LOW": 1.0, "LOW": 1.0, "MEDIUM": 0.75, "HIGH": 0.5, "VERY_HIGH": 0.5},
+            "overrides": [
+                {"action": "REJECT", "any": [["fraud_score", ">", 0.7], ["default_probability", ">", 0.75]]},
+                {"action": "MANUAL_REVIEW", "any": [["fraud_score", ">", 0.5], ["anomaly_score", ">", 0.5]]},
+            ],
+            "band_action": {
+                "VERY_LOW": "APPROVE",
+                "LOW": "APPROVE",
+                "MEDIUM": "APPROVE_WITH_CONDITIONS",
+                "HIGH": "MANUAL_REVIEW",
+                "VERY_HIGH": "MANUAL_REVIEW",
+            },
+        },
+        # InferenceService._rule_based_prediction: bands on the heuristic credit score
+        "rule_based": {
+            "band_input": "credit_score",
+            "bins": [500, 600, 700, 800],
+            "bands": ["VERY_HIGH", "HIGH", "MEDIUM", "LOW", "VERY_LOW"],
+            "default_probability": {"VERY_LOW": 0.02, "LOW": 0.05, "MEDIUM": 0.10, "HIGH": 0.20, "VERY_HIGH": 0.35},
+            "interest_rate": {"VERY_LOW": 5.0, "LOW": 7.0, "MEDIUM": 10.0, "HIGH": 15.0, "VERY_HIGH": 20.0},
+            "max_loan_collateral_factor": 0.8,
+            "max_loan_band_factor": {"VERY_LOW": 1.0, "LOW": 1.0, "MEDIUM": 0.75, "HIGH": 0.5, "VERY_HIGH": 0.5},
+            "overrides": [
+                {"action": "REJECT", "any": [["fraud_score", ">", 0.7], ["defaults", ">", 0]]},
+                {"action": "MANUAL_REVIEW", "any": [["fraud_score", ">", 0.5], ["anomaly_score", ">", 0.5]]},
+            ],
+            "band_action": {
+                "VERY_LOW": "APPROVE",
+                "LOW": "APPROVE",
+                "MEDIUM": "APPROVE_WITH_CONDITIONS",
+                "HIGH": "APPROVE_WITH_CONDITIONS",
+                "VERY_HIGH": "APPROVE_WITH_CONDITIONS",
+            },
+        },
+        # FallbackService: bands on the fallback credit score
+        "fallback": {
+            "band_input": "credit_score",
+            "bins": [500, 600, 700, 800],
+            "bands": ["VERY_HIGH", "HIGH", "MEDIUM", "LOW", "VERY_LOW"],
+            "default_probability": {"VERY_LOW": 0.02, "LOW": 0.05, "MEDIUM": 0.12, "HIGH": 0.22, "VERY_HIGH": 0.40},
+            "interest_rate": {"VERY_LOW": 5.0, "LOW": 7.5, "MEDIUM": 10.0, "HIGH": 15.0, "VERY_HIGH": 20.0},
+            "max_loan_collateral_factor": 0.75,
+            "max_loan_band_factor": {"VERY_LOW": 1.0, "LOW": 1.0, "MEDIUM": 0.75, "HIGH": 0.5, "VERY_HIGH": 0.25},
+            "overrides": [
+                {"action": "REJECT", "any": [["fraud_score", ">", 0.7], ["defaults", ">=", 2]]},
+                {"action": "MANUAL_REVIEW", "any": [["fraud_score", ">", 0.4]]},
+            ],
+            "band_action": {
+                "VERY_LOW": "APPROVE",
+                "LOW": "APPROVE",
+                "MEDIUM": "APPROVE_WITH_CONDITIONS",
+                "HIGH": "APPROVE_WITH_CONDITIONS",
+                "VERY_HIGH": "MANUAL_REVIEW",
+            },
+        },
+    },
+}
+
+_OPS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+}
+
+# Code order for the arrays returned by decide_batch
+RISK_LEVELS = np.array(list(RiskLevel), dtype=object)
+ACTIONS = np.array(list(RecommendedAction), dtype=object)
+
+
+class Decision(NamedTuple):
+    risk_level: RiskLevel
+    default_probability: float
+    recommended_action: RecommendedAction
+    interest_rate_suggestion: float
+    max_loan_amount: float
+
+
+class PolicyTable:
+    """One compiled policy: band boundaries plus per-band lookup tables."""
+
+    def __init__(self, name: str, spec: Dict[str, Any]):
+        self.name = name
+        self.band_input = spec["band_input"]
+        bands = [RiskLevel[band] for band in spec["bands"]]
+        if list(spec["bins"]) != sorted(spec["bins"]) or len(bands) != len(spec["bins"]) + 1:
+            raise ValueError(f"Policy {name}: bins must ascend and have one fewer entry than bands")
+
+        self.bins = np.asarray(spec["bins"], dtype=np.float64)
+        self._bins = list(spec["bins"])
+        self.collateral_factor = spec["max_loan_collateral_factor"]
+        self.overrides = [
+            (RecommendedAction[rule["action"]], [(field, _OPS[op], value) for field, op, value in rule["any"]])
+            for rule in spec["overrides"]
+        ]
+
+        # Per-interval tables, indexed by searchsorted position
+        self.risk_codes = np.array([list(RiskLevel).index(band) for band in bands])
+        probability = spec.get("default_probability")
+        self.default_probability = (
+            np.array([probability[band.value] for band in bands]) if probability is not None else None
+        )
+        self.interest_rate = np.array([spec["interest_rate"][band.value] for band in bands])
+        self.band_factor = np.array([spec["max_loan_band_factor"][band.value] for band in bands])
+        self.action_codes = np.array(
+            [list(RecommendedAction).index(RecommendedAction[spec["band_action"][band.value]]) for band in bands]
+        )
+
+        # Precomputed per-interval rows for the single-request path
+        self._rows = [
+            (
+                band,
+                float(self.default_probability[i]) if self.default_probability is not None else None,
+                RecommendedAction[spec["band_action"][band.value]],
+                float(self.interest_rate[i]),
+                float(self.band_factor[i]),
+            )
+            for i, band in enumerate(bands)
+        ]
+
+    def decide(
+        self,
+        value: float,
+        collateral_value_usd: float,
+        fraud_score: float,
+        anomaly_score: float,
+        defaults: int,
+        default_probability: Optional[float] = None,
+    ) -> Decision:
+        risk_level, band_probability, action, interest_rate, band_factor = self._rows[bisect.bisect_right(self._bins, value)]
+        if default_probability is None:
+            default_probability = band_probability
+
+        fields = {
+            "fraud_score": fraud_score,
+            "anomaly_score": anomaly_score,
+            "defaults": defaults,
+            "default_probability": default_probability,
+        }
+        for override, conditions in self.overrides:
+            if any(op(fields[field], threshold) for field, op, threshold in conditions):
+                action = override
+                break
+
+        max_loan = collateral_value_usd * self.collateral_factor
+        max_loan *= band_factor
+        return Decision(risk_level, default_probability, action, interest_rate, max_loan)
+
+    def decide_batch(
+        self,
+        values: np.ndarray,
+        collateral_value_usd: np.ndarray,
+        fraud_score: np.ndarray,
+        anomaly_score: np.ndarray,
+        defaults: np.ndarray,
+        default_probability: Optional[np.ndarray] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Columns named after CreditScoreResponse fields; risk_level and
+        recommended_action are codes into RISK_LEVELS and ACTIONS."""
+        idx = np.searchsorted(self.bins, values, side="right")
+        if default_probability is None:
+            default_probability = self.default_probability[idx]
+
+        fields = {
+            "fraud_score": fraud_score,
+            "anomaly_score": anomaly_score,
+            "defaults": defaults,
+            "default_probability": default_probability,
+        }
+        conditions = []
+        choices = []
+        for override, rule in self.overrides:
+            hit = np.zeros(len(idx), dtype=bool)
+            for field, op, threshold in rule:
+                hit |= op(fields[field], threshold)
+            conditions.append(hit)
+            choices.append(list(RecommendedAction).index(override))
+        action = np.select(conditions, choices, self.action_codes[idx])
+
+        return {
+            "risk_level": self.risk_codes[idx],
+            "default_probability": default_probability,
+            "recommended_action": action,
+            "interest_rate_suggestion": self.interest_rate[idx],
+            "max_loan_amount": collateral_value_usd * self.collateral_factor * self.band_factor[idx],
+        }
+
+
+class DecisionPolicy:
+    def __init__(self, spec: Dict[str, Any]):
+        self.version: str = spec["version"]
+        self._tables = {name: PolicyTable(name, table) for name, table in spec["policies"].items()}
+        self.model = self._tables["model"]
+        self.rule_based = self._tables["rule_based"]
+        self.fallback = self._tables["fallback"]
+
+
+def risk_levels(codes: np.ndarray) -> List[RiskLevel]:
+    return RISK_LEVELS[codes].tolist()
+
+
+def actions(codes: np.ndarray) -> List[RecommendedAction]:
+    return ACTIONS[codes].tolist()
+
+
+decision_policy = DecisionPolicy(POLICY_SPEC)
@@ -0,0 +1,209 @@
+"""Shadow scoring: a challenger model scores a sample of live traffic off the request path.
+
+The request handler only does a random draw and a non-blocking put onto a
+bounded queue. A background thread loads the challenger, drains the queue
+in batches, scores each batch with one vectorized call and appends one JSON
+line per request to SHADOW_LOG_PATH:
+
+    {"ts": ..., "wallet_address": ..., "primary_version": ..., "challenger_version": ...,
+     "primary_probability": ..., "challenger_probability": ..., "probability_delta": ...,
+     "primary_risk_level": ..., "challenger_risk_level": ..., "primary_action": ...,
+     "challenger_action": ..., "agree": ..., "primary_latency_ms": ..., "challenger_latency_ms": ...}
+
+`agree` means the same risk level and recommended action. Under load the
+challenger gives way: when the queue is full new samples are dropped,
+and samples that waited longer than SHADOW_MAX_LAG_MS are skipped.
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import List, Optional, Tuple
+from app.core.config import settings
+from app.models.loader import ModelLoader, DEFAULT_MODEL_DIR
+from app.schemas.credit import CreditScoreRequest, CreditScoreResponse
+from app.services import policy, vectorized
+from app.services.inference import InferenceService
+from app.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+DELTA_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+
+# (enqueued_at, request, primary prediction)
+Sample = Tuple[float, CreditScoreRequest, CreditScoreResponse]
+
+
+class ShadowScorer:
+    def __init__(
+        self,
+        loader: ModelLoader,
+        sample_rate: float = 0.1,
+        queue_depth: int = 1000,
+        max_batch_size: int = 64,
+        max_lag_ms: float = 1000.0,
+        log_path: str = "shadow_comparisons.jsonl",
+    ):
+        self._loader = loader
+        self._scorer = InferenceService()
+        self.sample_rate = sample_rate
+        self.max_batch_size = max_batch_size
+        self.max_lag_ms = max_lag_ms
+        self.log_path = log_path
+        self._queue: "queue.Queue[Optional[Sample]]" = queue.Queue(maxsize=queue_depth)
+        self._thread: Optional[threading.Thread] = None
+        self._scored = metrics_registry.counter("shadow_scored")
+        self._agreed = metrics_registry.counter("shadow_agree")
+        self._dropped_full = metrics_registry.counter("shadow_dropped_queue_full")
+        self._dropped_stale = metrics_registry.counter("shadow_dropped_stale")
+        self._failed = metrics_registry.counter("shadow_failed")
+        self._delta_hist = metrics_registry.histogram("shadow_abs_probability_delta", DELTA_BUCKETS)
+        self._latency_hist = metrics_registry.histogram("shadow_challenger_latency_ms", LATENCY_BUCKETS_MS)
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running:
+            return
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+        logger.info(f"Shadow scoring enabled (sample_rate={self.sample_rate}, log={self.log_path})")
+
+    def stop(self, timeout: float = 5.0):
+        if not self.is_running:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, request: CreditScoreRequest, prediction: CreditScoreResponse):
+        """Offer a scored request to the challenger; never blocks."""
+        if not self.is_running or random.random() >= self.sample_rate:
+            return
+        try:
+            self._queue.put_nowait((time.monotonic(), request, prediction))
+        except queue.Full:
+            self._dropped_full.inc()
+
+    def submit_many(self, requests: List[CreditScoreRequest], predictions: List[CreditScoreResponse]):
+        for request, prediction in zip(requests, predictions):
+            self.submit(request, prediction)
+
+    def _run(self):
+        self._loader.ensure_loaded()
+        logger.info(f"Shadow challenger loaded: {self._loader.model_version}")
+        log_dir = os.path.dirname(self.log_path)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+
+        with open(self.log_path, "a", buffering=1) as log:
+            while True:
+                batch, stopping = self._next_batch()
+                if batch:
+                    try:
+                        log.write(self._compare(batch))
+                    except Exception as e:
+                        self._failed.inc(len(batch))
+                        logger.warning(f"Shadow scoring failed for {len(batch)} requests: {e}")
+                if stopping:
+                    return
+
+    def _next_batch(self) -> Tuple[List[Sample], bool]:
+        """Block for one sample, then take whatever else is queued, up to max_batch_size."""
+        items = [self._queue.get()]
+        while len(items) < self.max_batch_size:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        stopping = None in items
+        cutoff = time.monotonic() - self.max_lag_ms / 1000
+        batch = [item for item in items if item is not None and item[0] >= cutoff]
+        stale = len(items) - len(batch) - int(stopping)
+        if stale:
+            self._dropped_stale.inc(stale)
+        return batch, stopping
+
+    def _compare(self, batch: List[Sample]) -> str:
+        requests = [request for _, request, _ in batch]
+        cols = vectorized.request_columns(requests)
+
+        start = time.perf_counter()
+        bundle = self._loader.current()
+        if bundle.model is None:
+            scores = vectorized.rule_based_scores(cols)
+        else:
+            probabilities = self._scorer._predict_proba(
+                bundle.model, bundle.scaler, bundle.compiled_model, vectorized.feature_matrix(cols),
+            )
+            scores = vectorized.model_scores(self._scorer._default_probabilities(probabilities), cols)
+        latency_ms = (time.perf_counter() - start) * 1000 / len(batch)
+
+        challenger_version = bundle.version
+        risk_levels = policy.risk_levels(scores["risk_level"])
+        actions = policy.actions(scores["recommended_action"])
+        now = time.time()
+        lines = []
+        for i, (_, request, primary) in enumerate(batch):
+            challenger_probability = float(scores["default_probability"][i])
+            delta = challenger_probability - primary.default_probability
+            agree = risk_levels[i] == primary.risk_level and actions[i] == primary.recommended_action
+            lines.append(json.dumps({
+                "ts": round(now, 3),
+                "wallet_address": request.wallet_address,
+                "primary_version": primary.model_version,
+                "challenger_version": challenger_version,
+                "primary_probability": primary.default_probability,
+                "challenger_probability": challenger_probability,
+                "probability_delta": delta,
+                "primary_risk_level": primary.risk_level.value,
+                "challenger_risk_level": risk_levels[i].value,
+                "primary_action": primary.recommended_action.value,
+                "challenger_action": actions[i].value,
+                "agree": agree,
+                "primary_latency_ms": primary.processing_time_ms,
+                "challenger_latency_ms": round(latency_ms, 3),
+            }, separators=(",", ":")))
+            self._delta_hist.observe(abs(delta))
+            if agree:
+                self._agreed.inc()
+
+        self._latency_hist.observe(latency_ms)
+        self._scored.inc(len(batch))
+        return "\n".join(lines) + "\n"
+
+
+def shadow_configured() -> bool:
+    """A challenger needs its own model; never fall back to the primary's settings."""
+    return bool(settings.SHADOW_LOCAL_MODEL_PATH or settings.SHADOW_S3_KEY)
+
+
+def create_shadow_scorer() -> ShadowScorer:
+    return ShadowScorer(
+        ModelLoader(
+            source="s3" if settings.SHADOW_S3_KEY else "local",
+            local_path=settings.SHADOW_LOCAL_MODEL_PATH,
+            s3_key=settings.SHADOW_S3_KEY,
+            model_dir=os.path.join(DEFAULT_MODEL_DIR, "challenger"),
+        ),
+        sample_rate=settings.SHADOW_SAMPLE_RATE,
+        queue_depth=settings.SHADOW_QUEUE_DEPTH,
+        max_batch_size=settings.SHADOW_MAX_BATCH_SIZE,
+        max_lag_ms=settings.SHADOW_MAX_LAG_MS,
+        log_path=settings.SHADOW_LOG_PATH,
+    )
+
+
+shadow_scorer = create_shadow_scorer()
@@ -0,0 +1,46 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from app.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work; callers arriving while it is
+    in flight await the same result instead of repeating it. Nothing is kept
+    once the work finishes, so there is no staleness. The work runs as its
+    own task, so a leader whose client disconnects does not cancel it for
+    the callers still waiting.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._executions = metrics_registry.counter(f"{name}_executions")
+        self._duplicates = metrics_registry.counter(f"{name}_duplicates")
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return (result, shared); shared is True when another caller did the work."""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self._duplicates.inc()
+        else:
+            self._executions.inc()
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._finish(key, t))
+
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every waiter went away
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Single-flight call failed for {key[:12]}: {task.exception()}")
@@ -0,0 +1,142 @@
+"""Array implementations of the rule-based and fallback scorers.
+
+Each function takes request fields as columns (one NumPy array per
+CreditScoreRequest field, see request_columns) and returns result columns
+named after CreditScoreResponse fields. Scores come from the compiled
+scoring rules (app/models/rules.py) and decisions from the shared decision
+policy (app/services/policy.py), the same sources the single-request paths
+use, so both give bit-for-bit identical results.
+"""
+
+from typing import Dict, List, Optional
+import numpy as np
+from app.models.rules import RuleSet, rules_engine
+from app.schemas.credit import CreditScoreRequest, CreditScoreResponse
+from app.services import policy
+from app.services.policy import decision_policy
+
+Columns = Dict[str, np.ndarray]
+
+INT_FIELDS = (
+    "wallet_age_days",
+    "total_transactions",
+    "defi_interactions",
+    "term_months",
+    "previous_loans",
+    "successful_repayments",
+    "defaults",
+    "reputation_score",
+)
+FLOAT_FIELDS = ("total_volume_usd", "loan_amount", "collateral_value_usd")
+# Model inputs ahead of the derived collateral ratio
+FEATURE_FIELDS = (
+    "wallet_age_days",
+    "total_transactions",
+    "total_volume_usd",
+    "defi_interactions",
+    "loan_amount",
+    "collateral_value_usd",
+    "term_months",
+    "previous_loans",
+    "successful_repayments",
+    "defaults",
+    "reputation_score",
+)
+
+
+def request_columns(requests: List[CreditScoreRequest]) -> Columns:
+    """Transpose requests into one array per numeric field."""
+    columns = {
+        name: np.fromiter((getattr(r, name) for r in requests), dtype=np.int64, count=len(requests))
+        for name in INT_FIELDS
+    }
+    for name in FLOAT_FIELDS:
+        columns[name] = np.fromiter((getattr(r, name) for r in requests), dtype=np.float64, count=len(requests))
+    return columns
+
+
+def feature_matrix(cols: Columns) -> np.ndarray:
+    """(n_requests, n_features) float64 matrix in InferenceService._extract_features order."""
+    loan_amount = cols["loan_amount"]
+    matrix = np.empty((len(loan_amount), len(FEATURE_FIELDS) + 1))
+    for j, name in enumerate(FEATURE_FIELDS):
+        matrix[:, j] = cols[name]
+    matrix[:, -1] = np.divide(
+        cols["collateral_value_usd"], loan_amount, out=np.zeros(len(loan_amount)), where=loan_amount > 0
+    )
+    return matrix
+
+
+def _scores(credit_score, fraud, anomaly, decision: Columns) -> Columns:
+    return {
+        "credit_score": credit_score,
+        "fraud_score": fraud,
+        "anomaly_score": anomaly,
+        **decision,
+    }
+
+
+def model_scores(default_probability: np.ndarray, cols: Columns, rules: Optional[RuleSet] = None) -> Columns:
+    """Vectorized InferenceService._format_prediction for the model's default probabilities."""
+    rules = rules or rules_engine.current()
+    credit_score = ((1 - default_probability) * 900 + 100).astype(np.int64)
+    fraud = rules.evaluate("fraud_score", cols)
+    anomaly = rules.evaluate("anomaly_score", cols)
+    decision = decision_policy.model.decide_batch(
+        default_probability, cols["collateral_value_usd"], fraud, anomaly, cols["defaults"],
+        default_probability=default_probability,
+    )
+    return _scores(credit_score, fraud, anomaly, decision)
+
+
+def rule_based_scores(cols: Columns, rules: Optional[RuleSet] = None) -> Columns:
+    """Vectorized InferenceService._rule_based_prediction."""
+    rules = rules or rules_engine.current()
+    credit_score = rules.evaluate("rule_based_credit_score", cols)
+    fraud = rules.evaluate("fraud_score", cols)
+    anomaly = rules.evaluate("anomaly_score", cols)
+    decision = decision_policy.rule_based.decide_batch(
+        credit_score, cols["collateral_value_usd"], fraud, anomaly, cols["defaults"],
+    )
+    return _scores(credit_score, fraud, anomaly, decision)
+
+
+def fallback_scores(cols: Columns, rules: Optional[RuleSet] = None) -> Columns:
+    """Vectorized FallbackService.calculate_score."""
+    rules = rules or rules_engine.current()
+    credit_score = rules.evaluate("fallback_credit_score", cols)
+    fraud = rules.evaluate("fallback_fraud_score", cols)
+    anomaly = np.full(len(credit_score), 0.1)
+    decision = decision_policy.fallback.decide_batch(
+        credit_score, cols["collateral_value_usd"], fraud, anomaly, cols["defaults"],
+    )
+    return _scores(credit_score, fraud, anomaly, decision)
+
+
+def to_responses(scores: Columns, model_version: str, is_fallback: bool) -> List[CreditScoreResponse]:
+    """Materialize result columns as CreditScoreResponse objects."""
+    return [
+        CreditScoreResponse(
+            credit_score=credit_score,
+            fraud_score=fraud_score,
+            anomaly_score=anomaly_score,
+            risk_level=risk_level,
+            default_probability=default_probability,
+            recommended_action=action,
+            interest_rate_suggestion=interest_rate,
+            max_loan_amount=max_loan,
+            model_version=model_version,
+            policy_version=decision_policy.version,
+            is_fallback=is_fallback,
+        )
+        for credit_score, fraud_score, anomaly_score, risk_level, default_probability, action, interest_rate, max_loan in zip(
+            scores["credit_score"].tolist(),
+            scores["fraud_score"].tolist(),
+            scores["anomaly_score"].tolist(),
+            policy.risk_levels(scores["risk_level"]),
+            scores["default_probability"].tolist(),
+            policy.actions(scores["recommended_action"]),
+            scores["interest_rate_suggestion"].tolist(),
+            scores["max_loan_amount"].tolist(),
+        )
+    ]
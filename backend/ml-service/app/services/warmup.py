@@ -0,0 +1,93 @@
+"""Background model loading and warm-up, and the readiness it gates.
+
+At startup the model is loaded and warmed on the inference executor while
+the event loop keeps serving: /health answers at once, /ready only once
+warm-up has finished. Until then scoring requests are handled according to
+COLD_START_MODE: "fallback" scores them with the fallback rules,
+"reject" answers 503 with Retry-After, and "wait" holds them until the
+model is ready.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+from app.models.registry import model_registry
+from app.services import pipeline
+from app.services.executor import InferenceExecutor
+from app.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+COLD_START_MODES = ("fallback", "reject", "wait")
+WARMUP_BUCKETS_SECONDS = (0.1, 0.5, 1, 2, 5, 10, 30, 60, 120)
+
+
+class ModelWarmup:
+    def __init__(self, executor: InferenceExecutor, cold_start_mode: str = "fallback"):
+        if cold_start_mode not in COLD_START_MODES:
+            raise ValueError(f"Unknown cold start mode: {cold_start_mode}")
+        self.cold_start_mode = cold_start_mode
+        self._executor = executor
+        self._future: Optional[Future] = None
+        self._started_at = 0.0
+        self._ready = False
+        self._lock = threading.Lock()
+        self._warmup_seconds = metrics_registry.histogram("model_warmup_seconds", WARMUP_BUCKETS_SECONDS)
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready
+
+    @property
+    def is_started(self) -> bool:
+        return self._future is not None
+
+    def start(self):
+        """Begin loading and warming on the inference executor; later calls are no-ops."""
+        with self._lock:
+            if self._future is not None:
+                return
+            logger.info("Loading and warming model in the background...")
+            self._started_at = time.perf_counter()
+            # A concurrent future rather than an asyncio task, so any event
+            # loop (or none) can wait on it
+            self._future = self._executor.submit(pipeline.load_and_warm)
+            self._future.add_done_callback(self._on_done)
+
+    def mark_ready(self):
+        """Adopt a model already loaded and warmed in this process, without loading again.
+
+        The pre-fork master calls this before forking, so workers answer
+        /ready and score with the model from their first request.
+        """
+        with self._lock:
+            if self._future is None:
+                self._future = Future()
+                self._future.set_result(model_registry.versions())
+            self._ready = True
+        logger.info(f"Model ready: {model_registry.model_version} (loaded and warmed before start)")
+
+    async def wait(self):
+        """Wait until the model is loaded and warm, starting if needed."""
+        self.start()
+        try:
+            await asyncio.wrap_future(self._future)
+        except Exception:
+            pass  # already logged by _on_done
+
+    def _on_done(self, future: Future):
+        try:
+            versions = future.result()
+            if self._executor.kind == "process":
+                # Models live in the worker processes; adopt their versions here
+                model_registry.mark_loaded_elsewhere(versions)
+        except Exception as e:
+            logger.error(f"Background model loading failed, serving without warm-up: {e}")
+        elapsed = time.perf_counter() - self._started_at
+        self._warmup_seconds.observe(elapsed)
+        self._ready = True
+        logger.info(f"Model ready: {model_registry.model_version} (loaded and warmed in {elapsed:.2f}s)")
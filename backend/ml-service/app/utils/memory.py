@@ -0,0 +1,26 @@
+import os
+import resource
+import sys
+from typing import Dict, Optional
+
+
+def process_memory() -> Dict[str, Optional[int]]:
+    """Resident memory of this process.
+
+    `rss_shared_bytes` counts file-backed pages (shared libraries and
+    memory-mapped model arrays) that other processes can map too; the rest
+    of `rss_bytes` is private to this worker. Outside Linux only the peak
+    RSS is known.
+    """
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    try:
+        with open("/proc/self/statm") as f:
+            _, resident, shared = (int(v) for v in f.read().split()[:3])
+        rss, rss_shared = resident * page_size, shared * page_size
+    except OSError:
+        rss, rss_shared = None, None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    peak_bytes = peak if sys.platform == "darwin" else peak * 1024
+    return {"pid": os.getpid(), "rss_bytes": rss, "rss_shared_bytes": rss_shared, "peak_rss_bytes": peak_bytes}
@@ -0,0 +1,93 @@
+"""
+Response serialization benchmark
+
+Measures how much of a /ml/credit-score request goes into building and
+serializing the response, for the old path and the current one:
+
+- before: a FactorExplanation built for every candidate factor, then the
+  response re-validated and encoded the way FastAPI's response_model does
+  it (dump, validate, dump to JSON-compatible Python, json.dumps)
+- after: top-k factors picked from plain tuples before any model is built,
+  and bytes written by pydantic-core (ModelJSONResponse)
+
+Both are compared with the end-to-end latency of in-process HTTP requests
+to the running app.
+
+Usage:
+    python scripts/benchmark_serialization.py
+    python scripts/benchmark_serialization.py --iterations 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def _per_call_us(fn, iterations: int) -> float:
+    for _ in range(min(iterations // 10, 1000)):
+        fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark credit score response serialization")
+    parser.add_argument("--iterations", type=int, default=5000, help="Calls per measurement")
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+    from app.core.config import settings
+    from app.main import app
+    from app.schemas.credit import CreditScoreRequest, CreditScoreResponse, FactorExplanation
+    from app.services import pipeline
+    from app.services.explainability import top_factors
+
+    example = CreditScoreRequest.model_config["json_schema_extra"]["example"]
+    request = CreditScoreRequest(**example)
+    prediction = pipeline.score_request(request)
+    factors = pipeline.explainability_service._calculate_feature_importance(request)
+    fields = prediction.model_dump()
+
+    def before():
+        all_factors = [
+            FactorExplanation(feature=f, impact=i, value=v, contribution=c) for f, i, v, c in factors
+        ]
+        all_factors.sort(key=lambda x: abs(x.contribution), reverse=True)
+        response = CreditScoreResponse(**{**fields, "top_factors": all_factors[:3]})
+        revalidated = CreditScoreResponse.model_validate(response.model_dump())
+        return json.dumps(
+            revalidated.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+    def after():
+        response = CreditScoreResponse(**{**fields, "top_factors": top_factors(factors)})
+        return response.__pydantic_serializer__.to_json(response)
+
+    before_us = _per_call_us(before, args.iterations)
+    after_us = _per_call_us(after, args.iterations)
+
+    with TestClient(app) as client:
+        while client.get("/ready").status_code != 200:
+            time.sleep(0.05)
+        headers = {"Cache-Control": "no-store", "X-API-KEY": settings.API_KEY}
+        request_us = _per_call_us(
+            lambda: client.post("/api/ml/credit-score", json=example, headers=headers),
+            max(args.iterations // 10, 100),
+        )
+
+    # The current request latency already includes the fast path
+    before_request_us = request_us - after_us + before_us
+    print(f"Request latency (current):       {request_us:9.1f} us")
+    print(f"Serialization before:            {before_us:9.1f} us  ({before_us / before_request_us:6.1%} of request)")
+    print(f"Serialization after:             {after_us:9.1f} us  ({after_us / request_us:6.1%} of request)")
+    print(f"Speedup:                         {before_us / after_us:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+TCP vs Unix-domain-socket round-trip benchmark
+
+Starts the service with both listeners (`python -m app.server` with
+UDS_PATH set), then sends the same requests over one persistent TCP
+connection and one persistent UDS connection and reports latency
+percentiles for each.
+
+Usage:
+    python scripts/benchmark_uds.py
+    python scripts/benchmark_uds.py --requests 20000 --endpoint /api/ml/credit-score
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, SERVICE_DIR)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(client: httpx.Client, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            # Measure a warm model, not cold-start fallback responses
+            if client.get("/ready").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("Service did not become ready")
+
+
+def _measure(client: httpx.Client, endpoint: str, payload: dict, requests: int) -> np.ndarray:
+    send = (lambda: client.post(endpoint, json=payload)) if payload else (lambda: client.get(endpoint))
+    for _ in range(min(requests // 10, 500)):
+        send()
+    latencies = np.empty(requests)
+    for i in range(requests):
+        start = time.perf_counter()
+        response = send()
+        latencies[i] = time.perf_counter() - start
+        response.raise_for_status()
+    return latencies * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare TCP and UDS round-trip latency")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per transport")
+    parser.add_argument("--endpoint", default="/health", help="/health, or /api/ml/credit-score to include scoring")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    from app.schemas.credit import CreditScoreRequest
+
+    port = _free_port()
+    uds_path = os.path.join(tempfile.mkdtemp(), "ml.sock")
+    env = dict(os.environ, HOST="127.0.0.1", PORT=str(port), UDS_PATH=uds_path, LOG_LEVEL="WARNING", ACCESS_LOG="false")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SERVICE_DIR, env.get("PYTHONPATH")]))
+    server = subprocess.Popen([sys.executable, "-m", "app.server"], env=env)
+
+    payload = None
+    headers = {}
+    if args.endpoint != "/health":
+        payload = CreditScoreRequest.model_config["json_schema_extra"]["example"]
+        headers = {"X-API-KEY": settings.API_KEY, "Cache-Control": "no-store"}
+
+    try:
+        clients = {
+            "TCP": httpx.Client(base_url=f"http://127.0.0.1:{port}", headers=headers),
+            "UDS": httpx.Client(base_url="http://ml", headers=headers, transport=httpx.HTTPTransport(uds=uds_path)),
+        }
+        results = {}
+        for name, client in clients.items():
+            with client:
+                _wait_until_ready(client)
+                results[name] = _measure(client, args.endpoint, payload, args.requests)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+    print(f"{args.requests} requests to {args.endpoint} over one persistent connection each")
+    print(f"{'':6}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}  (us)")
+    for name, latencies in results.items():
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        print(f"{name:6}{latencies.mean():10.1f}{p50:10.1f}{p90:10.1f}{p99:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Startup profile: per-module import time and RSS
+
+Imports app.main (and, with --load-model, loads and warms the model as
+the startup task does) with the import machinery instrumented, then
+reports the slowest imports: cumulative and self time, and the resident
+memory each one added. Run it with the environment the service will run
+with, since MODEL_SOURCE and ENABLE_SHAP decide what gets imported.
+
+Usage:
+    python scripts/profile_startup.py
+    python scripts/profile_startup.py --load-model --top 40
+    python scripts/profile_startup.py --json startup_profile.json
+"""
+
+import argparse
+import builtins
+import json
+import os
+import sys
+import time
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, SERVICE_DIR)
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return 0
+
+
+class ImportProfiler:
+    """Times every import statement that loads a module not yet in sys.modules.
+
+    Nested imports are charged to the outermost one's cumulative time and
+    subtracted from its self time, as in `python -X importtime`.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self._stack = []
+        self._original_import = None
+
+    def __enter__(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+        return self
+
+    def __exit__(self, *exc):
+        builtins.__import__ = self._original_import
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += cumulative
+            if name not in self.records:
+                self.records[name] = {
+                    "module": name,
+                    "cumulative_seconds": cumulative,
+                    "self_seconds": cumulative - children,
+                    "rss_delta_bytes": _rss_bytes() - rss_before,
+                    "depth": len(self._stack),
+                }
+
+
+def profile(load_model: bool) -> dict:
+    rss_start = _rss_bytes()
+    start = time.perf_counter()
+    with ImportProfiler() as profiler:
+        import app.main  # noqa: F401
+    import_seconds = time.perf_counter() - start
+
+    result = {
+        "import_seconds": import_seconds,
+        "rss_start_bytes": rss_start,
+        "rss_after_import_bytes": _rss_bytes(),
+        "modules": sorted(profiler.records.values(), key=lambda r: r["cumulative_seconds"], reverse=True),
+        "heavy_modules_loaded": [m for m in ("numpy", "boto3", "botocore", "joblib", "xgboost", "sklearn", "shap") if m in sys.modules],
+    }
+    if load_model:
+        from app.services.pipeline import load_and_warm
+        start = time.perf_counter()
+        with ImportProfiler() as profiler:
+            result["model_versions"] = load_and_warm()
+        result["load_seconds"] = time.perf_counter() - start
+        result["rss_after_load_bytes"] = _rss_bytes()
+        result["load_modules"] = sorted(profiler.records.values(), key=lambda r: r["cumulative_seconds"], reverse=True)
+    return result
+
+
+def _print_modules(modules: list, top: int):
+    print(f"  {'cumulative':>10}  {'self':>8}  {'rss':>9}  module")
+    for record in modules[:top]:
+        print(
+            f"  {record['cumulative_seconds'] * 1000:8.1f}ms  {record['self_seconds'] * 1000:6.1f}ms"
+            f"  {record['rss_delta_bytes'] / 1e6:7.1f}MB  {'  ' * record['depth']}{record['module']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile service startup: import time and RSS per module")
+    parser.add_argument("--load-model", action="store_true", help="Also load and warm the model")
+    parser.add_argument("--top", type=int, default=25, help="Modules to list")
+    parser.add_argument("--json", help="Write the full profile to this file")
+    args = parser.parse_args()
+
+    result = profile(args.load_model)
+
+    print(f"import app.main: {result['import_seconds']:.3f}s, "
+          f"RSS {result['rss_start_bytes'] / 1e6:.1f}MB -> {result['rss_after_import_bytes'] / 1e6:.1f}MB")
+    print(f"heavy modules loaded: {', '.join(result['heavy_modules_loaded']) or 'none'}")
+    _print_modules(result["modules"], args.top)
+    if args.load_model:
+        print(f"\nload_and_warm: {result['load_seconds']:.3f}s, RSS -> {result['rss_after_load_bytes'] / 1e6:.1f}MB, "
+              f"versions {', '.join(result['model_versions']) or 'none'}")
+        _print_modules(result["load_modules"], args.top)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nProfile written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
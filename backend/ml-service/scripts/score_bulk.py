@@ -0,0 +1,369 @@
+"""
+Offline bulk scoring for LYNQ credit extracts
+
+Scores CSV or Parquet files with the same model, feature extraction and
+fallback rules as the service, without going through HTTP. The input is
+split into chunks that are fanned out over a process pool (each worker
+loads the model once). The parent only plans the chunks: byte ranges of a
+CSV, found by counting newlines, or row ranges of a Parquet file. Each
+worker reads and parses its own slice, seeking to it (CSV) or reading only
+the row groups that cover it (Parquet). Results are written in input
+order, so files larger than RAM stream through with a bounded number of
+chunks in memory. CSV input must hold one record per line: no quoted
+newlines.
+
+Progress is checkpointed after every chunk written, with the input
+position the next chunk starts at. Re-running the same command after an
+interruption seeks straight there instead of re-reading earlier chunks.
+
+Usage:
+    python scripts/score_bulk.py extract.csv scores.csv
+    python scripts/score_bulk.py extract.parquet scores_parquet/ --workers 16 --chunk-size 100000
+
+An output path ending in .csv is written as a single CSV file; any other
+output path is a directory of ordered Parquet part files (part-00000.parquet,
+...), readable as one dataset. Parquet input or output requires pyarrow.
+"""
+
+import argparse
+import io
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, NamedTuple, Optional
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+RESULT_COLUMNS = [
+    "row",
+    "wallet_address",
+    "credit_score",
+    "fraud_score",
+    "anomaly_score",
+    "risk_level",
+    "default_probability",
+    "recommended_action",
+    "interest_rate_suggestion",
+    "max_loan_amount",
+    "model_version",
+    "policy_version",
+    "is_fallback",
+    "error",
+]
+SCAN_BLOCK_BYTES = 4 * 1024 * 1024
+
+
+class Chunk(NamedTuple):
+    """One slice of the input: bytes [start, end) of a CSV, or rows [start, end) of a Parquet file."""
+
+    index: int
+    first_row: int
+    start: int
+    end: int
+
+
+def _init_worker():
+    """Load the model once per worker process."""
+    from app.models.registry import model_registry
+    model_registry.ensure_loaded()
+
+
+def score_chunk(first_row: int, records: list) -> pd.DataFrame:
+    """Score one chunk of input rows with vectorized inference and per-row fallback."""
+    from pydantic import ValidationError
+    from app.schemas.credit import CreditScoreRequest
+    from app.services import pipeline
+
+    rows = []
+    requests = []
+    for offset, record in enumerate(records):
+        # Empty cells take the schema defaults instead of failing validation
+        record = {k: v for k, v in record.items() if not (isinstance(v, float) and math.isnan(v))}
+        try:
+            requests.append((offset, CreditScoreRequest(**record)))
+        except ValidationError as e:
+            rows.append({
+                "row": first_row + offset,
+                "wallet_address": record.get("wallet_address"),
+                "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()),
+            })
+
+    try:
+        predictions = pipeline.inference_service.predict_batch([request for _, request in requests])
+    except Exception as e:
+        print(f"[WARN] Batch prediction failed for rows from {first_row}: {e}", file=sys.stderr)
+        predictions = [None] * len(requests)
+
+    for (offset, request), prediction in zip(requests, predictions):
+        if prediction is None:
+            prediction = pipeline.fallback_score(request)
+        rows.append({
+            "row": first_row + offset,
+            "wallet_address": request.wallet_address,
+            **prediction.model_dump(
+                mode="json",
+                exclude={"top_factors", "confidence_score", "processing_time_ms"},
+            ),
+        })
+
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS).sort_values("row", kind="stable")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("[ERROR] Parquet support requires pyarrow: pip install pyarrow", file=sys.stderr)
+        sys.exit(1)
+    return pq
+
+
+def _is_parquet(path: str) -> bool:
+    return path.endswith((".parquet", ".pq")) or os.path.isdir(path)
+
+
+def _csv_chunks(input_path: str, chunk_size: int, index: int, offset: Optional[int]) -> Iterator[Chunk]:
+    """Byte ranges of chunk_size lines each, from `offset` (or just past the header)."""
+    with open(input_path, "rb") as f:
+        if offset is None:
+            f.readline()
+        else:
+            f.seek(offset)
+        start = position = f.tell()
+        rows = 0
+        while True:
+            block = f.read(SCAN_BLOCK_BYTES)
+            if not block:
+                break
+            newlines = block.count(b"\n")
+            pos = 0
+            while rows + newlines >= chunk_size:
+                take = chunk_size - rows
+                for _ in range(take):
+                    pos = block.index(b"\n", pos) + 1
+                newlines -= take
+                yield Chunk(index, index * chunk_size, start, position + pos)
+                index, start, rows = index + 1, position + pos, 0
+            rows += newlines
+            position += len(block)
+        # The last chunk may be short or lack a trailing newline
+        if position > start:
+            yield Chunk(index, index * chunk_size, start, position)
+
+
+def plan_chunks(input_path: str, chunk_size: int, index: int = 0, position: Optional[int] = None) -> Iterator[Chunk]:
+    """Chunks of the input from chunk `index` on, starting at `position` when it is known."""
+    if _is_parquet(input_path):
+        pq = _require_pyarrow()
+        total = pq.ParquetFile(input_path).metadata.num_rows
+        for start in range(index * chunk_size, total, chunk_size):
+            yield Chunk(index, start, start, min(start + chunk_size, total))
+            index += 1
+    elif position is None and index > 0:
+        # No stored offset: find the resume point by scanning (not parsing) earlier chunks
+        for chunk in _csv_chunks(input_path, chunk_size, 0, None):
+            if chunk.index >= index:
+                yield chunk
+    else:
+        yield from _csv_chunks(input_path, chunk_size, index, position)
+
+
+def read_chunk(input_path: str, chunk: Chunk) -> list:
+    """Row dicts of one chunk, read straight from its slice of the input."""
+    if _is_parquet(input_path):
+        parquet_file = _require_pyarrow().ParquetFile(input_path)
+        metadata = parquet_file.metadata
+        groups, offset, group_start = [], 0, 0
+        for i in range(metadata.num_row_groups):
+            group_rows = metadata.row_group(i).num_rows
+            if group_start < chunk.end and group_start + group_rows > chunk.start:
+                if not groups:
+                    offset = chunk.start - group_start
+                groups.append(i)
+            group_start += group_rows
+        table = parquet_file.read_row_groups(groups)
+        return table.slice(offset, chunk.end - chunk.start).to_pylist()
+
+    columns = pd.read_csv(input_path, nrows=0).columns
+    with open(input_path, "rb") as f:
+        f.seek(chunk.start)
+        data = f.read(chunk.end - chunk.start)
+    return pd.read_csv(io.BytesIO(data), header=None, names=columns).to_dict("records")
+
+
+def score_input_chunk(input_path: str, chunk: Chunk) -> pd.DataFrame:
+    """Read and score one chunk; what each pool worker runs."""
+    return score_chunk(chunk.first_row, read_chunk(input_path, chunk))
+
+
+class CsvWriter:
+    def __init__(self, path: str):
+        self.path = path
+
+    def resume(self, state: dict):
+        # Anything written after the last checkpoint belongs to an unfinished chunk
+        with open(self.path, "ab") as f:
+            f.truncate(state.get("output_bytes", 0))
+
+    def reset(self):
+        open(self.path, "wb").close()
+
+    def write(self, index: int, frame: pd.DataFrame) -> dict:
+        with open(self.path, "ab") as f:
+            f.write(frame.to_csv(index=False, header=index == 0).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            return {"output_bytes": f.tell()}
+
+
+class ParquetWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self._pq = _require_pyarrow()
+
+    def _part(self, index: int) -> str:
+        return os.path.join(self.path, f"part-{index:05d}.parquet")
+
+    def resume(self, state: dict):
+        done = state.get("chunks_done", 0)
+        for name in os.listdir(self.path):
+            if name.startswith("part-") and int(name[5:10]) >= done:
+                os.remove(os.path.join(self.path, name))
+
+    def reset(self):
+        os.makedirs(self.path, exist_ok=True)
+        self.resume({"chunks_done": 0})
+
+    def write(self, index: int, frame: pd.DataFrame) -> dict:
+        import pyarrow as pa
+
+        tmp_path = self._part(index) + ".tmp"
+        self._pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), tmp_path)
+        os.replace(tmp_path, self._part(index))
+        return {}
+
+
+def _fingerprint(input_path: str, chunk_size: int) -> dict:
+    stat = os.stat(input_path)
+    return {
+        "input": os.path.abspath(input_path),
+        "input_size": stat.st_size,
+        "input_mtime": stat.st_mtime,
+        "chunk_size": chunk_size,
+    }
+
+
+def _load_checkpoint(checkpoint_path: str, fingerprint: dict) -> dict:
+    if not os.path.exists(checkpoint_path):
+        return {}
+    with open(checkpoint_path, "r") as f:
+        state = json.load(f)
+    if state.get("fingerprint") != fingerprint:
+        print("[WARN] Checkpoint is for a different input or chunk size, starting over", file=sys.stderr)
+        return {}
+    return state
+
+
+def _save_checkpoint(checkpoint_path: str, state: dict):
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    chunk_size: int = 50000,
+    workers: int = None,
+    checkpoint_path: str = None,
+) -> int:
+    """Score input_path into output_path; returns the number of rows scored.
+
+    workers=1 scores in this process, which is handy for debugging.
+    """
+    workers = workers or os.cpu_count() or 1
+    checkpoint_path = checkpoint_path or output_path.rstrip("/" + os.sep) + ".checkpoint.json"
+    writer = CsvWriter(output_path) if output_path.endswith(".csv") else ParquetWriter(output_path)
+
+    fingerprint = _fingerprint(input_path, chunk_size)
+    state = _load_checkpoint(checkpoint_path, fingerprint)
+    if state:
+        writer.resume(state)
+        print(f"[OK] Resuming after chunk {state['chunks_done']} ({state['rows_done']} rows)")
+    else:
+        writer.reset()
+        state = {"fingerprint": fingerprint, "chunks_done": 0, "rows_done": 0}
+
+    chunks = plan_chunks(input_path, chunk_size, state["chunks_done"], state.get("input_position"))
+
+    start = time.time()
+    rows_this_run = 0
+
+    def commit(chunk: Chunk, frame: pd.DataFrame):
+        nonlocal rows_this_run
+        index = chunk.index
+        state.update(writer.write(index, frame))
+        state["chunks_done"] = index + 1
+        state["input_position"] = chunk.end
+        state["rows_done"] += len(frame)
+        _save_checkpoint(checkpoint_path, state)
+
+        rows_this_run += len(frame)
+        rate = rows_this_run / max(time.time() - start, 1e-9)
+        print(f"[OK] Chunk {index} written: {state['rows_done']} rows total, {rate:,.0f} rows/s")
+
+    if workers == 1:
+        _init_worker()
+        for chunk in chunks:
+            commit(chunk, score_input_chunk(input_path, chunk))
+    else:
+        # Workers get only the path and a chunk's range and read it themselves.
+        # Keep a bounded window of chunks in flight so memory stays flat, and
+        # write them back in submission order
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        with pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(score_input_chunk, input_path, chunk)))
+                if len(pending) >= workers * 2:
+                    done_chunk, future = pending.popleft()
+                    commit(done_chunk, future.result())
+            while pending:
+                done_chunk, future = pending.popleft()
+                commit(done_chunk, future.result())
+
+    os.remove(checkpoint_path)
+    print(f"[OK] Scored {state['rows_done']} rows into {output_path} in {time.time() - start:.1f}s")
+    return state["rows_done"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet extract offline")
+    parser.add_argument("input", help="Input .csv or .parquet file")
+    parser.add_argument("output", help="Output .csv file, or a directory for Parquet part files")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Rows per scoring chunk")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <output>.checkpoint.json)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"[ERROR] Input not found: {args.input}", file=sys.stderr)
+        sys.exit(1)
+
+    score_file(args.input, args.output, args.chunk_size, args.workers, args.checkpoint)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import pandas as pd
 import numpy as np
 import random
 import os
+import sys
 import json
 import joblib
 from datetime import datetime
@@ -24,6 +25,10 @@ from sklearn.metrics import (
 )
 import xgboost as xgb
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.models.artifacts import can_write_native, native_dir, write_native
+
 
 NUM_SAMPLES = 100000
 DEFAULT_RATE = 0.08
@@ -32,6 +37,8 @@ DATASET_FILE = os.path.join(OUTPUT_DIR, "lynq_risk_dataset.csv")
 MODEL_FILE = os.path.join(OUTPUT_DIR, "credit_model.pkl")
 SCALER_FILE = os.path.join(OUTPUT_DIR, "scaler.pkl")
 CONFIG_FILE = os.path.join(OUTPUT_DIR, "feature_config.json")
+# Booster (UBJSON), scaler and compiled trees as .npy; the service prefers it to the pickles
+NATIVE_DIR = native_dir(MODEL_FILE)
 
 
 np.random.seed(42)
@@ -223,6 +230,10 @@ def save_model_artifacts(model, scaler, feature_names, metrics, version="v1.0.0"
     print(f"Saving scaler to {SCALER_FILE}...")
     joblib.dump(scaler, SCALER_FILE)
     
+    if can_write_native(model, scaler):
+        print(f"Saving native artifact to {NATIVE_DIR}...")
+        write_native(model, scaler, NATIVE_DIR)
+    
 
     config = {
         "features": feature_names,
@@ -243,6 +254,8 @@ def save_model_artifacts(model, scaler, feature_names, metrics, version="v1.0.0"
     print("\n[OK] Model artifacts saved successfully!")
     print(f"   Model: {MODEL_FILE}")
     print(f"   Scaler: {SCALER_FILE}")
+    if can_write_native(model, scaler):
+        print(f"   Native: {NATIVE_DIR}")
     print(f"   Config: {CONFIG_FILE}")
 
 
@@ -27,6 +27,7 @@ MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
 MODEL_FILE = os.path.join(MODEL_DIR, "credit_model.pkl")
 SCALER_FILE = os.path.join(MODEL_DIR, "scaler.pkl")
 CONFIG_FILE = os.path.join(MODEL_DIR, "feature_config.json")
+NATIVE_DIR = os.path.join(MODEL_DIR, "credit_model.native")
 
 
 def upload_model_to_s3(
@@ -135,6 +136,20 @@ def upload_model_to_s3(
         print(f"[OK] Config uploaded: s3://{bucket_name}/{config_key}")
         
 
+        # Native artifact: every listed file first, the manifest last, so the
+        # service never sees a manifest whose files are still uploading
+        native_manifest = os.path.join(NATIVE_DIR, "manifest.json")
+        if os.path.exists(native_manifest):
+            native_prefix = f"{model_key_prefix}.native/"
+            with open(native_manifest) as f:
+                native_files = json.load(f)["files"]
+            print(f"Uploading native artifact: {native_prefix} ({len(native_files)} files)...")
+            for name in native_files + ["manifest.json"]:
+                s3_client.upload_file(os.path.join(NATIVE_DIR, name), bucket_name, native_prefix + name)
+            upload_results["native"] = native_prefix
+            print(f"[OK] Native artifact uploaded: s3://{bucket_name}/{native_prefix}")
+        
+
         print("\n" + "="*60)
         print("UPLOAD COMPLETE!")
         print("="*60)
@@ -7,8 +7,12 @@ from unittest.mock import Mock, MagicMock
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Requests made before background loading finishes wait for the model, as
+# the endpoint tests expect a model-scored (not cold fallback) response
+os.environ.setdefault("COLD_START_MODE", "wait")
+
 from app.schemas.credit import CreditScoreRequest
-from app.models.loader import ModelLoader
+from app.models.loader import ModelLoader, ModelBundle
 
 
 @pytest.fixture
@@ -53,6 +57,7 @@ def mock_model_loader(mock_model, mock_scaler):
     loader = Mock(spec=ModelLoader)
     loader.get_model.return_value = mock_model
     loader.get_scaler.return_value = mock_scaler
+    loader.get_compiled_model.return_value = None
     loader.is_loaded = True
     loader.model_version = "v1.0.0-test"
     loader.get_feature_names.return_value = [
@@ -73,4 +78,10 @@ def mock_model_loader(mock_model, mock_scaler):
         "features": loader.get_feature_names(),
         "version": "v1.0.0-test",
     }
+    loader.current.return_value = ModelBundle(
+        model=mock_model,
+        scaler=mock_scaler,
+        feature_config=loader.get_feature_config(),
+        version="v1.0.0-test",
+    )
     return loader
@@ -63,6 +63,25 @@ def test_credit_score_with_valid_request(sample_request):
     assert data["credit_score"] <= 1000
 
 
+def test_credit_score_response_matches_schema(sample_request):
+    """Test the directly serialized response round-trips through the response schema."""
+    from app.schemas.credit import CreditScoreResponse
+    
+    response = client.post(
+        "/api/ml/credit-score",
+        json=sample_request.model_dump(),
+        headers={"X-API-KEY": settings.API_KEY, "Cache-Control": "no-store"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    data = response.json()
+    
+    assert CreditScoreResponse.model_validate(data).model_dump(mode="json") == data
+    contributions = [factor["contribution"] for factor in data["top_factors"]]
+    assert len(contributions) == 3
+    assert contributions == sorted(contributions, reverse=True)
+
+
 def test_credit_score_invalid_request():
     """Test credit score endpoint with invalid request."""
     response = client.post(
@@ -71,3 +90,123 @@ def test_credit_score_invalid_request():
         headers={"X-API-KEY": settings.API_KEY}
     )
     assert response.status_code == 422  # Validation error
+
+
+def test_credit_score_batch(sample_request):
+    """Test batch credit score endpoint returns one result per request, in order."""
+    requests = [
+        sample_request.model_copy(update={"wallet_address": f"0x{i:040x}", "defaults": i % 2}).model_dump()
+        for i in range(5)
+    ]
+    response = client.post(
+        "/api/ml/credit-score/batch",
+        json={"requests": requests},
+        headers={"X-API-KEY": settings.API_KEY}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["results"]) == 5
+    assert "processing_time_ms" in data
+    for request, result in zip(requests, data["results"]):
+        single = client.post(
+            "/api/ml/credit-score",
+            json=request,
+            headers={"X-API-KEY": settings.API_KEY, "Cache-Control": "no-store"}
+        ).json()
+        for field in ("credit_score", "risk_level", "default_probability", "top_factors", "confidence_score"):
+            assert result[field] == single[field]
+
+
+def test_credit_score_batch_too_large(sample_request, monkeypatch):
+    """Test batch credit score endpoint rejects batches over the configured limit."""
+    monkeypatch.setattr(settings, "MAX_BATCH_SIZE", 2)
+    response = client.post(
+        "/api/ml/credit-score/batch",
+        json={"requests": [sample_request.model_dump()] * 3},
+        headers={"X-API-KEY": settings.API_KEY}
+    )
+    assert response.status_code == 413
+
+
+def test_credit_score_stream(sample_request, monkeypatch):
+    """Test NDJSON streaming returns one line per input, in order, with inline errors."""
+    import json
+    monkeypatch.setattr(settings, "STREAM_CHUNK_SIZE", 2)
+    
+    good = sample_request.model_dump_json()
+    risky = sample_request.model_copy(update={"defaults": 3, "wallet_age_days": 2}).model_dump_json()
+    body = "\n".join([good, '{"wallet_address": "0xbad"}', risky, "not json", good]) + "\n"
+    
+    response = client.post(
+        "/api/ml/credit-score/stream",
+        content=body.encode(),
+        headers={"X-API-KEY": settings.API_KEY, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 5
+    assert "credit_score" in lines[0]
+    assert lines[1]["line"] == 2 and "error" in lines[1]
+    assert lines[2]["credit_score"] < lines[0]["credit_score"]
+    assert lines[3]["line"] == 4 and "error" in lines[3]
+    assert lines[4]["credit_score"] == lines[0]["credit_score"]
+
+
+def test_ndjson_line_splitting_across_chunks():
+    """Test lines split across body chunks are reassembled and long lines rejected."""
+    import asyncio
+    from app.api.routes import _iter_ndjson_lines
+    
+    async def chunks():
+        for chunk in [b'{"a":', b' 1}\n{"b"', b': 2}\n', b"x" * 20, b"\nlast"]:
+            yield chunk
+    
+    async def collect():
+        return [line async for line in _iter_ndjson_lines(chunks(), max_line_bytes=16)]
+    
+    lines = asyncio.run(collect())
+    assert lines[:2] == [b'{"a": 1}', b'{"b": 2}']
+    assert isinstance(lines[2], ValueError)
+    assert lines[3] == b"last"
+
+
+def test_credit_score_stream_interleaves_reading_and_writing(sample_request, monkeypatch):
+    """Test the stream writes each chunk before reading the rest of the body."""
+    import asyncio
+    monkeypatch.setattr(settings, "STREAM_CHUNK_SIZE", 2)
+    line = sample_request.model_dump_json().encode() + b"\n"
+    body_messages = [{"type": "http.request", "body": line * 2, "more_body": True} for _ in range(3)]
+    body_messages[-1]["more_body"] = False
+    events = []
+    
+    async def receive():
+        if body_messages:
+            events.append("read")
+            return body_messages.pop(0)
+        await asyncio.sleep(3600)
+    
+    async def send(message):
+        if message["type"] == "http.response.start":
+            events.append(dict(message["headers"]).get(b"x-request-id") is not None)
+        elif message["type"] == "http.response.body" and message.get("body"):
+            events.append("write")
+    
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/ml/credit-score/stream",
+        "raw_path": b"/api/ml/credit-score/stream",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"x-api-key", settings.API_KEY.encode()), (b"content-type", b"application/x-ndjson")],
+        "client": ("127.0.0.1", 1),
+        "server": ("127.0.0.1", 8000),
+    }
+    asyncio.run(app(scope, receive, send))
+    
+    assert events == [True, "read", "write", "read", "write", "read", "write"]
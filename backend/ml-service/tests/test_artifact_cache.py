@@ -0,0 +1,151 @@
+"""Tests for the content-addressed S3 artifact cache, against an in-memory S3 stand-in."""
+import hashlib
+import io
+import json
+import os
+import joblib
+import numpy as np
+import pytest
+from botocore.exceptions import ClientError
+from xgboost import XGBClassifier
+from app.core.config import settings
+from app.core import aws
+from app.models.artifact_cache import ArtifactCache, ArtifactDownloadError
+from app.models.artifacts import write_native
+from app.models.loader import ModelLoader
+
+
+class FakeS3:
+    """The head_object/get_object subset of an S3 client, with request counts."""
+    
+    def __init__(self):
+        self.objects = {}
+        self.calls = {"head": 0, "get": 0}
+        self.corrupt = False
+        # Set to store objects as multipart uploads with this part size
+        self.upload_part_size = None
+        self.supports_part_number = True
+    
+    def put(self, key, data):
+        self.objects[key] = data
+    
+    def _etag(self, key):
+        data = self.objects[key]
+        if self.upload_part_size is None:
+            return f'"{hashlib.md5(data).hexdigest()}"'
+        parts = [data[i:i + self.upload_part_size] for i in range(0, len(data), self.upload_part_size)]
+        composite = hashlib.md5(b"".join(hashlib.md5(part).digest() for part in parts)).hexdigest()
+        return f'"{composite}-{len(parts)}"'
+    
+    def head_object(self, Bucket, Key, IfNoneMatch=None, IfMatch=None, PartNumber=None):
+        self.calls["head"] += 1
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        if PartNumber is not None:
+            if not self.supports_part_number:
+                raise ClientError({"Error": {"Code": "InvalidArgument", "Message": ""}}, "HeadObject")
+            size = len(self.objects[Key]) if self.upload_part_size is None else self.upload_part_size
+            return {"ETag": self._etag(Key), "ContentLength": min(size, len(self.objects[Key])), "PartsCount": 1}
+        if IfNoneMatch == self._etag(Key):
+            raise ClientError({"Error": {"Code": "304", "Message": "Not Modified"}}, "HeadObject")
+        return {"ETag": self._etag(Key), "ContentLength": len(self.objects[Key])}
+    
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        self.calls["get"] += 1
+        if IfMatch is not None and IfMatch != self._etag(Key):
+            raise ClientError({"Error": {"Code": "PreconditionFailed", "Message": ""}}, "GetObject")
+        data = self.objects[Key]
+        if Range:
+            start, end = (int(v) for v in Range[len("bytes="):].split("-"))
+            data = data[start:end + 1]
+        if self.corrupt:
+            data = bytes(len(data))
+        return {"Body": io.BytesIO(data)}
+
+
+@pytest.fixture
+def s3():
+    return FakeS3()
+
+
+def test_unchanged_objects_are_not_downloaded_again(tmp_path, s3):
+    """Test a cached object is revalidated with a 304 and re-downloaded only once it changes."""
+    s3.put("m.pkl", b"model-v1")
+    cache = ArtifactCache(str(tmp_path), s3)
+    
+    first = cache.fetch("bucket", "m.pkl")
+    second = ArtifactCache(str(tmp_path), s3).fetch("bucket", "m.pkl")
+    assert first == second and open(first, "rb").read() == b"model-v1"
+    assert s3.calls["get"] == 1
+    
+    s3.put("m.pkl", b"model-v2")
+    changed = cache.fetch("bucket", "m.pkl")
+    assert open(changed, "rb").read() == b"model-v2" and s3.calls["get"] == 2
+    assert os.path.basename(changed) == hashlib.sha256(b"model-v2").hexdigest()
+    assert cache.fetch("bucket", "missing.pkl") is None
+
+
+def test_large_objects_download_in_verified_parts(tmp_path, s3):
+    """Test large objects arrive as ranged parts, and a corrupt download is never published."""
+    payload = os.urandom(10_000)
+    s3.put("big.pkl", payload)
+    cache = ArtifactCache(str(tmp_path), s3, part_size=1024, max_workers=4)
+    
+    assert open(cache.fetch("bucket", "big.pkl"), "rb").read() == payload
+    assert s3.calls["get"] == 10
+    
+    s3.put("big.pkl", os.urandom(10_000))
+    s3.corrupt = True
+    with pytest.raises(ArtifactDownloadError):
+        cache.fetch("bucket", "big.pkl")
+    assert os.listdir(tmp_path / "objects") == [hashlib.sha256(payload).hexdigest()]
+
+
+def test_multipart_uploads_verified_against_composite_etag(tmp_path, s3, caplog):
+    """Test a multipart ETag is rebuilt from the upload's part size, whatever the download part size."""
+    payload = os.urandom(10_000)
+    s3.upload_part_size = 4096
+    s3.put("big.pkl", payload)
+    cache = ArtifactCache(str(tmp_path), s3, part_size=1024, max_workers=4)
+    
+    assert open(cache.fetch("bucket", "big.pkl"), "rb").read() == payload
+    
+    s3.put("big.pkl", os.urandom(10_000))
+    s3.corrupt = True
+    with pytest.raises(ArtifactDownloadError, match="does not match ETag"):
+        cache.fetch("bucket", "big.pkl")
+    
+    # Without part sizes the object is checked by length only, with a warning
+    s3.supports_part_number = False
+    with caplog.at_level("WARNING", logger="app.models.artifact_cache"):
+        assert cache.fetch("bucket", "big.pkl") is not None
+    assert "checked by length only" in caplog.text
+
+
+def test_s3_model_loads_from_cache_on_restart(tmp_path, s3, monkeypatch):
+    """Test an S3 model (native artifact included) is fetched once, then restarts only revalidate."""
+    rng = np.random.default_rng(5)
+    X = rng.normal(size=(64, 12))
+    model = XGBClassifier(n_estimators=3, max_depth=2).fit(X, (X[:, 9] > 0).astype(int))
+    joblib.dump(model, tmp_path / "upload.pkl")
+    s3.put("models/credit.pkl", (tmp_path / "upload.pkl").read_bytes())
+    s3.put("models/credit_config.json", json.dumps({"version": "v-s3"}).encode())
+    for name in write_native(model, None, str(tmp_path / "native")):
+        s3.put(f"models/credit.native/{name}", (tmp_path / "native" / name).read_bytes())
+    
+    monkeypatch.setattr(aws, "get_s3_loader", lambda: type("S3Loader", (), {"s3_client": s3})())
+    monkeypatch.setattr(settings, "S3_BUCKET", "bucket")
+    monkeypatch.setattr(settings, "ARTIFACT_CACHE_DIR", str(tmp_path / "cache"))
+    
+    def load():
+        loader = ModelLoader(source="s3", s3_key="models/credit.pkl", model_dir=str(tmp_path / "models"))
+        loader.load_models()
+        return loader.current()
+    
+    first = load()
+    downloads = s3.calls["get"]
+    restarted = load()
+    
+    assert first.version == restarted.version == "v-s3"
+    assert restarted.artifact_format == "native"
+    assert downloads > 0 and s3.calls["get"] == downloads
@@ -0,0 +1,58 @@
+"""Tests for the native (UBJSON + .npy) model artifact format."""
+import json
+import joblib
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+from app.core.config import settings
+from app.models.artifacts import native_dir, write_native
+from app.models.loader import ModelLoader, _probe_features
+
+
+@pytest.fixture
+def published(tmp_path):
+    """A scaled XGBoost model saved as pickles, plus its native artifact."""
+    rng = np.random.default_rng(7)
+    X_raw = np.abs(rng.normal(size=(300, 12))) * 100
+    scaler = StandardScaler().fit(X_raw)
+    model = XGBClassifier(n_estimators=8, max_depth=3).fit(scaler.transform(X_raw), (X_raw[:, 10] > 80).astype(int))
+    model_path = tmp_path / "credit_model.pkl"
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, tmp_path / "credit_model_scaler.pkl")
+    (tmp_path / "credit_model_config.json").write_text(json.dumps({"version": "v-native"}))
+    write_native(model, scaler, native_dir(str(model_path)))
+    return model_path
+
+
+def test_native_artifact_matches_pickle(published, monkeypatch):
+    """Test the native artifact is preferred and scores exactly like the pickled model, from mapped arrays."""
+    monkeypatch.setattr(settings, "INFERENCE_ENGINE", "compiled")
+    native = ModelLoader(source="local", local_path=str(published))
+    native.load_models()
+    bundle = native.current()
+    
+    pickled = joblib.load(published)
+    scaler = joblib.load(published.parent / "credit_model_scaler.pkl")
+    X = _probe_features()
+    
+    assert bundle.artifact_format == "native" and bundle.version == "v-native"
+    assert isinstance(bundle.compiled_model.value, np.memmap)
+    assert bundle.compiled_model.fused_scaler
+    np.testing.assert_array_equal(bundle.model.predict_proba(bundle.scaler.transform(X)), pickled.predict_proba(scaler.transform(X)))
+    np.testing.assert_allclose(bundle.compiled_model.predict_proba(X), pickled.predict_proba(scaler.transform(X)), atol=1e-6)
+
+
+def test_pickle_fallback(published):
+    """Test a model without a usable native artifact still loads from the pickles."""
+    manifest = native_dir(str(published)) + "/manifest.json"
+    with open(manifest) as f:
+        broken = json.load(f)
+    broken["format_version"] = 99
+    with open(manifest, "w") as f:
+        json.dump(broken, f)
+    
+    loader = ModelLoader(source="local", local_path=str(published))
+    loader.load_models()
+    assert loader.current().artifact_format == "pickle"
+    assert loader.current().model is not None
@@ -0,0 +1,119 @@
+"""Tests for the micro-batching scheduler."""
+import asyncio
+import pytest
+from app.services.batching import MicroBatcher
+from app.services.inference import InferenceService
+
+
+class RecordingInferenceService:
+    """Inference stub that records batch sizes and echoes the wallet back."""
+    
+    def __init__(self, fail: bool = False):
+        self.batch_sizes = []
+        self.fail = fail
+        self._service = InferenceService()
+    
+    def predict_batch(self, requests):
+        self.batch_sizes.append(len(requests))
+        if self.fail:
+            raise RuntimeError("boom")
+        return [self._service._rule_based_prediction(r) for r in requests]
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_requests_are_coalesced(sample_request):
+    """Test concurrent submissions within the wait window are scored as one batch."""
+    service = RecordingInferenceService()
+    
+    async def scenario():
+        batcher = MicroBatcher(service, max_batch_size=64, max_wait_ms=50)
+        await batcher.start()
+        requests = [sample_request.model_copy(update={"reputation_score": i}) for i in range(10)]
+        results = await asyncio.gather(*(batcher.submit(r) for r in requests))
+        await batcher.stop()
+        return requests, results
+    
+    requests, results = _run(scenario())
+    
+    assert service.batch_sizes == [10]
+    expected = [InferenceService()._rule_based_prediction(r).credit_score for r in requests]
+    assert [r.credit_score for r in results] == expected
+
+
+def test_batches_respect_max_size(sample_request):
+    """Test a burst larger than max_batch_size is split into several batches."""
+    service = RecordingInferenceService()
+    
+    async def scenario():
+        batcher = MicroBatcher(service, max_batch_size=4, max_wait_ms=50)
+        await batcher.start()
+        results = await asyncio.gather(*(batcher.submit(sample_request) for _ in range(10)))
+        await batcher.stop()
+        return results
+    
+    results = _run(scenario())
+    
+    assert len(results) == 10
+    assert service.batch_sizes == [4, 4, 2]
+
+
+def test_failed_batch_resolves_to_none(sample_request):
+    """Test callers get None (and can fall back) when batch scoring raises."""
+    service = RecordingInferenceService(fail=True)
+    
+    async def scenario():
+        batcher = MicroBatcher(service, max_batch_size=8, max_wait_ms=1)
+        await batcher.start()
+        results = await asyncio.gather(*(batcher.submit(sample_request) for _ in range(3)))
+        await batcher.stop()
+        return results
+    
+    assert _run(scenario()) == [None, None, None]
+
+
+def test_queue_full_raises(sample_request):
+    """Test submissions beyond the queue depth are rejected immediately."""
+    service = RecordingInferenceService()
+    
+    async def scenario():
+        # No consumer task, so the single queue slot stays occupied
+        batcher = MicroBatcher(service, max_batch_size=8, max_wait_ms=1, queue_depth=1)
+        batcher._queue = asyncio.Queue(maxsize=1)
+        pending = asyncio.ensure_future(batcher.submit(sample_request))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.QueueFull):
+            await batcher.submit(sample_request)
+        pending.cancel()
+    
+    _run(scenario())
+
+
+class HangingExecutor:
+    """Executor stub whose calls never finish, leaving a batch in flight."""
+    
+    def __init__(self):
+        self.started = asyncio.Event()
+    
+    async def run(self, fn, *args):
+        self.started.set()
+        await asyncio.Event().wait()
+
+
+def test_stop_releases_in_flight_and_queued_requests(sample_request):
+    """Test stop() resolves the batch being scored as well as the queued requests."""
+    async def scenario():
+        executor = HangingExecutor()
+        batcher = MicroBatcher(RecordingInferenceService(), max_batch_size=2, max_wait_ms=50, executor=executor)
+        await batcher.start()
+        in_flight = [asyncio.ensure_future(batcher.submit(sample_request)) for _ in range(2)]
+        await executor.started.wait()
+        queued = asyncio.ensure_future(batcher.submit(sample_request))
+        await asyncio.sleep(0)
+        
+        await batcher.stop()
+        return await asyncio.wait_for(asyncio.gather(*in_flight, queued), timeout=1)
+    
+    assert _run(scenario()) == [None, None, None]
@@ -0,0 +1,107 @@
+"""Tests for the prediction cache."""
+from fastapi.testclient import TestClient
+from app.services.cache import PredictionCache, make_cache_key
+from app.services.inference import InferenceService
+from app.core.config import settings
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def _response(sample_request):
+    return InferenceService()._rule_based_prediction(sample_request)
+
+
+def test_cache_hit_returns_independent_copy(sample_request):
+    """Test hits return a copy so callers can't mutate the cached entry."""
+    cache = PredictionCache(max_size=10, ttl_seconds=60)
+    cache.put("k", "v1", _response(sample_request))
+    
+    first = cache.get("k", "v1")
+    first.processing_time_ms = 999
+    second = cache.get("k", "v1")
+    
+    assert second is not None
+    assert second.processing_time_ms is None
+
+
+def test_cache_lru_eviction(sample_request):
+    """Test the least recently used entry is evicted at capacity."""
+    cache = PredictionCache(max_size=2, ttl_seconds=60)
+    response = _response(sample_request)
+    cache.put("a", "v1", response)
+    cache.put("b", "v1", response)
+    cache.get("a", "v1")
+    cache.put("c", "v1", response)
+    
+    assert cache.get("b", "v1") is None
+    assert cache.get("a", "v1") is not None
+    assert cache.get("c", "v1") is not None
+
+
+def test_cache_ttl_expiry(sample_request):
+    """Test entries expire after the TTL."""
+    clock = FakeClock()
+    cache = PredictionCache(max_size=10, ttl_seconds=30, clock=clock)
+    cache.put("k", "v1", _response(sample_request))
+    
+    clock.now = 29
+    assert cache.get("k", "v1") is not None
+    clock.now = 31
+    assert cache.get("k", "v1") is None
+
+
+def test_cache_keeps_loaded_versions_and_drops_unloaded(sample_request):
+    """Test pinned and live versions share the cache, and only unloaded versions are dropped."""
+    loaded = ["v1", "v-pinned"]
+    cache = PredictionCache(max_size=10, ttl_seconds=60, loaded_versions=lambda: loaded)
+    cache.put("live", "v1", _response(sample_request))
+    cache.put("pinned", "v-pinned", _response(sample_request))
+    
+    assert cache.get("live", "v1") is not None
+    assert cache.get("pinned", "v-pinned") is not None
+    assert len(cache) == 2
+    
+    loaded[:] = ["v2", "v-pinned"]
+    assert cache.get("new", "v2") is None
+    assert len(cache) == 1
+    assert cache.get("pinned", "v-pinned") is not None
+
+
+def test_cache_key_depends_on_features_wallet_and_versions(sample_request):
+    """Test the key changes with any input that changes the response."""
+    features = InferenceService()._extract_features(sample_request)
+    base = make_cache_key(sample_request.wallet_address, features, "v1")
+    
+    assert base == make_cache_key(sample_request.wallet_address, list(features), "v1")
+    assert base != make_cache_key("0xother", features, "v1")
+    assert base != make_cache_key(sample_request.wallet_address, features, "v2")
+    assert base != make_cache_key(sample_request.wallet_address, features[:-1] + [9.9], "v1")
+    assert base != make_cache_key(sample_request.wallet_address, features, "v1", rules_version="rules-v2")
+    assert base != make_cache_key(sample_request.wallet_address, features, "v1", policy_version="policy-v2")
+
+
+def test_credit_score_endpoint_cache_headers(sample_request):
+    """Test repeat requests hit the cache and Cache-Control bypasses it."""
+    from app.main import app
+    from app.api.routes import prediction_cache
+    
+    client = TestClient(app)
+    prediction_cache.clear()
+    headers = {"X-API-KEY": settings.API_KEY}
+    body = sample_request.model_dump()
+    
+    first = client.post("/api/ml/credit-score", json=body, headers=headers)
+    second = client.post("/api/ml/credit-score", json=body, headers=headers)
+    forced = client.post("/api/ml/credit-score", json=body, headers={**headers, "Cache-Control": "no-cache"})
+    
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert forced.headers["X-Cache"] == "MISS"
+    assert second.json()["credit_score"] == first.json()["credit_score"]
+    assert second.json()["processing_time_ms"] is not None
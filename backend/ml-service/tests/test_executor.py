@@ -0,0 +1,88 @@
+"""Tests for the inference executor."""
+import asyncio
+import threading
+import time
+import pytest
+from app.services.executor import InferenceExecutor
+from app.core.logging import request_id_var
+
+
+def test_thread_executor_runs_off_event_loop():
+    """Test work runs on a worker thread and sees the caller's request ID."""
+    executor = InferenceExecutor(kind="thread", max_workers=2)
+    
+    def work():
+        return threading.current_thread().name, request_id_var.get()
+    
+    async def scenario():
+        request_id_var.set("req-123")
+        return await executor.run(work)
+    
+    thread_name, request_id = asyncio.run(scenario())
+    executor.shutdown()
+    
+    assert thread_name.startswith("inference")
+    assert request_id == "req-123"
+
+
+def test_event_loop_stays_responsive_during_slow_work():
+    """Test other coroutines keep running while blocking work is in the executor."""
+    executor = InferenceExecutor(kind="thread", max_workers=1)
+    ticks = []
+    
+    async def heartbeat():
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+    
+    async def scenario():
+        await asyncio.gather(executor.run(time.sleep, 0.2), heartbeat())
+    
+    start = time.perf_counter()
+    asyncio.run(scenario())
+    executor.shutdown()
+    
+    assert len(ticks) == 5
+    assert ticks[-1] - start < 0.15
+
+
+def test_unknown_executor_kind_rejected():
+    """Test invalid executor kinds fail fast."""
+    with pytest.raises(ValueError):
+        InferenceExecutor(kind="gpu")
+
+
+def test_process_executor_reports_worker_model_version(tmp_path, monkeypatch):
+    """Test process mode loads models in the workers and adopts their version once."""
+    import json
+    import joblib
+    import numpy as np
+    from xgboost import XGBClassifier
+    from app.models.loader import RULE_BASED_BUNDLE
+    from app.models.registry import model_registry
+    from app.services.warmup import ModelWarmup
+    
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(64, 12))
+    model = XGBClassifier(n_estimators=3, max_depth=2).fit(X, (X[:, 0] > 0).astype(int))
+    model_path = tmp_path / "credit_model.pkl"
+    joblib.dump(model, model_path)
+    (tmp_path / "credit_model_config.json").write_text(json.dumps({"version": "v9-process"}))
+    
+    # Spawned workers build their own settings from the environment
+    monkeypatch.setenv("LOCAL_MODEL_PATH", str(model_path))
+    monkeypatch.setattr(model_registry._loader, "_is_loaded", False)
+    monkeypatch.setattr(model_registry._loader, "_bundle", RULE_BASED_BUNDLE)
+    monkeypatch.setattr(model_registry, "_remote_versions", ())
+    executor = InferenceExecutor(kind="process", max_workers=1)
+    warmup = ModelWarmup(executor)
+    
+    try:
+        asyncio.run(warmup.wait())
+    finally:
+        executor.shutdown()
+    
+    assert warmup.is_ready and model_registry.is_loaded
+    assert model_registry.model_version == "v9-process"
+    assert model_registry.versions() == ["v9-process"]
+    assert model_registry.current().model is None  # the serving process holds no model copy
@@ -0,0 +1,66 @@
+"""Tests for model explanations from native booster contributions."""
+import sys
+import numpy as np
+import pytest
+import xgboost
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+from app.core.config import settings
+from app.models.loader import ModelBundle
+from app.schemas.credit import CreditScoreRequest
+from app.services import vectorized
+from app.services.explainability import ContributionExplainer, ExplainabilityService, build_explainer, top_k_columns
+
+
+@pytest.fixture
+def bundle():
+    """A scaled XGBoost model bundle with its explainer."""
+    rng = np.random.default_rng(11)
+    X = np.abs(rng.normal(size=(400, 12))) * 100
+    scaler = StandardScaler().fit(X)
+    model = XGBClassifier(n_estimators=20, max_depth=4).fit(scaler.transform(X), (X[:, 10] + X[:, 9] > 150).astype(int))
+    return ModelBundle(model=model, scaler=scaler, explainer=build_explainer(model, scaler.transform(X[:1])), version="v-explain")
+
+
+def _requests(n):
+    rng = np.random.default_rng(3)
+    example = CreditScoreRequest.model_config["json_schema_extra"]["example"]
+    return [
+        CreditScoreRequest(**{**example, "reputation_score": int(rng.integers(0, 100)), "defaults": int(rng.integers(0, 3))})
+        for _ in range(n)
+    ]
+
+
+def test_xgboost_explained_with_native_contributions(bundle, monkeypatch):
+    """Test XGBoost models get exact booster contributions without importing shap."""
+    monkeypatch.setattr(settings, "ENABLE_SHAP", True)
+    assert isinstance(bundle.explainer, ContributionExplainer)
+    assert "shap" not in sys.modules
+    
+    requests = _requests(16)
+    scaled = bundle.scaler.transform(vectorized.feature_matrix(vectorized.request_columns(requests)))
+    contributions = bundle.explainer.contributions(scaled)
+    full = bundle.model.get_booster().predict(xgboost.DMatrix(scaled), pred_contribs=True)
+    
+    assert contributions.shape == (16, 12)
+    np.testing.assert_allclose(full.sum(axis=1), bundle.model.predict(scaled, output_margin=True), atol=1e-4)
+    np.testing.assert_array_equal(contributions, full[:, :-1])
+
+
+def test_batch_explanations_match_single(bundle, monkeypatch):
+    """Test a batch is explained like each request alone, with factors ranked by contribution."""
+    monkeypatch.setattr(settings, "ENABLE_SHAP", True)
+    service = ExplainabilityService()
+    requests = _requests(8)
+    
+    batch = service.explain_batch(requests, bundle)
+    singles = [service.explain(request, bundle) for request in requests]
+    
+    assert batch == singles
+    for explanation in batch:
+        contributions = [factor.contribution for factor in explanation.top_factors]
+        assert len(contributions) == 3 and contributions == sorted(contributions, reverse=True)
+    
+    values = np.random.default_rng(0).normal(size=(50, 12))
+    expected = np.argsort(-np.abs(values), axis=1, kind="stable")[:, :3]
+    np.testing.assert_array_equal(top_k_columns(values), expected)
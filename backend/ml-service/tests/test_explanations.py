@@ -0,0 +1,163 @@
+"""Tests for deferred explanations: the result store, the background explainer and the endpoints."""
+import asyncio
+import os
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.main import app
+from app.schemas.credit import ExplanationStatus
+from app.services.explainability import ExplanationResult, ExplainabilityService
+from app.services.explanations import DeferredExplainer, ExplanationStore
+from app.services.inference import InferenceService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def test_store_expires_and_evicts():
+    """Test entries expire after the TTL and the oldest are evicted beyond max_size."""
+    clock = FakeClock()
+    store = ExplanationStore(max_size=2, ttl_seconds=10, clock=clock)
+    first = store.create("v1")
+    second = store.create("v1")
+    store.complete(second, 0.9, [])
+    
+    assert store.get(first).status == ExplanationStatus.PENDING
+    assert store.get(second).status == ExplanationStatus.READY
+    
+    third = store.create("v1")
+    assert store.get(first) is None and len(store) == 2
+    
+    clock.now = 10.0
+    assert store.get(second) is None and store.get(third) is None
+    store.fail(third, "gone")
+    assert len(store) == 0
+
+
+def test_deferred_predictions_explained_in_batches_per_version(sample_request):
+    """Test queued predictions get ids and are explained with one call per model version."""
+    calls = []
+    
+    def explain(requests, model_version):
+        calls.append((model_version, len(requests)))
+        return ExplainabilityService().explain_batch(requests)
+    
+    store = ExplanationStore()
+    scorer = InferenceService()
+    requests = [sample_request.model_copy(update={"reputation_score": i}) for i in (10, 50, 90)]
+    predictions = [scorer._rule_based_prediction(r) for r in requests]
+    predictions[0].model_version = predictions[1].model_version = "v1"
+    predictions[2].model_version = "v2"
+    fallback = scorer._rule_based_prediction(sample_request)
+    fallback.is_fallback = True
+    
+    async def scenario():
+        explainer = DeferredExplainer(explain, store, max_batch_size=8)
+        await explainer.start()
+        explainer.defer(requests + [sample_request], predictions + [fallback])
+        for _ in range(100):
+            if len(calls) == 2:
+                break
+            await asyncio.sleep(0.01)
+        await explainer.stop()
+    
+    asyncio.run(scenario())
+    
+    assert sorted(calls) == [("v1", 2), ("v2", 1)]
+    assert fallback.explanation_id is None
+    for request, prediction in zip(requests, predictions):
+        assert prediction.top_factors is None
+        stored = store.get(prediction.explanation_id)
+        expected = ExplainabilityService().explain(request)
+        assert stored.status == ExplanationStatus.READY and stored.model_version == prediction.model_version
+        assert stored.top_factors == expected.top_factors and stored.confidence_score == expected.confidence
+
+
+def test_deferred_explanation_endpoints(sample_request, monkeypatch):
+    """Test a deferred score returns an explanation_id that resolves to the inline explanation."""
+    monkeypatch.setattr(settings, "ENABLE_SHAP", True)
+    monkeypatch.setattr(settings, "ENABLE_PREDICTION_CACHE", False)
+    headers = {"X-API-KEY": settings.API_KEY}
+    with TestClient(app) as client:
+        inline = client.post("/api/ml/credit-score", json=sample_request.model_dump(), headers=headers).json()
+        deferred = client.post(
+            "/api/ml/credit-score",
+            json=sample_request.model_dump(),
+            headers={**headers, "X-Explanation-Mode": "deferred"},
+        ).json()
+        
+        assert deferred["top_factors"] is None and deferred["explanation_id"]
+        assert deferred["credit_score"] == inline["credit_score"]
+        assert deferred["recommended_action"] == inline["recommended_action"]
+        
+        for _ in range(100):
+            response = client.get(f"/api/ml/explanations/{deferred['explanation_id']}", headers=headers)
+            if response.status_code != 202:
+                break
+            time.sleep(0.01)
+        assert response.status_code == 200
+        explanation = response.json()
+        assert explanation["status"] == "ready"
+        assert explanation["top_factors"] == inline["top_factors"]
+        assert explanation["confidence_score"] == inline["confidence_score"]
+        
+        assert client.get("/api/ml/explanations/unknown", headers=headers).status_code == 404
+        invalid = client.post(
+            "/api/ml/credit-score",
+            json=sample_request.model_dump(),
+            headers={**headers, "X-Explanation-Mode": "later"},
+        )
+        assert invalid.status_code == 400
+
+
+def test_full_queue_marks_explanations_unavailable(sample_request):
+    """Test predictions beyond the queue depth are stored as unavailable without being explained."""
+    calls = []
+    
+    def explain(requests, model_version):
+        calls.append(len(requests))
+        return ExplainabilityService().explain_batch(requests)
+    
+    store = ExplanationStore()
+    scorer = InferenceService()
+    requests = [sample_request.model_copy(update={"reputation_score": i}) for i in (10, 50, 90)]
+    predictions = [scorer._rule_based_prediction(r) for r in requests]
+    
+    async def scenario():
+        explainer = DeferredExplainer(explain, store, queue_depth=1)
+        await explainer.start()
+        # Nothing runs between these puts, so the queue holds only the first
+        explainer.defer(requests, predictions)
+        assert calls == []
+        for _ in range(100):
+            if calls:
+                break
+            await asyncio.sleep(0.01)
+        await explainer.stop()
+    
+    asyncio.run(scenario())
+    
+    assert calls == [1]
+    assert store.get(predictions[0].explanation_id).status == ExplanationStatus.READY
+    for prediction in predictions[1:]:
+        stored = store.get(prediction.explanation_id)
+        assert stored.status == ExplanationStatus.UNAVAILABLE and stored.top_factors is None
+
+
+def test_explanation_from_another_worker_is_misdirected():
+    """Test an id created by another process gets a 421 while unknown ids still get a 404."""
+    headers = {"X-API-KEY": settings.API_KEY}
+    other_pid = os.getpid() + 1
+    with TestClient(app) as client:
+        misdirected = client.get(f"/api/ml/explanations/{other_pid:x}-{'0' * 32}", headers=headers)
+        assert misdirected.status_code == 421
+        assert str(other_pid) in misdirected.json()["detail"]
+        
+        assert client.get(f"/api/ml/explanations/{os.getpid():x}-{'0' * 32}", headers=headers).status_code == 404
+        assert client.get("/api/ml/explanations/unknown", headers=headers).status_code == 404
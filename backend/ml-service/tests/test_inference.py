@@ -83,3 +83,37 @@ def test_feature_extraction(sample_request):
     assert all(isinstance(f, (int, float)) for f in features)
     assert features[0] == sample_request.wallet_age_days
     assert features[11] > 0
+
+
+def test_predict_batch_single_model_call(sample_request, mock_model_loader, monkeypatch):
+    """Test batch prediction scores all requests with one scaler and one model call."""
+    import app.services.inference as inference_module
+    monkeypatch.setattr(inference_module, "model_registry", mock_model_loader)
+    
+    model = mock_model_loader.get_model()
+    model.predict_proba.side_effect = lambda X: np.tile([0.9, 0.1], (len(X), 1))
+    scaler = mock_model_loader.get_scaler()
+    scaler.transform.side_effect = lambda X: np.asarray(X)
+    
+    requests = [sample_request.model_copy(update={"wallet_age_days": days}) for days in (5, 365, 1000)]
+    service = InferenceService()
+    results = service.predict_batch(requests)
+    
+    assert len(results) == 3
+    assert model.predict_proba.call_count == 1
+    assert scaler.transform.call_count == 1
+    assert scaler.transform.call_args[0][0].shape == (3, 12)
+    assert all(r.default_probability == pytest.approx(0.1) for r in results)
+    assert results[0].fraud_score > results[1].fraud_score
+
+
+def test_predict_batch_model_failure(sample_request, mock_model_loader, monkeypatch):
+    """Test batch prediction returns None entries when the model call fails."""
+    import app.services.inference as inference_module
+    monkeypatch.setattr(inference_module, "model_registry", mock_model_loader)
+    mock_model_loader.get_model().predict_proba.side_effect = RuntimeError("boom")
+    
+    service = InferenceService()
+    results = service.predict_batch([sample_request, sample_request])
+    
+    assert results == [None, None]
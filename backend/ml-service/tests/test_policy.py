@@ -0,0 +1,72 @@
+"""Tests for the shared decision policy."""
+import numpy as np
+import pytest
+from app.schemas.credit import RiskLevel, RecommendedAction
+from app.services import policy
+from app.services.fallback import FallbackService
+from app.services.inference import InferenceService
+from app.services.policy import decision_policy
+
+
+@pytest.mark.parametrize("name", ["model", "rule_based", "fallback"])
+def test_single_and_batch_decisions_agree(name):
+    """Test decide and decide_batch give identical results, including at band edges."""
+    table = getattr(decision_policy, name)
+    rng = np.random.default_rng(3)
+    edges = np.concatenate([table.bins, np.nextafter(table.bins, -np.inf)])
+    if name == "model":
+        values = np.concatenate([edges, rng.random(500)])
+    else:
+        values = np.concatenate([np.round(edges), rng.integers(100, 1001, 500)])
+    n = len(values)
+    collateral = rng.choice([0.0, 1000.0, 1500.0], n)
+    fraud = rng.choice([0.0, 0.4, 0.45, 0.5, 0.6, 0.7, 0.8], n)
+    anomaly = rng.choice([0.0, 0.3, 0.5, 0.7], n)
+    defaults = rng.integers(0, 4, n)
+    probability = values if name == "model" else None
+    
+    batch = table.decide_batch(values, collateral, fraud, anomaly, defaults, default_probability=probability)
+    risk_levels = policy.risk_levels(batch["risk_level"])
+    actions = policy.actions(batch["recommended_action"])
+    
+    for i in range(n):
+        decision = table.decide(
+            values[i].item(), collateral[i].item(), fraud[i].item(), anomaly[i].item(), defaults[i].item(),
+            default_probability=values[i].item() if name == "model" else None,
+        )
+        assert decision.risk_level == risk_levels[i]
+        assert decision.recommended_action == actions[i]
+        assert decision.default_probability == batch["default_probability"][i]
+        assert decision.interest_rate_suggestion == batch["interest_rate_suggestion"][i]
+        assert decision.max_loan_amount == batch["max_loan_amount"][i]
+
+
+def test_model_policy_bands():
+    """Test the model policy reproduces the documented probability bands."""
+    table = decision_policy.model
+    
+    def decide(p):
+        return table.decide(p, 1000.0, 0.0, 0.0, 0, default_probability=p)
+    
+    assert decide(0.05).risk_level == RiskLevel.VERY_LOW
+    assert decide(0.10).risk_level == RiskLevel.LOW
+    assert decide(0.30).recommended_action == RecommendedAction.APPROVE_WITH_CONDITIONS
+    assert decide(0.30).max_loan_amount == 1000.0 * 0.8 * 0.75
+    assert decide(0.60).recommended_action == RecommendedAction.MANUAL_REVIEW
+    assert decide(0.80).recommended_action == RecommendedAction.REJECT
+    assert decide(0.80).interest_rate_suggestion == 20.0
+
+
+def test_responses_report_policy_version(sample_request):
+    """Test single and batch responses from every scorer carry the policy version."""
+    service = InferenceService()
+    fallback = FallbackService()
+    
+    responses = [
+        service._rule_based_prediction(sample_request),
+        *service._rule_based_prediction_batch([sample_request]),
+        fallback.calculate_score(sample_request),
+        *fallback.calculate_scores([sample_request]),
+    ]
+    
+    assert all(r.policy_version == decision_policy.version for r in responses)
@@ -0,0 +1,110 @@
+"""Tests for the pre-fork launcher and its fork-safety hooks."""
+import os
+import pytest
+from app.core.aws import AWSConfig
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_aws_clients_reset_in_forked_child():
+    """Test a forked worker does not inherit the master's boto3 clients."""
+    sentinel = object()
+    AWSConfig._s3_client = sentinel
+    AWSConfig._cloudwatch_client = sentinel
+    try:
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            cleared = AWSConfig._s3_client is None and AWSConfig._cloudwatch_client is None
+            os.write(write_fd, b"1" if cleared else b"0")
+            os._exit(0)
+        os.close(write_fd)
+        result = os.read(read_fd, 1)
+        os.waitpid(pid, 0)
+        os.close(read_fd)
+        
+        assert result == b"1"
+        # The parent keeps its own clients
+        assert AWSConfig._s3_client is sentinel
+    finally:
+        AWSConfig.reset_clients()
+
+
+def _free_port():
+    import socket
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _worker_pids(master_pid):
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+        return {int(pid) for pid in f.read().split()}
+
+
+def _wait_for(predicate, timeout=20.0):
+    import time
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(0.05)
+    raise AssertionError("Timed out waiting for pre-fork server")
+
+
+@pytest.mark.skipif(
+    not os.path.exists(f"/proc/{os.getpid()}/task/{os.getpid()}/children"),
+    reason="requires Linux /proc child listing",
+)
+def test_prefork_serves_respawns_and_shuts_down():
+    """Test the pre-fork master serves from warm workers, respawns them quickly and exits on SIGTERM."""
+    import signal
+    import subprocess
+    import sys
+    import time
+    import httpx
+    from app.prefork import MIN_WORKER_LIFETIME_SECONDS
+    
+    port = _free_port()
+    service_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, HOST="127.0.0.1", PORT=str(port), PREFORK_WORKERS="2", LOG_LEVEL="WARNING")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [service_dir, env.get("PYTHONPATH")]))
+    master = subprocess.Popen(
+        [sys.executable, "-m", "app.prefork"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        def healthy():
+            try:
+                return httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0).json()
+            except httpx.HTTPError:
+                return None
+        
+        health = _wait_for(healthy)
+        # Workers report the model the master loaded before forking
+        assert health["model_loaded"] is True
+        # ...and are ready from the start, without warming up again
+        assert httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1.0).status_code == 200
+        
+        workers = _wait_for(lambda: len(_worker_pids(master.pid)) == 2 and _worker_pids(master.pid))
+        # Workers younger than this are respawned with a backoff
+        time.sleep(MIN_WORKER_LIFETIME_SECONDS)
+        victim = next(iter(workers))
+        killed_at = time.monotonic()
+        os.kill(victim, signal.SIGKILL)
+        
+        respawned = _wait_for(lambda: (pids := _worker_pids(master.pid)) and len(pids) == 2 and victim not in pids and pids)
+        respawn_seconds = time.monotonic() - killed_at
+        # Forked from the warm master: no model load, so well under the lifetime backoff
+        assert respawn_seconds < 1.0
+        assert len(respawned - workers) == 1
+        assert _wait_for(healthy)["model_loaded"] is True
+        
+        master.send_signal(signal.SIGTERM)
+        assert master.wait(timeout=15) == 0
+    finally:
+        if master.poll() is None:
+            master.kill()
+            master.wait()
@@ -0,0 +1,92 @@
+"""Tests for the model registry and per-request version pinning."""
+import json
+import joblib
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from xgboost import XGBClassifier
+from app.core.config import settings
+from app.main import app
+from app.models.loader import ModelLoader
+from app.models.registry import ModelRegistry, UnknownModelVersion, model_registry
+
+HEADERS = {"X-API-KEY": settings.API_KEY, "Cache-Control": "no-store"}
+
+
+def _publish(directory, version, column=9):
+    """Write a small model and its config; returns the model path."""
+    directory.mkdir(exist_ok=True)
+    rng = np.random.default_rng(column)
+    X = rng.normal(size=(64, 12))
+    model = XGBClassifier(n_estimators=3, max_depth=2).fit(X, (X[:, column] > 0).astype(int))
+    joblib.dump(model, directory / "credit_model.pkl")
+    (directory / "credit_model_config.json").write_text(json.dumps({"version": version}))
+    return str(directory / "credit_model.pkl")
+
+
+def _loader(path):
+    return ModelLoader(source="local", local_path=path)
+
+
+def test_registry_serves_pinned_versions(tmp_path):
+    """Test additional models are loaded by version, sized and timed, and unknown versions are refused."""
+    registry = ModelRegistry(
+        _loader(_publish(tmp_path / "live", "v1")),
+        [_loader(_publish(tmp_path / "a", "v0", column=10)), _loader(str(tmp_path / "missing.pkl"))],
+    )
+    registry.ensure_loaded()
+    
+    assert registry.versions() == ["v1", "v0"]
+    assert registry.get().version == "v1" and registry.get("v0").version == "v0"
+    assert registry.get("v0").model is not registry.get().model
+    with pytest.raises(UnknownModelVersion):
+        registry.get("v9")
+    
+    info = {entry["version"]: entry for entry in registry.describe()}
+    assert info["v1"]["role"] == "live" and info["v0"]["role"] == "pinned"
+    assert all(entry["load_seconds"] > 0 and entry["memory_bytes"] > 0 for entry in info.values())
+
+
+def test_reload_retains_previous_versions(tmp_path):
+    """Test a reload keeps the replaced model pinnable, up to the retention limit."""
+    live = tmp_path / "live"
+    registry = ModelRegistry(_loader(_publish(live, "v1")), retain_previous=1)
+    registry.ensure_loaded()
+    v1 = registry.current()
+    
+    _publish(live, "v2", column=10)
+    registry.reload()
+    assert registry.versions() == ["v2", "v1"]
+    assert registry.get("v1") is v1
+    
+    _publish(live, "v3", column=11)
+    registry.reload()
+    assert registry.versions() == ["v3", "v2"]
+    assert [entry["role"] for entry in registry.describe()] == ["live", "previous"]
+
+
+def test_header_pins_model_version(tmp_path, monkeypatch, sample_request):
+    """Test X-Model-Version scores single and batch requests on the pinned model, and 404s unknown versions."""
+    pinned = _loader(_publish(tmp_path, "v-pinned"))
+    pinned.load_models()
+    monkeypatch.setattr(model_registry, "_pinned", {"v-pinned": pinned.current()})
+    monkeypatch.setattr(model_registry, "_pinned_loaded", True)
+    body = sample_request.model_dump()
+    
+    with TestClient(app) as client:
+        live = client.post("/api/ml/credit-score", json=body, headers=HEADERS)
+        single = client.post("/api/ml/credit-score", json=body, headers={**HEADERS, "X-Model-Version": "v-pinned"})
+        batch = client.post(
+            "/api/ml/credit-score/batch",
+            json={"requests": [body, body]},
+            headers={**HEADERS, "X-Model-Version": "v-pinned"},
+        )
+        unknown = client.post("/api/ml/credit-score", json=body, headers={**HEADERS, "X-Model-Version": "v-none"})
+        versions = client.get("/model/versions", headers=HEADERS)
+    
+    assert live.json()["model_version"] == model_registry.model_version
+    assert single.status_code == 200 and single.json()["model_version"] == "v-pinned"
+    assert not single.json()["is_fallback"]
+    assert [r["model_version"] for r in batch.json()["results"]] == ["v-pinned", "v-pinned"]
+    assert unknown.status_code == 404
+    assert "v-pinned" in [entry["version"] for entry in versions.json()["versions"]]
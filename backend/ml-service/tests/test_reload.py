@@ -0,0 +1,122 @@
+"""Tests for hot model reload and the artifact watcher."""
+import json
+import threading
+import joblib
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from xgboost import XGBClassifier
+from app.api.routes import model_warmup
+from app.core.config import settings
+from app.main import app
+from app.models.loader import ModelLoader, ModelReloadError, RULE_BASED_BUNDLE
+from app.models.registry import ModelRegistry, model_registry
+from app.models.watcher import ModelWatcher
+from app.services.inference import InferenceService
+
+
+def _publish(tmp_path, version, column=9):
+    """Write a small model and its config where a local loader will find them."""
+    rng = np.random.default_rng(column)
+    X = rng.normal(size=(64, 12))
+    model = XGBClassifier(n_estimators=3, max_depth=2).fit(X, (X[:, column] > 0).astype(int))
+    joblib.dump(model, tmp_path / "credit_model.pkl")
+    (tmp_path / "credit_model_config.json").write_text(json.dumps({"version": version}))
+    return str(tmp_path / "credit_model.pkl")
+
+
+def test_reload_swaps_whole_bundle(tmp_path, sample_request):
+    """Test reload replaces model and version together while a captured bundle keeps scoring on the old model."""
+    loader = ModelLoader(source="local", local_path=_publish(tmp_path, "v1"))
+    loader.load_models()
+    old = loader.current()
+    
+    _publish(tmp_path, "v2", column=10)
+    assert loader.reload() == ("v1", "v2")
+    
+    new = loader.current()
+    assert new is not old and new.model is not old.model
+    assert old.version == "v1" and new.version == "v2"
+    service = InferenceService()
+    assert service.predict(sample_request, old).model_version == "v1"
+    assert service.predict(sample_request, new).model_version == "v2"
+
+
+def test_failed_reload_keeps_old_bundle(tmp_path):
+    """Test an unreadable or missing new model raises and leaves the live bundle in place."""
+    model_path = _publish(tmp_path, "v1")
+    loader = ModelLoader(source="local", local_path=model_path)
+    loader.load_models()
+    old = loader.current()
+    failures = loader._reload_failures.value
+    
+    (tmp_path / "credit_model.pkl").write_bytes(b"not a model")
+    with pytest.raises(ModelReloadError):
+        loader.reload()
+    assert loader.current() is old
+    
+    (tmp_path / "credit_model.pkl").unlink()
+    with pytest.raises(ModelReloadError):
+        loader.reload()
+    assert loader.current() is old
+    assert loader._reload_failures.value - failures == 2
+
+
+def test_watcher_reloads_once_artifacts_settle(tmp_path):
+    """Test the watcher waits for an unchanged second poll, then reloads once."""
+    loader = ModelLoader(source="local", local_path=_publish(tmp_path, "v1"))
+    loader.load_models()
+    watcher = ModelWatcher(ModelRegistry(loader), interval_seconds=60)
+    watcher._seen = loader.artifact_fingerprint()
+    
+    assert watcher.check() is False
+    _publish(tmp_path, "v2", column=10)
+    assert watcher.check() is False
+    assert loader.model_version == "v1"
+    assert watcher.check() is True
+    assert loader.model_version == "v2"
+    assert watcher.check() is False
+
+
+def test_reload_endpoint_drops_no_requests(tmp_path, monkeypatch, sample_request):
+    """Test requests scored during repeated reloads all succeed, each on one whole model."""
+    model_path = _publish(tmp_path, "v1")
+    loader = model_registry._loader
+    monkeypatch.setattr(loader, "_local_path", model_path)
+    monkeypatch.setattr(loader, "_source", "local")
+    monkeypatch.setattr(loader, "_bundle", RULE_BASED_BUNDLE)
+    monkeypatch.setattr(loader, "_is_loaded", False)
+    monkeypatch.setattr(model_registry, "_previous", {})
+    monkeypatch.setattr(model_warmup, "_ready", False)
+    monkeypatch.setattr(model_warmup, "_future", None)
+    headers = {"X-API-KEY": settings.API_KEY, "Cache-Control": "no-store"}
+    
+    versions, errors = [], []
+    stop = threading.Event()
+    
+    def score():
+        while not stop.is_set():
+            response = client.post("/api/ml/credit-score", json=sample_request.model_dump(), headers=headers)
+            if response.status_code != 200 or response.json()["is_fallback"]:
+                errors.append(response.status_code)
+            versions.append(response.json()["model_version"])
+    
+    with TestClient(app) as client:
+        client.post("/api/ml/credit-score", json=sample_request.model_dump(), headers=headers)
+        threads = [threading.Thread(target=score) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        try:
+            for i in range(4):
+                _publish(tmp_path, f"v{2 + i % 2}", column=9 + i % 2)
+                response = client.post("/model/reload", headers=headers)
+                assert response.status_code == 200
+                assert response.json()["model_version"] == f"v{2 + i % 2}"
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+    
+    assert versions and errors == []
+    assert set(versions) <= {"v1", "v2", "v3"}
+    assert model_registry.model_version == "v3"
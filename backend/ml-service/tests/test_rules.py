@@ -0,0 +1,117 @@
+"""Tests for the declarative scoring rules."""
+import copy
+import json
+import os
+import numpy as np
+import pytest
+from app.models.rules import RuleSet, RulesEngine, DEFAULT_RULES_PATH, REQUIRED_SCORES
+from app.services import vectorized
+
+
+@pytest.fixture
+def default_spec():
+    with open(DEFAULT_RULES_PATH) as f:
+        return json.load(f)
+
+
+def _random_requests(sample_request, n=500, seed=5):
+    rng = np.random.default_rng(seed)
+    return [
+        sample_request.model_copy(update={
+            "wallet_age_days": int(rng.choice([0, 6, 7, 29, 30, 90, 180, 365, 800])),
+            "total_transactions": int(rng.choice([0, 2, 3, 4, 5, 100, 300])),
+            "total_volume_usd": float(rng.choice([0.0, 50.0, 5e4])),
+            "collateral_value_usd": float(rng.choice([0.0, 999.0, 1000.0, 1500.0, 2000.0])),
+            "previous_loans": int(rng.choice([0, 1, 4])),
+            "successful_repayments": int(rng.choice([0, 1, 3, 5])),
+            "defaults": int(rng.choice([0, 1, 2, 3])),
+            "reputation_score": int(rng.choice([0, 40, 60, 80, 100])),
+        })
+        for _ in range(n)
+    ]
+
+
+def test_default_rules_score_known_request(sample_request, default_spec):
+    """Test the packaged rules reproduce the documented fallback ladder."""
+    rules = RuleSet(default_spec)
+    
+    # 500 + 150 (age 365) + 75 (reputation 75) + 75 (collateral 1.5x) + 100 (2 repayments)
+    assert rules.score("fallback_credit_score", sample_request) == 900
+    assert rules.score("fraud_score", sample_request) == 0.0
+    assert rules.score("anomaly_score", sample_request) == 0.0
+
+
+def test_generated_row_path_matches_vectorized(sample_request, default_spec):
+    """Test the generated single-row functions and the array evaluator agree exactly."""
+    rules = RuleSet(default_spec)
+    requests = _random_requests(sample_request)
+    cols = vectorized.request_columns(requests)
+    
+    for name in REQUIRED_SCORES:
+        expected = [rules.score(name, request) for request in requests]
+        assert rules.evaluate(name, cols).tolist() == expected, name
+
+
+def test_invalid_specs_rejected(default_spec):
+    """Test specs with missing scores, unsorted bins or unknown inputs fail to compile."""
+    missing = copy.deepcopy(default_spec)
+    del missing["scores"]["anomaly_score"]
+    unsorted = copy.deepcopy(default_spec)
+    unsorted["scores"]["fallback_credit_score"]["terms"][0]["bins"] = [90, 30, 180, 365]
+    unknown = copy.deepcopy(default_spec)
+    unknown["scores"]["fraud_score"]["terms"][0]["input"] = "wallet_age_years"
+    
+    for spec in (missing, unsorted, unknown):
+        with pytest.raises(ValueError):
+            RuleSet(spec)
+
+
+def test_zero_divisor_rejected(default_spec):
+    """Test a linear term with a literal zero divisor fails when the spec is loaded, not when scoring."""
+    spec = copy.deepcopy(default_spec)
+    spec["scores"]["rule_based_credit_score"]["terms"][0]["divisor"] = 0
+    
+    with pytest.raises(ValueError, match="divisor"):
+        RuleSet(spec)
+
+
+def test_non_numeric_emitted_fields_rejected(default_spec):
+    """Test every field written into the generated code must be a number."""
+    def with_change(change):
+        spec = copy.deepcopy(default_spec)
+        change(spec["scores"])
+        return spec
+    
+    specs = [
+        with_change(lambda s: s["rule_based_credit_score"]["terms"][0].update(multiplier="100")),
+        with_change(lambda s: s["rule_based_credit_score"]["terms"][3].update(offset="__import__('os')")),
+        with_change(lambda s: s["fallback_credit_score"]["terms"][0].update(values=[0, "x", 100, 150, 200])),
+        with_change(lambda s: s["fallback_credit_score"]["terms"][0].update(bins=[True, 90, 180, 365])),
+        with_change(lambda s: s["anomaly_score"]["terms"][0]["when"][0].update(scale="10")),
+        with_change(lambda s: s["fraud_score"].update(clip=[None, "1.0"])),
+    ]
+    for spec in specs:
+        with pytest.raises(ValueError):
+            RuleSet(spec)
+
+
+def test_rules_engine_hot_reloads_on_change(tmp_path, sample_request, default_spec):
+    """Test a changed spec file is swapped in without a restart and a broken one is ignored."""
+    path = tmp_path / "scoring_rules.json"
+    path.write_text(json.dumps(default_spec))
+    engine = RulesEngine(path=str(path), reload_interval=1e-9)
+    assert engine.current().version == default_spec["version"]
+    
+    stricter = copy.deepcopy(default_spec)
+    stricter["version"] = "rules-v2"
+    stricter["scores"]["fallback_credit_score"]["base"] = 400
+    path.write_text(json.dumps(stricter))
+    os.utime(path, (1e9, 2e9))
+    
+    rules = engine.current()
+    assert rules.version == "rules-v2"
+    assert rules.score("fallback_credit_score", sample_request) == 800
+    
+    path.write_text("{not json")
+    os.utime(path, (1e9, 3e9))
+    assert engine.current().version == "rules-v2"
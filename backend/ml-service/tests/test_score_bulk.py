@@ -0,0 +1,130 @@
+"""Tests for the offline bulk-scoring script."""
+import json
+import os
+import pytest
+import pandas as pd
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+
+
+@pytest.fixture
+def score_bulk(monkeypatch):
+    # Importable by name so spawned pool workers can unpickle score_chunk
+    monkeypatch.syspath_prepend(SCRIPTS_DIR)
+    import score_bulk
+    return score_bulk
+
+
+@pytest.fixture
+def extract_csv(tmp_path, sample_request):
+    rows = []
+    for i in range(7):
+        row = sample_request.model_dump()
+        row["wallet_address"] = f"0x{i:040x}"
+        row["defaults"] = i % 3
+        rows.append(row)
+    rows[2]["loan_amount"] = 0  # fails validation (gt=0)
+    rows[4]["reputation_score"] = None  # empty cell takes the schema default
+    path = tmp_path / "extract.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+def test_score_bulk_csv_in_order_with_inline_errors(score_bulk, extract_csv, tmp_path):
+    """Test every input row gets one output row, in order, matching the service's scores."""
+    from app.schemas.credit import CreditScoreRequest
+    from app.services import pipeline
+    
+    output = tmp_path / "scores.csv"
+    assert score_bulk.score_file(str(extract_csv), str(output), chunk_size=3, workers=1) == 7
+    
+    scores = pd.read_csv(output)
+    assert list(scores["row"]) == list(range(7))
+    assert scores.loc[2, "error"].startswith("loan_amount")
+    assert scores["error"].drop(index=2).isna().all()
+    
+    source = pd.read_csv(extract_csv)
+    for i in (0, 1, 4):
+        record = {k: v for k, v in source.iloc[i].to_dict().items() if not pd.isna(v)}
+        expected = pipeline.inference_service.predict(CreditScoreRequest(**record))
+        assert scores.loc[i, "credit_score"] == expected.credit_score
+    assert not os.path.exists(str(output) + ".checkpoint.json")
+
+
+def test_score_bulk_resumes_from_checkpoint(score_bulk, extract_csv, tmp_path, monkeypatch):
+    """Test an interrupted run resumes by seeking to the stored input offset and matches a clean run."""
+    clean = tmp_path / "clean.csv"
+    score_bulk.score_file(str(extract_csv), str(clean), chunk_size=2, workers=1)
+    
+    real_plan_chunks = score_bulk.plan_chunks
+    planned = []
+    
+    def interrupted(path, chunk_size, index=0, position=None):
+        for chunk in real_plan_chunks(path, chunk_size, index, position):
+            if chunk.index == 2:
+                raise KeyboardInterrupt
+            yield chunk
+    
+    def recorded(path, chunk_size, index=0, position=None):
+        planned.append((index, position))
+        return real_plan_chunks(path, chunk_size, index, position)
+    
+    output = tmp_path / "scores.csv"
+    monkeypatch.setattr(score_bulk, "plan_chunks", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        score_bulk.score_file(str(extract_csv), str(output), chunk_size=2, workers=1)
+    checkpoint = json.loads(open(str(output) + ".checkpoint.json").read())
+    
+    # Simulate a half-written chunk past the checkpoint
+    with open(output, "ab") as f:
+        f.write(b"4,0xpartial")
+    
+    monkeypatch.setattr(score_bulk, "plan_chunks", recorded)
+    score_bulk.score_file(str(extract_csv), str(output), chunk_size=2, workers=1)
+    assert output.read_bytes() == clean.read_bytes()
+    
+    # The resumed run started at chunk 2's byte offset: the start of input row 4
+    lines = extract_csv.read_bytes().splitlines(keepends=True)
+    assert planned == [(2, checkpoint["input_position"])]
+    assert checkpoint["input_position"] == sum(len(line) for line in lines[:5])
+
+
+def test_csv_chunks_are_line_aligned_byte_ranges(score_bulk, extract_csv, monkeypatch):
+    """Test the planned byte ranges cover every data line once, however the scan blocks fall."""
+    data = extract_csv.read_bytes()
+    header = len(data.splitlines(keepends=True)[0])
+    
+    for block in (7, 64, 1 << 20):
+        monkeypatch.setattr(score_bulk, "SCAN_BLOCK_BYTES", block)
+        chunks = list(score_bulk.plan_chunks(str(extract_csv), 3))
+        assert [(c.index, c.first_row) for c in chunks] == [(0, 0), (1, 3), (2, 6)]
+        assert chunks[0].start == header and chunks[-1].end == len(data)
+        assert all(a.end == b.start for a, b in zip(chunks, chunks[1:]))
+        records = [r for c in chunks for r in score_bulk.read_chunk(str(extract_csv), c)]
+        assert [r["wallet_address"] for r in records] == [f"0x{i:040x}" for i in range(7)]
+
+
+def test_score_bulk_process_pool_preserves_order(score_bulk, extract_csv, tmp_path):
+    """Test chunks scored in parallel worker processes are written in input order."""
+    serial = tmp_path / "serial.csv"
+    parallel = tmp_path / "parallel.csv"
+    score_bulk.score_file(str(extract_csv), str(serial), chunk_size=1, workers=1)
+    score_bulk.score_file(str(extract_csv), str(parallel), chunk_size=1, workers=2)
+    
+    assert parallel.read_bytes() == serial.read_bytes()
+
+
+def test_score_bulk_parquet_parts(score_bulk, extract_csv, tmp_path):
+    """Test Parquet input is scored into ordered part files, each chunk read from its own row groups."""
+    pytest.importorskip("pyarrow")
+    source = tmp_path / "extract.parquet"
+    # Row groups of 2 so chunks of 3 start and end inside them
+    pd.read_csv(extract_csv).to_parquet(source, index=False, row_group_size=2)
+    
+    output = tmp_path / "scores_parquet"
+    score_bulk.score_file(str(source), str(output), chunk_size=3, workers=1)
+    
+    assert sorted(os.listdir(output)) == ["part-00000.parquet", "part-00001.parquet", "part-00002.parquet"]
+    scores = pd.read_parquet(output)
+    assert list(scores["row"]) == list(range(7))
+    assert list(scores["wallet_address"]) == [f"0x{i:040x}" for i in range(7)]
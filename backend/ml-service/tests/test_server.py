@@ -0,0 +1,74 @@
+"""Tests for the shared TCP and Unix-domain-socket listeners."""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import pytest
+from tests.test_prefork import _free_port, _wait_for
+
+
+def _get(transport_kwargs, url):
+    import httpx
+    try:
+        with httpx.Client(transport=httpx.HTTPTransport(**transport_kwargs), timeout=1.0) as client:
+            return client.get(url)
+    except httpx.TransportError:
+        return None
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="requires Unix sockets")
+def test_serves_tcp_and_uds_together(tmp_path):
+    """Test one server answers on TCP and on UDS_PATH, and removes the socket on exit."""
+    port = _free_port()
+    uds_path = str(tmp_path / "ml.sock")
+    service_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, HOST="127.0.0.1", PORT=str(port), UDS_PATH=uds_path, LOG_LEVEL="WARNING")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [service_dir, env.get("PYTHONPATH")]))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.server"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        over_uds = _wait_for(lambda: _get({"uds": uds_path}, "http://ml/health"))
+        over_tcp = _wait_for(lambda: _get({}, f"http://127.0.0.1:{port}/health"))
+        
+        assert over_uds.status_code == over_tcp.status_code == 200
+        assert over_uds.json()["model_version"] == over_tcp.json()["model_version"]
+        assert oct(os.stat(uds_path).st_mode & 0o777) == "0o660"
+        
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=10) == 0
+        assert not os.path.exists(uds_path)
+    finally:
+        if server.poll() is None:
+            server.kill()
+            server.wait()
+
+
+def test_tcp_listener_gets_nodelay_connections(monkeypatch):
+    """Test the TCP listener is created so asyncio enables TCP_NODELAY on accepted connections."""
+    import asyncio
+    from app import server
+    monkeypatch.setattr(server.settings, "HOST", "127.0.0.1")
+    monkeypatch.setattr(server.settings, "PORT", 0)
+    monkeypatch.setattr(server.settings, "UDS_PATH", "")
+    
+    async def accepted_nodelay():
+        (listener,) = server.bind_sockets()
+        result = asyncio.get_running_loop().create_future()
+        
+        def on_connect(reader, writer):
+            sock = writer.get_extra_info("socket")
+            result.set_result(sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY))
+            writer.close()
+        
+        async with await asyncio.start_server(on_connect, sock=listener):
+            _, writer = await asyncio.open_connection(*listener.getsockname())
+            nodelay = await asyncio.wait_for(result, 5)
+            writer.close()
+        return nodelay
+    
+    assert asyncio.run(accepted_nodelay())
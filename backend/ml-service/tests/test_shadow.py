@@ -0,0 +1,107 @@
+"""Tests for shadow scoring with a challenger model."""
+import json
+import threading
+import time
+import joblib
+import numpy as np
+from xgboost import XGBClassifier
+from app.models.loader import ModelLoader
+from app.services.inference import InferenceService
+from app.services.shadow import ShadowScorer
+
+
+def _challenger(tmp_path, version="v2-challenger"):
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(64, 12))
+    model = XGBClassifier(n_estimators=3, max_depth=2).fit(X, (X[:, 9] > 0).astype(int))
+    model_path = tmp_path / "challenger.pkl"
+    joblib.dump(model, model_path)
+    (tmp_path / "challenger_config.json").write_text(json.dumps({"version": version}))
+    return ModelLoader(source="local", local_path=str(model_path), model_dir=str(tmp_path))
+
+
+def _requests(sample_request, n):
+    return [
+        sample_request.model_copy(update={"wallet_address": f"0x{i:040x}", "defaults": i % 3})
+        for i in range(n)
+    ]
+
+
+def _read_log(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_challenger_comparisons_logged(tmp_path, sample_request):
+    """Test sampled requests are scored by the challenger and logged against the primary."""
+    log_path = tmp_path / "shadow.jsonl"
+    loader = _challenger(tmp_path)
+    scorer = ShadowScorer(loader, sample_rate=1.0, log_path=str(log_path))
+    primary = InferenceService()
+    requests = _requests(sample_request, 5)
+    predictions = [primary._rule_based_prediction(request) for request in requests]
+    
+    scorer.start()
+    scorer.submit_many(requests, predictions)
+    scorer.stop()
+    
+    entries = _read_log(log_path)
+    assert [e["wallet_address"] for e in entries] == [r.wallet_address for r in requests]
+    for entry, prediction in zip(entries, predictions):
+        assert entry["challenger_version"] == "v2-challenger"
+        assert entry["primary_version"] == prediction.model_version
+        assert entry["primary_probability"] == prediction.default_probability
+        assert entry["probability_delta"] == entry["challenger_probability"] - prediction.default_probability
+        assert entry["agree"] == (
+            entry["challenger_risk_level"] == prediction.risk_level.value
+            and entry["challenger_action"] == prediction.recommended_action.value
+        )
+
+
+def test_submit_drops_instead_of_blocking(tmp_path, sample_request):
+    """Test a full queue drops samples immediately rather than slowing the caller."""
+    loader = _challenger(tmp_path)
+    loading = threading.Event()
+    release = threading.Event()
+    original = loader.ensure_loaded
+    
+    def slow_load():
+        loading.set()
+        release.wait(5)
+        original()
+    
+    loader.ensure_loaded = slow_load
+    scorer = ShadowScorer(loader, sample_rate=1.0, queue_depth=2, log_path=str(tmp_path / "shadow.jsonl"))
+    dropped_before = scorer._dropped_full.value
+    prediction = InferenceService()._rule_based_prediction(sample_request)
+    
+    scorer.start()
+    loading.wait(5)
+    start = time.perf_counter()
+    for _ in range(10):
+        scorer.submit(sample_request, prediction)
+    elapsed = time.perf_counter() - start
+    release.set()
+    scorer.stop()
+    
+    assert elapsed < 0.05
+    assert scorer._dropped_full.value - dropped_before == 8
+    assert len(_read_log(tmp_path / "shadow.jsonl")) == 2
+
+
+def test_stale_samples_and_sampling_skipped(tmp_path, sample_request):
+    """Test samples older than max_lag_ms are skipped and sample_rate=0 sends nothing."""
+    prediction = InferenceService()._rule_based_prediction(sample_request)
+    stale = ShadowScorer(_challenger(tmp_path), sample_rate=1.0, max_lag_ms=0, log_path=str(tmp_path / "stale.jsonl"))
+    unsampled = ShadowScorer(_challenger(tmp_path), sample_rate=0.0, log_path=str(tmp_path / "none.jsonl"))
+    stale_before = stale._dropped_stale.value
+    
+    for scorer in (stale, unsampled):
+        scorer.start()
+        scorer.submit(sample_request, prediction)
+        time.sleep(0.01)
+        scorer.stop()
+    
+    assert stale._dropped_stale.value - stale_before == 1
+    assert _read_log(tmp_path / "stale.jsonl") == []
+    assert _read_log(tmp_path / "none.jsonl") == []
@@ -0,0 +1,82 @@
+"""Tests for single-flight de-duplication."""
+import asyncio
+import pytest
+from app.services.singleflight import SingleFlight
+
+
+def test_concurrent_duplicates_share_one_execution():
+    """Test concurrent calls with the same key run the work once."""
+    calls = []
+    
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+    
+    async def scenario():
+        flights = SingleFlight("test_sf_shared")
+        return await asyncio.gather(*(flights.do("key", work) for _ in range(5))), flights
+    
+    results, flights = asyncio.run(scenario())
+    
+    assert len(calls) == 1
+    assert [r for r, _ in results] == ["result"] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert len(flights) == 0
+
+
+def test_different_keys_run_separately():
+    """Test calls with different keys are not coalesced."""
+    calls = []
+    
+    async def work(n):
+        calls.append(n)
+        await asyncio.sleep(0.01)
+        return n
+    
+    async def scenario():
+        flights = SingleFlight("test_sf_keys")
+        return await asyncio.gather(flights.do("a", lambda: work(1)), flights.do("b", lambda: work(2)))
+    
+    results = asyncio.run(scenario())
+    
+    assert sorted(calls) == [1, 2]
+    assert [r for r, _ in results] == [1, 2]
+
+
+def test_errors_propagate_to_all_waiters():
+    """Test every waiter sees the failure, and the key is free afterwards."""
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+    
+    async def scenario():
+        flights = SingleFlight("test_sf_errors")
+        results = await asyncio.gather(*(flights.do("key", failing) for _ in range(3)), return_exceptions=True)
+        retry, shared = await flights.do("key", lambda: asyncio.sleep(0, result="ok"))
+        return results, retry, shared
+    
+    results, retry, shared = asyncio.run(scenario())
+    
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert retry == "ok" and not shared
+
+
+def test_leader_cancellation_does_not_cancel_followers():
+    """Test a disconnecting first caller doesn't abort work others wait on."""
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+    
+    async def scenario():
+        flights = SingleFlight("test_sf_cancel")
+        leader = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+    
+    assert asyncio.run(scenario()) == ("done", True)
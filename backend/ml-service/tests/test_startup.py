@@ -0,0 +1,35 @@
+"""Cold-start regression test: import time, memory and lazily imported dependencies."""
+import json
+import os
+import subprocess
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets for `import app.main` in a fresh interpreter, with headroom over
+# the ~0.4s / ~60MB it takes on a development machine
+IMPORT_BUDGET_SECONDS = 2.0
+IMPORT_RSS_BUDGET_BYTES = 150 * 1024 * 1024
+# Imported on first use, never at startup of a local-model, SHAP-off service
+LAZY_MODULES = {"boto3", "botocore", "joblib", "shap", "xgboost", "sklearn"}
+
+
+def test_cold_start_within_budget(tmp_path):
+    """Test importing the app stays within the cold-start budget and leaves heavy dependencies unloaded."""
+    env = dict(os.environ, MODEL_SOURCE="local", ENABLE_SHAP="false", LOCAL_MODEL_PATH=str(tmp_path / "none.pkl"))
+    env.pop("ENABLE_CLOUDWATCH_METRICS", None)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SERVICE_DIR, env.get("PYTHONPATH")]))
+    profile_path = tmp_path / "profile.json"
+    subprocess.run(
+        [sys.executable, os.path.join(SERVICE_DIR, "scripts", "profile_startup.py"), "--json", str(profile_path)],
+        cwd=tmp_path,
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        timeout=60,
+    )
+    profile = json.loads(profile_path.read_text())
+    
+    assert profile["import_seconds"] < IMPORT_BUDGET_SECONDS
+    assert profile["rss_after_import_bytes"] < IMPORT_RSS_BUDGET_BYTES
+    assert not LAZY_MODULES & set(profile["heavy_modules_loaded"])
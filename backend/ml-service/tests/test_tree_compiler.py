@@ -0,0 +1,102 @@
+"""Tests for the compiled NumPy tree-ensemble evaluator."""
+import numpy as np
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+
+from app.models.tree_compiler import compile_xgboost, check_parity, parity_sample
+
+
+@pytest.fixture(scope="module")
+def xgb_model():
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(2000, 12))
+    y = ((X[:, 0] + 0.5 * X[:, 10] - 0.3 * X[:, 11] + rng.normal(scale=0.5, size=2000)) > 0.8).astype(int)
+    model = xgb.XGBClassifier(n_estimators=30, max_depth=4, learning_rate=0.2, random_state=42)
+    model.fit(X, y)
+    return model, X
+
+
+def test_compiled_matches_predict_proba(xgb_model):
+    """Test compiled outputs match XGBoost predict_proba within tolerance."""
+    model, X = xgb_model
+    compiled = compile_xgboost(model)
+    
+    assert compiled.n_trees == 30
+    assert compiled.max_depth <= 4
+    assert check_parity(model, compiled, X[:500]) < 1e-5
+    assert check_parity(model, compiled, parity_sample(compiled)) < 1e-5
+    np.testing.assert_array_equal(compiled.predict(X[:500]), model.predict(X[:500]))
+
+
+def test_compiled_handles_single_row_and_missing_values(xgb_model):
+    """Test 1-D input and NaN features follow XGBoost's default directions."""
+    model, X = xgb_model
+    compiled = compile_xgboost(model)
+    
+    rows = X[:20].copy()
+    rows[::2, 0] = np.nan
+    rows[1::3, 10] = np.nan
+    np.testing.assert_allclose(compiled.predict_proba(rows), model.predict_proba(rows), atol=1e-5)
+    assert compiled.predict_proba(X[0]).shape == (1, 2)
+
+
+def test_parity_check_rejects_divergent_model(xgb_model):
+    """Test the parity check raises when the compiled trees do not match."""
+    model, X = xgb_model
+    compiled = compile_xgboost(model)
+    broken = type(compiled)(**{**compiled.__dict__, "base_margin": compiled.base_margin + 1.0})
+    
+    with pytest.raises(ValueError):
+        check_parity(model, broken, X[:100])
+
+
+def test_fused_scaler_matches_scaled_pipeline():
+    """Test folding a StandardScaler into thresholds preserves predictions on raw features."""
+    from sklearn.preprocessing import StandardScaler
+    from app.models.tree_compiler import fuse_scaler
+    
+    rng = np.random.default_rng(7)
+    X_raw = np.abs(rng.normal(size=(2000, 12))) * np.array([365, 100, 5e4, 20, 1e3, 1.5e3, 6, 2, 2, 0.3, 70, 1.5])
+    y = (X_raw[:, 0] + rng.normal(scale=50, size=2000) < 250).astype(int)
+    scaler = StandardScaler().fit(X_raw)
+    model = xgb.XGBClassifier(n_estimators=30, max_depth=4, random_state=7).fit(scaler.transform(X_raw), y)
+    
+    fused = fuse_scaler(compile_xgboost(model), scaler)
+    
+    assert fused.fused_scaler
+    expected = model.predict_proba(scaler.transform(X_raw[:500]))
+    np.testing.assert_allclose(fused.predict_proba(X_raw[:500]), expected, atol=1e-5)
+    assert check_parity(model, fused, scaler=scaler) < 1e-5
+
+
+def test_loader_serves_single_rows_without_scaler_by_default(tmp_path, monkeypatch, sample_request):
+    """Test the default engine compiles, fuses the scaler and skips scaler.transform for single requests."""
+    import joblib
+    from unittest.mock import patch
+    from sklearn.preprocessing import StandardScaler
+    from app.core.config import settings
+    from app.models.loader import ModelLoader
+    from app.models.registry import ModelRegistry
+    from app.services import inference
+    from app.services.inference import InferenceService
+    
+    rng = np.random.default_rng(3)
+    X_raw = np.abs(rng.normal(size=(500, 12))) * 100
+    scaler = StandardScaler().fit(X_raw)
+    model = xgb.XGBClassifier(n_estimators=10, max_depth=3).fit(scaler.transform(X_raw), (X_raw[:, 10] > 80).astype(int))
+    joblib.dump(model, tmp_path / "credit_model.pkl")
+    joblib.dump(scaler, tmp_path / "credit_model_scaler.pkl")
+    monkeypatch.setattr(settings, "LOCAL_MODEL_PATH", str(tmp_path / "credit_model.pkl"))
+    
+    loader = ModelLoader()
+    loader.load_models()
+    compiled = loader.get_compiled_model()
+    assert compiled is not None and compiled.fused_scaler
+    
+    monkeypatch.setattr(inference, "model_registry", ModelRegistry(loader))
+    features = np.array([InferenceService()._extract_features(sample_request)])
+    expected = model.predict_proba(scaler.transform(features))[0, 1]
+    with patch.object(type(scaler), "transform", side_effect=AssertionError("scaler.transform called")):
+        result = InferenceService().predict(sample_request)
+    assert result.default_probability == pytest.approx(round(float(expected), 4), abs=1e-4)
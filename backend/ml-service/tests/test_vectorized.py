@@ -0,0 +1,112 @@
+"""Parity tests for the array implementations of the rule-based and fallback scorers."""
+from dataclasses import replace
+import numpy as np
+import pytest
+from app.schemas.credit import CreditScoreRequest
+from app.services import vectorized
+from app.services.fallback import FallbackService
+from app.services.inference import InferenceService
+
+FIELDS = [
+    "credit_score",
+    "fraud_score",
+    "anomaly_score",
+    "risk_level",
+    "default_probability",
+    "recommended_action",
+    "interest_rate_suggestion",
+    "max_loan_amount",
+    "model_version",
+    "is_fallback",
+]
+
+
+@pytest.fixture(scope="module")
+def edge_requests():
+    """Requests whose fields sit on, just below and just above every rule threshold."""
+    rng = np.random.default_rng(11)
+    n = 3000
+    loan = rng.choice([1.0, 100.0, 999.99, 1000.0, 25000.0], size=n)
+    # Collateral ratios exactly on the 1.0 / 1.5 / 2.0 cut points, and either side of them
+    ratio = rng.choice([0.0, 0.5, 0.999, 1.0, 1.001, 1.5, 1.499, 2.0, 2.5, 10.0], size=n)
+    return [
+        CreditScoreRequest(
+            wallet_address=f"0x{i:040x}",
+            wallet_age_days=int(rng.choice([0, 6, 7, 29, 30, 89, 90, 179, 180, 364, 365, 366, 5000])),
+            total_transactions=int(rng.choice([0, 1, 2, 3, 4, 5, 99, 100, 101, 1000])),
+            total_volume_usd=float(rng.choice([0.0, 10.0, 1e3, 1e5, 3.3e4])),
+            defi_interactions=int(rng.choice([0, 19, 20, 21, 100])),
+            loan_amount=float(loan[i]),
+            collateral_value_usd=float(loan[i] * ratio[i]),
+            term_months=int(rng.integers(1, 37)),
+            previous_loans=int(rng.choice([0, 1, 3, 7])),
+            successful_repayments=int(rng.choice([0, 1, 2, 3, 4, 7])),
+            defaults=int(rng.choice([0, 0, 0, 1, 2, 3, 4])),
+            reputation_score=int(rng.choice([0, 39, 40, 49, 50, 59, 60, 79, 80, 100])),
+        )
+        for i in range(n)
+    ]
+
+
+def test_rule_based_batch_matches_scalar(edge_requests):
+    """Test the vectorized rule-based scorer matches _rule_based_prediction exactly."""
+    service = InferenceService()
+    
+    batch = service._rule_based_prediction_batch(edge_requests)
+    
+    for request, result in zip(edge_requests, batch):
+        expected = service._rule_based_prediction(request)
+        for field in FIELDS:
+            assert getattr(result, field) == getattr(expected, field), (field, request)
+
+
+def test_fallback_batch_matches_scalar(edge_requests):
+    """Test the vectorized fallback scorer matches FallbackService.calculate_score exactly."""
+    service = FallbackService()
+    
+    batch = service.calculate_scores(edge_requests)
+    
+    for request, result in zip(edge_requests, batch):
+        expected = service.calculate_score(request)
+        for field in FIELDS:
+            assert getattr(result, field) == getattr(expected, field), (field, request)
+
+
+def test_vectorized_scores_accept_raw_columns():
+    """Test the array scorers work on plain columns without building requests."""
+    n = 4
+    cols = {name: np.full(n, 10, dtype=np.int64) for name in vectorized.INT_FIELDS}
+    cols.update({name: np.full(n, 1000.0) for name in vectorized.FLOAT_FIELDS})
+    
+    scores = vectorized.fallback_scores(cols)
+    
+    assert scores["credit_score"].shape == (n,)
+    assert set(scores) >= {"risk_level", "recommended_action", "max_loan_amount"}
+
+
+def test_feature_matrix_matches_extract_features(edge_requests):
+    """Test the columnar feature matrix equals the per-request feature rows."""
+    service = InferenceService()
+    
+    matrix = vectorized.feature_matrix(vectorized.request_columns(edge_requests))
+    
+    assert np.array_equal(matrix, service._extract_feature_matrix(edge_requests))
+
+
+def test_predict_columns_matches_predict_batch(edge_requests, mock_model_loader, monkeypatch):
+    """Test columnar model scoring matches predict_batch field for field."""
+    from app.services import inference as inference_module
+    from app.services import policy
+    monkeypatch.setattr(inference_module, "model_registry", mock_model_loader)
+    probability = np.random.default_rng(2).random(len(edge_requests))
+    mock_model_loader.current.return_value = replace(mock_model_loader.current(), scaler=None)
+    mock_model_loader.get_model().predict_proba.side_effect = lambda X: np.column_stack([1 - probability, probability])
+    service = InferenceService()
+    
+    scores = service.predict_columns(vectorized.request_columns(edge_requests))
+    expected = service.predict_batch(edge_requests)
+    
+    assert scores["credit_score"].tolist() == [r.credit_score for r in expected]
+    assert policy.risk_levels(scores["risk_level"]) == [r.risk_level for r in expected]
+    assert policy.actions(scores["recommended_action"]) == [r.recommended_action for r in expected]
+    assert scores["max_loan_amount"].tolist() == [r.max_loan_amount for r in expected]
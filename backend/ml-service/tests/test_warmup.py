@@ -0,0 +1,91 @@
+"""Tests for background model loading, readiness and cold-start handling."""
+import asyncio
+import threading
+import pytest
+from fastapi.testclient import TestClient
+import app.main as main
+from app.api import routes
+from app.core.config import settings
+from app.services import pipeline
+from app.services.warmup import ModelWarmup
+
+HEADERS = {"X-API-KEY": settings.API_KEY, "Cache-Control": "no-store"}
+
+
+@pytest.fixture
+def gated_warmup(monkeypatch):
+    """Install a fresh ModelWarmup whose loading blocks until released."""
+    release = threading.Event()
+    
+    def load_and_warm():
+        release.wait(5)
+        return pipeline.ensure_models_loaded()
+    
+    def install(mode):
+        warmup = ModelWarmup(routes.inference_executor, cold_start_mode=mode)
+        monkeypatch.setattr(routes, "model_warmup", warmup)
+        monkeypatch.setattr(main, "model_warmup", warmup)
+        return warmup
+    
+    monkeypatch.setattr(pipeline, "load_and_warm", load_and_warm)
+    yield install, release
+    release.set()
+
+
+def test_cold_requests_fall_back_until_ready(gated_warmup, sample_request):
+    """Test /ready is 503 while loading, cold requests get fallback scores, then the model takes over."""
+    install, release = gated_warmup
+    warmup = install("fallback")
+    client = TestClient(main.app)
+    body = sample_request.model_dump()
+    
+    assert client.get("/ready").status_code == 503
+    assert client.get("/health").status_code == 200
+    cold = client.post("/api/ml/credit-score", json=body, headers=HEADERS)
+    cold_batch = client.post("/api/ml/credit-score/batch", json={"requests": [body, body]}, headers=HEADERS)
+    
+    assert cold.status_code == 200 and cold.json()["is_fallback"]
+    assert cold_batch.status_code == 200
+    assert all(r["is_fallback"] for r in cold_batch.json()["results"])
+    
+    release.set()
+    asyncio.run(warmup.wait())
+    
+    ready = client.get("/ready")
+    assert ready.status_code == 200 and ready.json()["status"] == "ready"
+    warm = client.post("/api/ml/credit-score", json=body, headers=HEADERS)
+    assert not warm.json()["is_fallback"]
+
+
+def test_reject_mode_returns_503(gated_warmup, sample_request):
+    """Test reject mode answers cold scoring requests with 503 and Retry-After."""
+    install, release = gated_warmup
+    install("reject")
+    client = TestClient(main.app)
+    body = sample_request.model_dump()
+    
+    single = client.post("/api/ml/credit-score", json=body, headers=HEADERS)
+    batch = client.post("/api/ml/credit-score/batch", json={"requests": [body]}, headers=HEADERS)
+    
+    assert single.status_code == 503 and batch.status_code == 503
+    assert single.headers["Retry-After"] == routes.COLD_RETRY_AFTER_SECONDS
+
+
+def test_unknown_cold_start_mode():
+    """Test an unsupported COLD_START_MODE is rejected up front."""
+    with pytest.raises(ValueError):
+        ModelWarmup(routes.inference_executor, cold_start_mode="queue")
+
+
+def test_mark_ready_skips_loading(gated_warmup, sample_request):
+    """Test a warmup marked ready (as the pre-fork master does) is ready at once and never loads again."""
+    install, release = gated_warmup
+    warmup = install("reject")
+    warmup.mark_ready()
+    
+    with TestClient(main.app) as client:
+        assert client.get("/ready").status_code == 200
+        response = client.post("/api/ml/credit-score", json=sample_request.model_dump(), headers=HEADERS)
+        assert response.status_code == 200
+        assert response.json()["is_fallback"] is False
+    assert warmup.is_ready
@@ -0,0 +1,195 @@
+"""Tests for MessagePack and Arrow IPC content negotiation."""
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api import codecs
+from app.core.config import settings
+
+client = TestClient(app)
+
+HEADERS = {"X-API-KEY": settings.API_KEY, "Cache-Control": "no-store"}
+COMPARED_FIELDS = (
+    "credit_score",
+    "fraud_score",
+    "anomaly_score",
+    "risk_level",
+    "default_probability",
+    "recommended_action",
+    "interest_rate_suggestion",
+    "max_loan_amount",
+    "model_version",
+    "policy_version",
+    "is_fallback",
+)
+
+
+def _requests(sample_request, n=6):
+    return [
+        sample_request.model_copy(update={
+            "wallet_address": f"0x{i:040x}",
+            "wallet_age_days": 3 + 97 * i,
+            "defaults": i % 3,
+            "collateral_value_usd": 400.0 * i,
+        }).model_dump()
+        for i in range(n)
+    ]
+
+
+def _without_timing(data: dict) -> dict:
+    return {k: v for k, v in data.items() if k != "processing_time_ms"}
+
+
+def test_msgpack_single_matches_json(sample_request):
+    """Test a MessagePack request and response carry the same document as JSON."""
+    msgpack = pytest.importorskip("msgpack")
+    payload = sample_request.model_dump()
+    
+    as_json = client.post("/api/ml/credit-score", json=payload, headers=HEADERS)
+    as_msgpack = client.post(
+        "/api/ml/credit-score",
+        content=msgpack.packb(payload),
+        headers={**HEADERS, "Content-Type": codecs.MSGPACK, "Accept": codecs.MSGPACK},
+    )
+    
+    assert as_msgpack.status_code == 200
+    assert as_msgpack.headers["content-type"] == codecs.MSGPACK
+    assert _without_timing(msgpack.unpackb(as_msgpack.content)) == _without_timing(as_json.json())
+
+
+def test_msgpack_batch_matches_json(sample_request):
+    """Test the batch endpoint accepts and returns MessagePack."""
+    msgpack = pytest.importorskip("msgpack")
+    payload = {"requests": _requests(sample_request)}
+    
+    as_json = client.post("/api/ml/credit-score/batch", json=payload, headers=HEADERS).json()
+    response = client.post(
+        "/api/ml/credit-score/batch",
+        content=msgpack.packb(payload),
+        headers={**HEADERS, "Content-Type": "application/x-msgpack", "Accept": codecs.MSGPACK},
+    )
+    
+    assert response.status_code == 200
+    results = msgpack.unpackb(response.content)["results"]
+    assert [_without_timing(r) for r in results] == [_without_timing(r) for r in as_json["results"]]
+
+
+def test_msgpack_validation_error_matches_json():
+    """Test an invalid MessagePack body gets the same 422 as an invalid JSON body."""
+    msgpack = pytest.importorskip("msgpack")
+    
+    as_json = client.post("/api/ml/credit-score", json={"wallet_address": "x"}, headers=HEADERS)
+    as_msgpack = client.post(
+        "/api/ml/credit-score",
+        content=msgpack.packb({"wallet_address": "x"}),
+        headers={**HEADERS, "Content-Type": codecs.MSGPACK},
+    )
+    garbage = client.post(
+        "/api/ml/credit-score",
+        content=b"\xc1",
+        headers={**HEADERS, "Content-Type": codecs.MSGPACK},
+    )
+    
+    assert as_msgpack.status_code == as_json.status_code == 422
+    assert as_msgpack.json() == as_json.json()
+    assert garbage.status_code == 422
+
+
+def test_unsupported_media_types():
+    """Test unknown request and response formats are refused."""
+    body = client.post(
+        "/api/ml/credit-score",
+        content=b"a,b",
+        headers={**HEADERS, "Content-Type": "text/csv"},
+    )
+    accept = client.post(
+        "/api/ml/credit-score",
+        json={},
+        headers={**HEADERS, "Accept": "text/csv, application/json;q=0"},
+    )
+    
+    assert body.status_code == 415
+    assert accept.status_code == 406
+
+
+def test_negotiate_follows_accept_order():
+    """Test the first acceptable listed type wins and wildcards take the default."""
+    assert codecs.negotiate(None, codecs.ROW_FORMATS) == codecs.JSON
+    assert codecs.negotiate("*/*", codecs.ROW_FORMATS) == codecs.JSON
+    assert codecs.negotiate("application/msgpack, application/json", codecs.ROW_FORMATS) == codecs.MSGPACK
+    assert codecs.negotiate("text/html, application/json", codecs.ROW_FORMATS) == codecs.JSON
+
+
+def _arrow_stream(pa, table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def test_arrow_batch_matches_json(sample_request):
+    """Test a columnar Arrow batch scores exactly like the JSON batch endpoint."""
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    requests = _requests(sample_request)
+    
+    as_json = client.post("/api/ml/credit-score/batch", json={"requests": requests}, headers=HEADERS).json()
+    table = pa.Table.from_pylist(requests)
+    response = client.post(
+        "/api/ml/credit-score/batch",
+        content=_arrow_stream(pa, table),
+        headers={**HEADERS, "Content-Type": codecs.ARROW_STREAM},
+    )
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == codecs.ARROW_STREAM
+    result = pa.ipc.open_stream(response.content).read_all()
+    metadata = {k.decode(): v.decode() for k, v in result.schema.metadata.items()}
+    rows = result.to_pylist()
+    
+    assert [row["wallet_address"] for row in rows] == [r["wallet_address"] for r in requests]
+    for row, expected in zip(rows, as_json["results"]):
+        row.update(
+            model_version=metadata["model_version"],
+            policy_version=metadata["policy_version"],
+            is_fallback=metadata["is_fallback"] == "true",
+        )
+        assert {field: row[field] for field in COMPARED_FIELDS} == {field: expected[field] for field in COMPARED_FIELDS}
+
+
+def test_arrow_columns_are_zero_copy(sample_request):
+    """Test int64/float64 columns are read as views and optional columns defaulted."""
+    pa = pytest.importorskip("pyarrow")
+    requests = _requests(sample_request)
+    for request in requests:
+        del request["reputation_score"]
+    table = pa.Table.from_pylist(requests)
+    
+    _, columns = codecs.read_arrow_columns(_arrow_stream(pa, table))
+    
+    assert not columns["wallet_age_days"].flags.owndata
+    assert not columns["loan_amount"].flags.owndata
+    assert columns["reputation_score"].tolist() == [50] * len(requests)
+
+
+def test_arrow_batch_validation(sample_request):
+    """Test out-of-range values and missing required columns are rejected with 422."""
+    pa = pytest.importorskip("pyarrow")
+    requests = _requests(sample_request)
+    requests[2]["term_months"] = 48
+    
+    invalid = client.post(
+        "/api/ml/credit-score/batch",
+        content=_arrow_stream(pa, pa.Table.from_pylist(requests)),
+        headers={**HEADERS, "Content-Type": codecs.ARROW_STREAM},
+    )
+    missing = client.post(
+        "/api/ml/credit-score/batch",
+        content=_arrow_stream(pa, pa.table({"wallet_address": ["0x1"]})),
+        headers={**HEADERS, "Content-Type": codecs.ARROW_STREAM},
+    )
+    
+    assert invalid.status_code == 422
+    assert invalid.json()["detail"][0]["loc"] == ["body", "term_months", 2]
+    assert missing.status_code == 422
+    assert missing.json()["detail"][0]["loc"] == ["body", "wallet_age_days"]